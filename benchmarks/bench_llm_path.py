@@ -0,0 +1,132 @@
+# benchmarks/bench_llm_path.py
+"""
+Drives main.py-style LLM workloads (3 LLM setups x original + 3 counterfactuals per applicant) through
+GeminiClient against the offline stand-in (src/gemini_standin.py) and reports calls/s, p50/p99 latency
+of the API calls themselves and of each assessment as the caller sees it (queueing and retries included),
+and experiment wall time.
+
+Modes:
+    text        one free-text prompt per assessment (main.py's default)
+    structured  schema-constrained JSON verdicts without justification, from the schema-specific prompts
+    streamed    free-text prompts, streamed and cut off once the verdict line arrives
+    packed      base-model setups packed --pack-size applicants per request; tuned model as in text mode
+
+Usage: python -m benchmarks.bench_llm_path [--applicants 100] [--modes text structured streamed packed]
+                                           [--ttft-ms 300] [--throttle-rate 0.02] [--capacity 32]
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_customer_frame
+from src.api_client import GeminiClient
+from src.bias_analyzer import create_counterfactual
+from src.packed_assessment import assess_packed_async
+from src.prompts import create_baseline_llm_prompt, create_debiased_llm_prompt, create_structured_llm_prompt
+
+LLM_SETUPS = {
+    'baseline_llm': (create_baseline_llm_prompt, False),
+    'debiased_llm': (create_debiased_llm_prompt, False),
+    'finetuned_llm': (create_debiased_llm_prompt, True),
+}
+
+def make_profiles(n_applicants: int) -> list:
+    """Original and counterfactual applicant records, as main.py builds them."""
+    sample_df = make_customer_frame(n_applicants)
+    frames = [sample_df] + [sample_df.apply(lambda customer: create_counterfactual(customer, bias_variable=variable), axis=1)
+                            for variable in ['age', 'gender', 'primary_state']]
+    return pd.concat(frames, ignore_index=True).to_dict('records')
+
+class TimedClient(GeminiClient):
+    """A GeminiClient that records how long each assessment took from the caller's side."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies_s = []
+
+    async def get_llm_assessment_async(self, prompt, use_tuned_model=False, generation_config=None, instructions=None,
+                                       accept=None):
+        start = time.perf_counter()
+        response = await super().get_llm_assessment_async(prompt, use_tuned_model, generation_config, instructions,
+                                                          accept)
+        self.latencies_s.append(time.perf_counter() - start)
+        return response
+
+    async def get_streamed_verdict_async(self, prompt, use_tuned_model=False, collect_justification=False):
+        start = time.perf_counter()
+        result = await super().get_streamed_verdict_async(prompt, use_tuned_model, collect_justification)
+        self.latencies_s.append(time.perf_counter() - start)
+        return result
+
+async def run_mode(client: TimedClient, mode: str, records: list, pack_size: int):
+    requests = []
+    for create_prompt, use_tuned_model in LLM_SETUPS.values():
+        if mode == 'packed' and not use_tuned_model:
+            continue
+        if mode == 'structured':
+            debiased = create_prompt is create_debiased_llm_prompt
+            requests.extend((create_structured_llm_prompt(record, debiased), use_tuned_model) for record in records)
+        else:
+            requests.extend((create_prompt(record), use_tuned_model) for record in records)
+
+    tasks = []
+    if mode == 'structured':
+        tasks += [client.get_structured_assessment_async(prompt, use_tuned_model) for prompt, use_tuned_model in requests]
+    elif mode == 'streamed':
+        tasks += [client.get_streamed_verdict_async(prompt, use_tuned_model) for prompt, use_tuned_model in requests]
+    else:
+        tasks += [client.get_llm_assessment_async(prompt, use_tuned_model) for prompt, use_tuned_model in requests]
+    if mode == 'packed':
+        tasks += [assess_packed_async(client, records, debiased=create_prompt is create_debiased_llm_prompt,
+                                      pack_size=pack_size)
+                  for create_prompt, use_tuned_model in LLM_SETUPS.values() if not use_tuned_model]
+    await asyncio.gather(*tasks)
+
+def run_benchmark(n_applicants: int = 100, modes: list = ('text', 'structured', 'streamed', 'packed'), pack_size: int = 10,
+                  max_concurrency: int = 32, requests_per_minute: float = 60000, standin_options: dict = None):
+    records = make_profiles(n_applicants)
+    print(f"\n--- LLM path against the stand-in: {n_applicants} applicants, "
+          f"{len(records) * len(LLM_SETUPS)} assessments per experiment ---")
+    header = (f"{'mode':>11} {'api calls':>10} {'calls/s':>9} {'api p50':>8} {'api p99':>8} {'call p50':>9} "
+              f"{'call p99':>9} {'retries':>8} {'out tok':>9} {'wall s':>8}")
+    rows = []
+    limits = {'requests_per_minute': requests_per_minute, 'initial_concurrency': max_concurrency}
+    for mode in modes:
+        client = TimedClient('standin', backend='standin', max_concurrency=max_concurrency, standin_options=standin_options,
+                             rate_limits={'base': limits, 'tuned': limits})
+        client.load_tuned_model('standin-tuned')
+        start = time.perf_counter()
+        asyncio.run(run_mode(client, mode, records, pack_size))
+        wall_s = time.perf_counter() - start
+
+        models = [client.base_model, client.tuned_model]
+        calls = sum(model.calls for model in models)
+        stats = client.rate_limit_stats().values()
+        api_p50, api_p99 = np.percentile([latency for model in models for latency in model.latencies_s], [50, 99]) * 1000
+        call_p50, call_p99 = np.percentile(client.latencies_s, [50, 99]) * 1000
+        rows.append(f"{mode:>11} {calls:>10} {calls / wall_s:>9.1f} {api_p50:>8.0f} {api_p99:>8.0f} {call_p50:>9.0f} "
+                    f"{call_p99:>9.0f} {sum(s['retries'] for s in stats):>8} "
+                    f"{sum(model.output_tokens_generated for model in models):>9} {wall_s:>8.1f}")
+    print("\n" + header)
+    print("\n".join(rows))
+    print("Latencies in ms. The caller-side p50/p99 include waiting for a rate-limit token and concurrency slot.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the LLM path against the offline Gemini stand-in.")
+    parser.add_argument('--applicants', type=int, default=100)
+    parser.add_argument('--modes', nargs='+', default=['text', 'structured', 'streamed', 'packed'],
+                        choices=['text', 'structured', 'streamed', 'packed'])
+    parser.add_argument('--pack-size', type=int, default=10)
+    parser.add_argument('--max-concurrency', type=int, default=32)
+    parser.add_argument('--rpm', type=float, default=60000, help="Requests per minute allowed per model.")
+    parser.add_argument('--ttft-ms', type=float, default=300, help="Median stand-in time to first token.")
+    parser.add_argument('--ms-per-token', type=float, default=4)
+    parser.add_argument('--throttle-rate', type=float, default=0.02, help="Share of calls answered with a 429.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of calls answered with a 500.")
+    parser.add_argument('--capacity', type=int, help="Stand-in in-flight capacity per model; excess calls get a 429.")
+    args = parser.parse_args()
+    run_benchmark(args.applicants, args.modes, args.pack_size, args.max_concurrency, args.rpm, standin_options={
+        'ttft_ms': args.ttft_ms, 'ms_per_output_token': args.ms_per_token, 'throttle_rate': args.throttle_rate,
+        'error_rate': args.error_rate, 'retry_after_s': 0.5, 'capacity': args.capacity})
@@ -0,0 +1,85 @@
+# benchmarks/bench_onnx_backend.py
+"""
+Compares MLRiskScorer's sklearn and ONNX (onnxruntime) backends: equivalence on held-out data, batch
+throughput, single-row latency and cold startup time (import + model load + first score in a fresh process).
+
+Requires skl2onnx and onnxruntime.
+Usage: python -m benchmarks.bench_onnx_backend [n_rows]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmarks.bench_single_applicant import _latency_percentiles
+from benchmarks.synthetic import make_customer_frame
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+
+STARTUP_SCRIPT = (
+    "import time; start = time.perf_counter(); "
+    "from src.risk_scorer import MLRiskScorer; "
+    "import json; "
+    "scorer = MLRiskScorer({model_path!r}, backend={backend!r}); "
+    "scorer.predict_proba_batch(json.loads({record!r})); "
+    "print(time.perf_counter() - start)"
+)
+
+def _startup_seconds(model_path: str, backend: str, record_json: str, repeats: int = 3) -> float:
+    script = STARTUP_SCRIPT.format(model_path=model_path, backend=backend, record=record_json)
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return min(timings)
+
+def run_benchmark(n_rows: int = 200000, n_requests: int = 2000):
+    # The startup measurements load the model in fresh processes, so it is kept on disk until the run ends
+    model_dir = tempfile.mkdtemp(prefix='onnx_bench_')
+    try:
+        return _compare_backends(os.path.join(model_dir, 'bench_credit_model.joblib'), n_rows, n_requests)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+def _compare_backends(model_path: str, n_rows: int, n_requests: int):
+    df = make_customer_frame(50000)
+    train_df, test_df = train_test_split(df, test_size=0.3, random_state=42, stratify=df['isdelinquent'])
+    train_and_save_model(train_df.copy(), model_path=model_path, export_onnx=True)
+
+    sklearn_scorer = MLRiskScorer(model_path, backend='sklearn')
+    onnx_scorer = MLRiskScorer(model_path, backend='onnx')
+    if onnx_scorer.onnx_runner is None:
+        return None
+
+    # Equivalence on held-out applicants
+    max_diff = onnx_scorer.validate_onnx(test_df)
+    agreement = (onnx_scorer.predict_risk_batch(test_df) == sklearn_scorer.predict_risk_batch(test_df)).mean()
+    print(f"\nHeld-out equivalence on {len(test_df):,} applicants: max |raw PD difference| {max_diff:.2e}, "
+          f"decision agreement {agreement:.2%}")
+
+    batch = make_customer_frame(n_rows, seed=1)
+    records = test_df.head(n_requests).to_dict('records')
+    record_json = pd.DataFrame(records[:1]).to_json(orient='records')
+    rows = []
+    for name, scorer in [('sklearn', sklearn_scorer), ('onnx', onnx_scorer)]:
+        scorer.predict_proba_batch(batch.head(1000))
+        start = time.perf_counter()
+        scorer.predict_proba_batch(batch)
+        batch_seconds = time.perf_counter() - start
+        latency = _latency_percentiles(lambda record: scorer.predict_proba_batch(record)[0], records)
+        rows.append({'backend': name, 'batch_rows_per_s': n_rows / batch_seconds,
+                     'single_p50_us': latency['p50_us'], 'single_p99_us': latency['p99_us'],
+                     'startup_s': _startup_seconds(model_path, name, record_json)})
+
+    results = pd.DataFrame(rows)
+    print(f"\n--- Backend comparison ({n_rows:,}-row batch, {n_requests:,} single-row requests) ---")
+    print(results.to_string(index=False, float_format='%.3f'))
+    return results
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
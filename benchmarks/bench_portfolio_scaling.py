@@ -0,0 +1,47 @@
+# benchmarks/bench_portfolio_scaling.py
+"""
+Measures how portfolio scoring throughput scales with the number of worker processes.
+
+Usage: python -m benchmarks.bench_portfolio_scaling [model_path] [n_rows]
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.synthetic import make_customer_frame
+from src.model_trainer import train_and_save_model
+from src.portfolio_scorer import score_portfolio
+
+def run_benchmark(model_path: str = None, n_rows: int = 2000000, chunk_size: int = 50000):
+    df = make_customer_frame(n_rows, seed=7)
+
+    max_workers = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, max_workers} & set(range(1, max_workers + 1)))
+    output_dir = tempfile.mkdtemp(prefix='portfolio_bench_')
+    rows = []
+    try:
+        if model_path is None:
+            # The workers load the model from disk, so a model trained for the run is kept until they finish
+            model_path = os.path.join(output_dir, 'bench_credit_model.joblib')
+            train_and_save_model(make_customer_frame(50000), model_path=model_path)
+        scores_dir = os.path.join(output_dir, 'scores')
+        for n_workers in worker_counts:
+            summary = score_portfolio(df, model_path=model_path, output_dir=scores_dir, n_workers=n_workers,
+                                      chunk_size=chunk_size)
+            rows.append({'workers': n_workers, 'seconds': summary['seconds'], 'rows_per_s': summary['rows_per_s']})
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    results = pd.DataFrame(rows)
+    results['speedup'] = results['rows_per_s'] / results['rows_per_s'].iloc[0]
+    results['efficiency'] = results['speedup'] / results['workers']
+    print(f"\n--- Portfolio scoring scaling ({n_rows:,} applicants, {max_workers} cores) ---")
+    print(results.to_string(index=False, float_format='%.2f'))
+    return results
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1] if len(sys.argv) > 1 else None,
+                  int(sys.argv[2]) if len(sys.argv) > 2 else 2000000)
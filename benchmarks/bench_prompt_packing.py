@@ -0,0 +1,69 @@
+# benchmarks/bench_prompt_packing.py
+"""
+Compares single-applicant prompts (src/prompts.py) with packed multi-applicant prompts across pack sizes:
+requests and input characters per applicant offline and, with --project, live throughput, Unknown rate
+and re-issues against Vertex AI.
+
+Input tokens are estimated at 4 characters per token, close enough to compare pack sizes.
+
+Usage: python -m benchmarks.bench_prompt_packing [--applicants 200] [--pack-sizes 1 5 10 20 50] [--project ID]
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import make_customer_frame
+from src.prompts import create_debiased_llm_prompt, create_packed_llm_prompt
+
+def prompt_cost(records: list, pack_size: int) -> dict:
+    """Requests and estimated input tokens per applicant for one pack size (1 = the single-applicant prompt)."""
+    if pack_size == 1:
+        prompts = [create_debiased_llm_prompt(record) for record in records]
+    else:
+        prompts = [create_packed_llm_prompt([(str(slot + 1), record) for slot, record in enumerate(records[start:start + pack_size])])
+                   for start in range(0, len(records), pack_size)]
+    characters = sum(len(prompt) for prompt in prompts)
+    return {'requests': len(prompts), 'tokens_per_applicant': characters / 4 / len(records)}
+
+def run_live(client, records: list, pack_size: int) -> dict:
+    start = time.perf_counter()
+    if pack_size == 1:
+        from main import parse_llm_output
+
+        responses = client.get_llm_assessments([(create_debiased_llm_prompt(record), False) for record in records])
+        verdicts = [parse_llm_output(response) for response in responses]
+        reissued = 0
+    else:
+        verdicts, stats = client.get_packed_verdicts(records, pack_size=pack_size)
+        reissued = stats['reissued']
+    elapsed = time.perf_counter() - start
+    return {'applicants_per_s': len(records) / elapsed,
+            'unknown_rate': sum(verdict == 'Unknown' for verdict in verdicts) / len(records), 'reissued': reissued}
+
+def run_benchmark(n_applicants: int = 200, pack_sizes: list = (1, 5, 10, 20, 50), project_id: str = None):
+    records = make_customer_frame(n_applicants).to_dict('records')
+    client = None
+    if project_id:
+        from src.api_client import GeminiClient
+
+        client = GeminiClient(project_id)
+
+    print(f"\n--- Prompt packing: {n_applicants} applicants ---")
+    header = f"{'pack':>5} {'requests':>9} {'in tok/applicant':>17}"
+    if client:
+        header += f" {'applicants/s':>13} {'unknown':>8} {'re-issued':>10}"
+    print(header)
+    for pack_size in pack_sizes:
+        cost = prompt_cost(records, pack_size)
+        line = f"{pack_size:>5} {cost['requests']:>9} {cost['tokens_per_applicant']:>17.1f}"
+        if client:
+            live = run_live(client, records, pack_size)
+            line += f" {live['applicants_per_s']:>13.1f} {live['unknown_rate']:>8.1%} {live['reissued']:>10}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark packed multi-applicant LLM prompts.")
+    parser.add_argument('--applicants', type=int, default=200)
+    parser.add_argument('--pack-sizes', type=int, nargs='+', default=[1, 5, 10, 20, 50])
+    parser.add_argument('--project', help="Google Cloud project to also measure live throughput against.")
+    args = parser.parse_args()
+    run_benchmark(args.applicants, args.pack_sizes, args.project)
@@ -0,0 +1,45 @@
+# benchmarks/bench_rules_engine.py
+"""
+Times the lender policy rules engine on a large synthetic portfolio: the four app.py lender parameters
+plus six threshold/category rules, evaluated over every applicant at once.
+
+Usage: python -m benchmarks.bench_rules_engine [n_rows]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_customer_frame
+from src.rules_engine import RulesEngine, Rule, DEFAULT_LENDER_PARAMETERS
+
+def run_benchmark(n_rows: int = 1000000, repeats: int = 5):
+    df = make_customer_frame(n_rows)
+    engine = RulesEngine.from_lender_parameters(DEFAULT_LENDER_PARAMETERS, extra_rules=[
+        Rule('min_age', 'age', '<', 21),
+        Rule('max_age', 'age', '>', 65),
+        Rule('high_utilization', 'average_utilization', '>', 0.9),
+        Rule('serious_arrears', 'max_days_in_arrears', '>=', 90),
+        Rule('over_limit', 'total_outstanding', '>', 8000000),
+        Rule('watchlist_state', 'primary_state', 'in', ['Borno', 'Yobe'], knockout=False),
+    ])
+
+    start = time.perf_counter()
+    df = engine.prepare(df)
+    prepare_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        policy = engine.evaluate(df)
+        timings.append(time.perf_counter() - start)
+
+    print(f"\n--- Rules engine: {len(engine.rules)} rules x {n_rows:,} applicants ---")
+    print(f"One-off categorical preparation: {prepare_ms:.1f} ms")
+    print(f"Evaluation: best {min(timings) * 1000:.1f} ms, median {np.median(timings) * 1000:.1f} ms")
+    print(f"Knocked out: {policy['knocked_out'].mean():.1%}")
+    print(policy['hit_counts'].to_string())
+    return policy
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
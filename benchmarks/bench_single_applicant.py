@@ -0,0 +1,53 @@
+# benchmarks/bench_single_applicant.py
+"""
+Validates MLRiskScorer's compiled single-applicant plan against the sklearn pipeline on a held-out set
+and compares their per-request latency.
+
+Usage: python -m benchmarks.bench_single_applicant [model_path]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmarks.synthetic import make_customer_frame
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+
+def _latency_percentiles(score, records: list) -> dict:
+    timings = np.empty(len(records))
+    for i, record in enumerate(records):
+        start = time.perf_counter()
+        score(record)
+        timings[i] = time.perf_counter() - start
+    p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+    return {'p50_us': p50, 'p99_us': p99, 'mean_us': timings.mean() * 1e6}
+
+def run_benchmark(model_path: str = None, n_rows: int = 50000, n_requests: int = 2000):
+    df = make_customer_frame(n_rows)
+    train_df, test_df = train_test_split(df, test_size=0.3, random_state=42, stratify=df['isdelinquent'])
+    # A model trained for the run lives in a temporary directory; the scorer holds it in memory once loaded
+    with tempfile.TemporaryDirectory(prefix='single_applicant_bench_') as model_dir:
+        if model_path is None:
+            model_path = os.path.join(model_dir, 'bench_credit_model.joblib')
+            train_and_save_model(train_df.copy(), model_path=model_path)
+        scorer = MLRiskScorer(model_path)
+
+    max_diff = scorer.validate_compiled(test_df)
+    print(f"\nMax |PD difference| between compiled plan and sklearn on {len(test_df):,} test applicants: {max_diff:.2e}")
+
+    records = test_df.head(n_requests).to_dict('records')
+    results = pd.DataFrame([
+        {'path': 'sklearn pipeline', **_latency_percentiles(lambda r: scorer.predict_proba_batch(r)[0], records)},
+        {'path': 'compiled plan', **_latency_percentiles(scorer.compiled.predict_proba, records)},
+    ])
+    print(f"\n--- Single-applicant latency ({n_requests:,} requests) ---")
+    print(results.to_string(index=False, float_format='%.1f'))
+    return results
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
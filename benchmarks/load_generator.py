@@ -0,0 +1,105 @@
+# benchmarks/load_generator.py
+"""
+Load generator for src/scoring_service.py. Opens a pool of keep-alive connections, sends single-applicant
+POST /score requests from many concurrent clients and reports throughput and latency percentiles.
+
+Usage:
+    python -m benchmarks.load_generator --model credit_model.joblib       # starts a local service itself
+    python -m benchmarks.load_generator --url http://127.0.0.1:8080       # targets a running service
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from benchmarks.synthetic import make_customer_frame
+
+async def _client(host: str, port: int, payloads: list, latencies: list, errors: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in payloads:
+            start = time.perf_counter()
+            writer.write(f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            content_length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    content_length = int(value)
+            await reader.readexactly(content_length)
+            latencies.append(time.perf_counter() - start)
+            if b' 200 ' not in status_line:
+                errors.append(status_line.decode('latin-1').strip())
+    finally:
+        writer.close()
+
+async def run_load(host: str, port: int, n_requests: int = 20000, concurrency: int = 64) -> dict:
+    records = make_customer_frame(min(n_requests, 50000)).drop(columns=['isdelinquent']).to_dict('records')
+    payloads = [json.dumps(records[i % len(records)]).encode() for i in range(n_requests)]
+    latencies, errors = [], []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, payloads[i::concurrency], latencies, errors)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9]) * 1000
+    results = {'requests': len(latencies), 'errors': len(errors), 'concurrency': concurrency,
+               'seconds': elapsed, 'requests_per_s': len(latencies) / elapsed,
+               'p50_ms': p50, 'p99_ms': p99, 'p99.9_ms': p999}
+    print("\n--- Scoring service load test ---")
+    for key, value in results.items():
+        print(f"{key:>14}: {value:,.2f}" if isinstance(value, float) else f"{key:>14}: {value:,}")
+    return results
+
+async def _wait_for_port(host: str, port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Scoring service did not start on {host}:{port}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the scoring service with concurrent single-applicant requests.")
+    parser.add_argument('--url', help="Base URL of a running service. If omitted, one is started locally.")
+    parser.add_argument('--model', default='credit_model.joblib', help="Model to serve when starting a local service.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    service = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        service = subprocess.Popen([sys.executable, '-m', 'src.scoring_service', '--model', args.model,
+                                    '--port', str(port), '--max-batch-size', str(args.max_batch_size),
+                                    '--max-delay-ms', str(args.max_delay_ms)])
+    try:
+        asyncio.run(_wait_for_port(host, port))
+        asyncio.run(run_load(host, port, n_requests=args.requests, concurrency=args.concurrency))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+if __name__ == "__main__":
+    main()
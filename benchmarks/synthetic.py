@@ -0,0 +1,57 @@
+# benchmarks/synthetic.py
+import numpy as np
+import pandas as pd
+
+from src.data_loader import categorize_delinquency
+
+NIGERIAN_STATES = [
+    "Abia", "Adamawa", "Akwa Ibom", "Anambra", "Bauchi", "Bayelsa", "Benue", "Borno",
+    "Cross River", "Delta", "Ebonyi", "Edo", "Ekiti", "Enugu", "Gombe", "Imo",
+    "Jigawa", "Kaduna", "Kano", "Katsina", "Kebbi", "Kogi", "Kwara", "Lagos",
+    "Nasarawa", "Niger", "Ogun", "Ondo", "Osun", "Oyo", "Plateau", "Rivers",
+    "Sokoto", "Taraba", "Yobe", "Zamfara", "Abuja FCT"
+]
+
+# High-cardinality categoricals we expect to add to the model (Nigeria has 774 LGAs)
+WIDE_CATEGORICAL_FEATURES = ['lga', 'creditor_bank', 'loan_type']
+
+def make_customer_frame(n_rows: int = 10000, seed: int = 42, wide: bool = False) -> pd.DataFrame:
+    """
+    Generates a customer-level frame with the same columns load_and_process_credit_data() produces,
+    so the ML path can be benchmarked without the bureau extract.
+
+    Args:
+        n_rows: Number of customers.
+        seed: Random seed.
+        wide: Also add LGA, creditor bank and loan type columns with realistic cardinalities.
+    """
+    rng = np.random.default_rng(seed)
+    days_in_arrears = rng.choice([0, 0, 0, 0, 15, 45, 120], size=n_rows)
+    df = pd.DataFrame({
+        'customerid': np.arange(n_rows),
+        'age': rng.integers(21, 70, size=n_rows).astype(float),
+        'gender': rng.choice(['Male', 'Female'], size=n_rows),
+        'primary_state': rng.choice(NIGERIAN_STATES, size=n_rows),
+        'marital_status': rng.choice(['Single', 'Married'], size=n_rows),
+        'credit_limit_facility_amount_global_limit': rng.gamma(2.0, 1.5e6, size=n_rows).round(2),
+        'total_outstanding': rng.gamma(2.0, 1.0e6, size=n_rows).round(2),
+        'average_utilization': rng.beta(2, 3, size=n_rows),
+        'max_days_in_arrears': days_in_arrears,
+    })
+    df['maxdelinquencyseverity'] = pd.Series(days_in_arrears).map(
+        {days: categorize_delinquency(days) for days in np.unique(days_in_arrears)})
+
+    logit = (-1.5 + 2.5 * df['average_utilization'] + 0.02 * (40 - df['age'])
+             + 0.01 * df['max_days_in_arrears'] + rng.normal(0, 1, size=n_rows))
+    if wide:
+        df['lga'] = [f"LGA_{i:03d}" for i in rng.integers(0, 774, size=n_rows)]
+        df['creditor_bank'] = [f"Bank_{i:02d}" for i in rng.integers(0, 60, size=n_rows)]
+        df['loan_type'] = rng.choice(['Term Loan', 'Overdraft', 'Personal Loan', 'MFB Loan', 'Mortgage',
+                                      'Auto Loan', 'Credit Card', 'Asset Finance'], size=n_rows)
+    df['isdelinquent'] = (logit > 0).astype(int)
+
+    # Inputs for the lender policy rules (drawn last so the columns above are unchanged for a given seed)
+    df['active_loans'] = rng.poisson(2.0, size=n_rows)
+    df['monthly_income'] = rng.gamma(2.0, 1.5e5, size=n_rows).round(2)
+    df['credit_source'] = pd.Categorical(rng.choice(['CRC', 'First Central', 'CreditRegistry'], size=n_rows))
+    return df
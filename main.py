@@ -1,6 +1,7 @@
 # main.py
 import os
 import time
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from sklearn.model_selection import train_test_split
@@ -8,9 +9,14 @@ from sklearn.model_selection import train_test_split
 # Import all necessary modules from the src package
 from src.data_loader import load_and_process_credit_data
 from src.model_trainer import train_and_save_model
+from src.model_registry import ModelRegistry
 from src.risk_scorer import MLRiskScorer
+from src.rules_engine import RulesEngine, DEFAULT_LENDER_PARAMETERS
 from src.api_client import GeminiClient
-from src.prompts import create_baseline_llm_prompt, create_debiased_llm_prompt
+from src.llm_cache import LLMResponseCache
+from src.batch_prediction import GCSBatchStorage
+from src.verdict_schema import VerdictStats
+from src.prompts import create_baseline_llm_prompt, create_debiased_llm_prompt, create_structured_llm_prompt, PROMPT_TEMPLATES
 from src.bias_analyzer import create_counterfactual
 from src.visualization import plot_final_analysis
 
@@ -29,7 +35,9 @@ def parse_llm_output(llm_response: str) -> str:
 def main():
     load_dotenv()
     project_id = os.getenv("GOOGLE_CLOUD_PROJECT_ID")
-    if not project_id:
+    # LLM_BACKEND=standin runs the LLM path against the offline stand-in (src/gemini_standin.py)
+    llm_backend = os.getenv("LLM_BACKEND", "vertex")
+    if not project_id and llm_backend != "standin":
         print("🔥 Error: GOOGLE_CLOUD_PROJECT_ID not found in .env file.")
         return
 
@@ -44,91 +52,188 @@ def main():
     train_df, test_df = train_test_split(customer_df, test_size=0.3, random_state=42, stratify=customer_df['isdelinquent'])
     
     # --- 2. Train the Benchmark ML Model on the Training Set ONLY ---
-    train_and_save_model(train_df.copy())
+    # The registry reuses the stored model when the training data and config are unchanged
+    model_registry = ModelRegistry()
+    train_and_save_model(train_df.copy(), registry=model_registry)
     
     # --- 3. Initialize Clients and Load All Models ---
-    ml_scorer = MLRiskScorer()
-    llm_client = GeminiClient(project_id=project_id)
+    ml_scorer = MLRiskScorer(registry=model_registry, tag='latest')
+    # Responses are cached on disk, so reruns only pay for prompts that changed (LLM_CACHE_PATH="" disables)
+    llm_cache_path = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite")
+    llm_cache = LLMResponseCache(llm_cache_path) if llm_cache_path else None
+    # Concurrent LLM requests in flight; raise it as far as the project's Vertex AI quota allows
+    llm_client = GeminiClient(project_id=project_id, max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                              cache=llm_cache, backend=llm_backend)
     llm_client.load_tuned_model(TUNED_MODEL_ENDPOINT_NAME)
     
     analysis_records = []
     # The experiment will now run on the unseen test data
     sample_df = test_df.head(1000)
 
-    print("\n--- 🚀 Starting Comprehensive Accuracy and Fairness Analysis ---")
-    for index, customer in sample_df.iterrows():
-        original_dict = customer.to_dict()
-        
-        # Create counterfactuals for all sensitive attributes
-        cf_age_dict = create_counterfactual(customer, bias_variable='age').to_dict()
-        cf_gender_dict = create_counterfactual(customer, bias_variable='gender').to_dict()
-        cf_state_dict = create_counterfactual(customer, bias_variable='primary_state').to_dict()
-        
-        print(f"\nProcessing applicant #{customer['customerid']}")
+    # --- Apply the lender's knockout policy before any model is run ---
+    # None of the policy rules read age, gender or state, so a knocked-out applicant's counterfactuals are knocked out too.
+    # Knocked-out applicants are reported separately and left out of the model comparison below, so the policy's
+    # decisions are never counted as any model's accuracy or fairness.
+    rules_engine = RulesEngine.from_lender_parameters(DEFAULT_LENDER_PARAMETERS)
+    unavailable = rules_engine.missing_columns(sample_df.columns)
+    if unavailable:
+        # e.g. min_income and credit_sources: the bureau extract has no income or source columns
+        print("🚨 Lender rules not applied, their columns are not in the data: "
+              + ", ".join(f"{name} ('{column}')" for name, column in unavailable.items()))
+        rules_engine.rules = [rule for rule in rules_engine.rules if rule.name not in unavailable]
+    policy = rules_engine.evaluate(sample_df, on_missing='raise')
+    print("\n--- 📋 Lender Policy Rule Hits ---")
+    print(policy['hit_counts'].to_string())
+    declined_by_policy = policy['knocked_out']
+    print(f"{declined_by_policy.sum()} of {len(sample_df)} applicants declined by policy; they are excluded from the "
+          f"model metrics and only the rest are scored.")
 
+    # Create counterfactuals for all sensitive attributes up front
+    cf_frames = {
+        bias_variable: sample_df.apply(lambda customer: create_counterfactual(customer, bias_variable=bias_variable), axis=1)
+        for bias_variable in ['age', 'gender', 'primary_state']
+    }
+
+    # --- Score all originals and counterfactuals that passed the policy with the ML model in one batched call ---
+    n_applicants = len(sample_df)
+    frames = [sample_df] + list(cf_frames.values())
+    ml_predictions = pd.Series('Bad', index=range(4 * n_applicants), dtype=object)
+    scored = np.tile(~declined_by_policy, 4)
+    if scored.any():
+        ml_predictions[scored] = ml_scorer.predict_risk_batch(pd.concat(frames, ignore_index=True)[scored])
+    ml_predictions = ml_predictions.to_numpy()
+    ml_orig, ml_cf_age, ml_cf_gender, ml_cf_state = (
+        ml_predictions[i * n_applicants:(i + 1) * n_applicants] for i in range(4))
+
+    # --- Build every LLM request up front: each LLM setup x (original + 3 counterfactuals) per applicant ---
+    llm_setups = {
+        'baseline_llm': (create_baseline_llm_prompt, False),
+        'debiased_llm': (create_debiased_llm_prompt, False),
+        'finetuned_llm': (create_debiased_llm_prompt, True),
+    }
+    profiles = {
+        'orig': sample_df.to_dict('records'),
+        'age': cf_frames['age'].to_dict('records'),
+        'gender': cf_frames['gender'].to_dict('records'),
+        'state': cf_frames['primary_state'].to_dict('records'),
+    }
+    # With LLM_PACK_SIZE > 1 the base-model setups score that many applicants per request (JSON verdicts);
+    # the tuned model was fine-tuned on single-applicant prompts, so it always gets one per request. Packs are
+    # built per profile, so an original never shares a prompt with its own counterfactuals
+    pack_size = int(os.getenv("LLM_PACK_SIZE", "1"))
+    batch_bucket = os.getenv("LLM_BATCH_GCS_URI")
+    text_mode = not (batch_bucket or os.getenv("LLM_STRUCTURED_VERDICTS") or os.getenv("LLM_STREAM_VERDICTS"))
+    # With LLM_CONTEXT_CACHE the base-model setups send their instruction block as a system instruction and each
+    # call carries only the applicant's data. The block is context cached only once it reaches Vertex AI's minimum
+    # cacheable size, which the current short instructions do not. The tuned model keeps the full prompt it was
+    # fine-tuned on.
+    setup_templates = {'baseline_llm': 'baseline', 'debiased_llm': 'debiased'}
+    context_cache = bool(os.getenv("LLM_CONTEXT_CACHE")) and text_mode
+    if context_cache:
+        llm_client.enable_instruction_cache({name: instructions for name, (instructions, _) in PROMPT_TEMPLATES.items()})
+    llm_requests, request_keys = [], []
+    packed_records, packed_keys, packed_groups = {}, {}, {}
+    for position in np.flatnonzero(~declined_by_policy):
+        for profile, records in profiles.items():
+            for setup, (create_prompt, use_tuned_model) in llm_setups.items():
+                if pack_size > 1 and not use_tuned_model:
+                    packed_records.setdefault(setup, []).append(records[position])
+                    packed_keys.setdefault(setup, []).append((position, profile, setup))
+                    packed_groups.setdefault(setup, []).append(profile)
+                elif context_cache and not use_tuned_model:
+                    template = setup_templates[setup]
+                    llm_requests.append((PROMPT_TEMPLATES[template][1](records[position]), False, template))
+                    request_keys.append((position, profile, setup))
+                else:
+                    llm_requests.append((create_prompt(records[position]), use_tuned_model))
+                    request_keys.append((position, profile, setup))
+
+    print(f"\n--- 🚀 Starting Comprehensive Accuracy and Fairness Analysis ({len(request_keys) + sum(map(len, packed_keys.values()))} LLM assessments) ---")
+    # All calls run concurrently under the client's per-model rate and adaptive concurrency limits, instead of one at a time with sleeps
+    llm_start = time.perf_counter()
+    if batch_bucket:
+        # Batch prediction is slower to start but much cheaper per call for large evaluations
+        llm_responses = dict(zip(request_keys, llm_client.get_llm_assessments_batch(
+            llm_requests, GCSBatchStorage(batch_bucket))))
+    elif os.getenv("LLM_STRUCTURED_VERDICTS"):
+        # JSON verdicts under a response schema with capped output, parsed strictly instead of by text search. The
+        # prompts ask for the schema's fields rather than the free-text "Verdict:" layout the schema would contradict
+        justification = os.getenv("LLM_STRUCTURED_VERDICTS") == "justified"
+        assessments = llm_client.get_structured_assessments(
+            [(create_structured_llm_prompt(profiles[profile][position], debiased=setup != 'baseline_llm',
+                                           justification=justification), llm_setups[setup][1])
+             for position, profile, setup in request_keys], justification=justification)
+        llm_responses = {key: assessment['verdict'] for key, assessment in zip(request_keys, assessments)}
+    elif os.getenv("LLM_STREAM_VERDICTS"):
+        # Stream each response and stop generating once the "Verdict:" line arrives; the justification is unused here
+        assessments = llm_client.get_streamed_verdicts(llm_requests)
+        llm_responses = {key: assessment['verdict'] for key, assessment in zip(request_keys, assessments)}
+    else:
+        llm_responses = dict(zip(request_keys, llm_client.get_llm_assessments(llm_requests)))
+    for setup, records in packed_records.items():
+        verdicts, pack_stats = llm_client.get_packed_verdicts(
+            records, debiased=llm_setups[setup][0] is create_debiased_llm_prompt, pack_size=pack_size,
+            groups=packed_groups[setup])
+        llm_responses.update(zip(packed_keys[setup], verdicts))
+        print(f"  {setup}: {pack_stats['applicants']} assessments in {pack_stats['requests']} packed requests, "
+              f"{pack_stats['duplicates']} identical rows collapsed, {pack_stats['reissued']} re-issued, "
+              f"{pack_stats['unresolved']} unresolved")
+    print(f"✅ LLM calls completed in {time.perf_counter() - llm_start:.1f}s")
+    for model_name, stats in llm_client.rate_limit_stats().items():
+        if stats['requests']:
+            print(f"  {model_name}: {stats['requests']} requests, {stats['throttled']} throttled (429/503), "
+                  f"{stats['retries']} retries, concurrency limit now {stats['concurrency_limit']}, "
+                  f"{stats['output_tokens']} output tokens, {stats['cached_input_tokens']} of "
+                  f"{stats['input_tokens']} input tokens served from the context cache")
+    print(f"  {llm_client.deduplicated_calls()} calls saved by collapsing identical prompts "
+          f"(e.g. counterfactuals the debiased prompt cannot see)")
+    if llm_cache is not None:
+        cache_stats = llm_cache.stats()
+        print(f"  response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['entries']} entries")
+
+    ml_verdicts = {'orig': ml_orig, 'age': ml_cf_age, 'gender': ml_cf_gender, 'state': ml_cf_state}
+    # Every verdict, whichever mode produced it, is counted here and only here
+    verdict_stats = VerdictStats()
+    policy_records = []
+    for position, original_dict in enumerate(profiles['orig']):
         ground_truth = 'Bad' if original_dict['isdelinquent'] == 1 else 'Good'
 
-        # --- Get predictions for the original profile from all models ---
-        ml_risk_orig = ml_scorer.predict_risk(original_dict)
-        baseline_risk_orig = parse_llm_output(llm_client.get_llm_assessment(create_baseline_llm_prompt(original_dict)))
-        time.sleep(2)
-        debiased_risk_orig = parse_llm_output(llm_client.get_llm_assessment(create_debiased_llm_prompt(original_dict)))
-        time.sleep(2)
-        
+        if declined_by_policy[position]:
+            # Knocked out by the lender policy: no model is run, and the applicant is reported separately
+            policy_records.append({'rule': policy['knockout_reason'][position], 'ground_truth': ground_truth})
+            continue
+
         # --- DEBUGGING THE FINE-TUNED MODEL ---
-        raw_response_finetuned = llm_client.get_llm_assessment(create_debiased_llm_prompt(original_dict), use_tuned_model=True)
-        print(f"RAW RESPONSE FROM TUNED MODEL: ---> {raw_response_finetuned} <---") # This is the crucial line
-        finetuned_risk_orig = parse_llm_output(raw_response_finetuned)
-        time.sleep(2)
-        # --- END DEBUGGING BLOCK ---
-
-        # --- Get predictions for ALL counterfactuals to test fairness across ALL models ---
-        # Age Counterfactuals
-        ml_risk_cf_age = ml_scorer.predict_risk(cf_age_dict)
-        baseline_risk_cf_age = parse_llm_output(llm_client.get_llm_assessment(create_baseline_llm_prompt(cf_age_dict)))
-        time.sleep(2)
-        debiased_risk_cf_age = parse_llm_output(llm_client.get_llm_assessment(create_debiased_llm_prompt(cf_age_dict)))
-        time.sleep(2)
-        finetuned_risk_cf_age = parse_llm_output(llm_client.get_llm_assessment(create_debiased_llm_prompt(cf_age_dict), use_tuned_model=True))
-        time.sleep(2)
-
-        # Gender Counterfactuals
-        ml_risk_cf_gender = ml_scorer.predict_risk(cf_gender_dict)
-        baseline_risk_cf_gender = parse_llm_output(llm_client.get_llm_assessment(create_baseline_llm_prompt(cf_gender_dict)))
-        time.sleep(2)
-        debiased_risk_cf_gender = parse_llm_output(llm_client.get_llm_assessment(create_debiased_llm_prompt(cf_gender_dict)))
-        time.sleep(2)
-        finetuned_risk_cf_gender = parse_llm_output(llm_client.get_llm_assessment(create_debiased_llm_prompt(cf_gender_dict), use_tuned_model=True))
-        time.sleep(2)
-        
-        # State Counterfactuals
-        ml_risk_cf_state = ml_scorer.predict_risk(cf_state_dict)
-        baseline_risk_cf_state = parse_llm_output(llm_client.get_llm_assessment(create_baseline_llm_prompt(cf_state_dict)))
-        time.sleep(2)
-        debiased_risk_cf_state = parse_llm_output(llm_client.get_llm_assessment(create_debiased_llm_prompt(cf_state_dict)))
-        time.sleep(2)
-        finetuned_risk_cf_state = parse_llm_output(llm_client.get_llm_assessment(create_debiased_llm_prompt(cf_state_dict), use_tuned_model=True))
-        time.sleep(2)
-        
-        analysis_records.append({
-            'ground_truth': ground_truth,
-            'ml_pred': ml_risk_orig,
-            'baseline_llm_pred': baseline_risk_orig,
-            'debiased_llm_pred': debiased_risk_orig,
-            'finetuned_llm_pred': finetuned_risk_orig,
-            'ml_fairness_change_age': ml_risk_orig != ml_risk_cf_age,
-            'baseline_llm_fairness_change_age': baseline_risk_orig != baseline_risk_cf_age,
-            'debiased_llm_fairness_change_age': debiased_risk_orig != debiased_risk_cf_age,
-            'finetuned_llm_fairness_change_age': finetuned_risk_orig != finetuned_risk_cf_age,
-            'ml_fairness_change_gender': ml_risk_orig != ml_risk_cf_gender,
-            'baseline_llm_fairness_change_gender': baseline_risk_orig != baseline_risk_cf_gender,
-            'debiased_llm_fairness_change_gender': debiased_risk_orig != debiased_risk_cf_gender,
-            'finetuned_llm_fairness_change_gender': finetuned_risk_orig != finetuned_risk_cf_gender,
-            'ml_fairness_change_state': ml_risk_orig != ml_risk_cf_state,
-            'baseline_llm_fairness_change_state': baseline_risk_orig != baseline_risk_cf_state,
-            'debiased_llm_fairness_change_state': debiased_risk_orig != debiased_risk_cf_state,
-            'finetuned_llm_fairness_change_state': finetuned_risk_orig != finetuned_risk_cf_state,
-        })
+        raw_response_finetuned = llm_responses[(position, 'orig', 'finetuned_llm')]
+        print(f"RAW RESPONSE FROM TUNED MODEL for applicant #{original_dict['customerid']}: ---> {raw_response_finetuned} <---")
+
+        # Verdicts of every model for the original profile and each counterfactual
+        verdicts = {'ml': {profile: ml_verdicts[profile][position] for profile in profiles}}
+        for setup in llm_setups:
+            verdicts[setup] = {profile: parse_llm_output(llm_responses[(position, profile, setup)]) for profile in profiles}
+            for verdict in verdicts[setup].values():
+                verdict_stats.record(verdict, setup)
+
+        record = {'ground_truth': ground_truth}
+        record.update({f'{model}_pred': verdicts[model]['orig'] for model in verdicts})
+        for attribute in ['age', 'gender', 'state']:
+            record.update({f'{model}_fairness_change_{attribute}': verdicts[model]['orig'] != verdicts[model][attribute]
+                           for model in verdicts})
+        analysis_records.append(record)
+
+    print("\n--- LLM verdicts that could not be parsed (Unknown) ---")
+    for setup in llm_setups:
+        print(f"  {setup}: {verdict_stats.unknown_rate(setup):.1%}" if setup in verdict_stats.counts else f"  {setup}: -")
+
+    if policy_records:
+        declined_df = pd.DataFrame(policy_records)
+        print("\n--- 📋 Applicants Declined by Lender Policy (not in the model metrics) ---")
+        print(declined_df.groupby('rule', observed=True)['ground_truth'].agg(
+            declined='size', actually_delinquent=lambda truth: (truth == 'Bad').sum()).to_string())
+    if not analysis_records:
+        print("🔥 Error: Every applicant was declined by policy; there is nothing to compare the models on.")
+        return
 
     # --- 4. Calculate Final Metrics ---
     results_df = pd.DataFrame(analysis_records)
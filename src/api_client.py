@@ -1,24 +1,83 @@
 # src/api_client.py
+import asyncio
+import datetime
+import time
+
 import vertexai
 from vertexai.generative_models import GenerativeModel, Content, Part
 
+from src.batch_prediction import VertexBatchSubmitter, run_batch_prediction
+from src.gemini_standin import MIN_CACHED_CONTENT_TOKENS, StandInModel, estimate_tokens
+from src.llm_cache import LLMResponseCache, llm_cache_key
+from src.packed_assessment import assess_packed_async
+from src.rate_limiter import EndpointLimiter, backoff_delay, is_retryable, retry_after_seconds
+from src.request_dedup import SingleFlight, canonical_prompt, dedupe_requests
+from src.verdict_schema import parse_structured_verdict, parse_verdict_prefix, verdict_generation_config
+
+# Per-endpoint quotas. Tuned models are served from a dedicated endpoint with a lower quota than the
+# shared base model; override with the rate_limits argument to match the project's actual quotas.
+DEFAULT_RATE_LIMITS = {
+    'base': {'requests_per_minute': 300, 'initial_concurrency': 4},
+    'tuned': {'requests_per_minute': 60, 'initial_concurrency': 2},
+}
+
+BASE_MODEL_NAME = "gemini-2.5-flash"
+
 class GeminiClient:
     """
     Handles all communication with the Gemini API via the Vertex AI SDK.
     This client can manage both a base model and a fine-tuned model.
     """
-    def __init__(self, project_id: str, location: str = "us-central1"):
+    def __init__(self, project_id: str, location: str = "us-central1", max_concurrency: int = 8,
+                 rate_limits: dict = None, max_retries: int = 5, latency_target_s: float = None,
+                 cache: LLMResponseCache = None, generation_config: dict = None, backend: str = "vertex",
+                 standin_options: dict = None):
         """
         Initializes the client and loads the default base model.
+
+        Args:
+            max_concurrency: Upper bound on requests the async methods keep in flight per model. Within it the
+                             limit adapts (AIMD) to observed latency and 429/503 responses.
+            rate_limits: Per-model quotas, {'base': {...}, 'tuned': {...}}, with keys requests_per_minute,
+                         burst and initial_concurrency. Defaults to DEFAULT_RATE_LIMITS.
+            max_retries: Retries of a 429/503 response before the error is returned.
+            latency_target_s: Treat responses slower than this as congestion and back off concurrency.
+            cache: Persistent response cache; identical requests (same model, prompt and generation_config)
+                   are answered from it without an API call.
+            generation_config: Generation parameters sent with every request (temperature, max_output_tokens, ...).
+            backend: "vertex" for Vertex AI, or "standin" for the offline StandInModel (no project access needed).
+            standin_options: StandInModel arguments (latency, error and 429 rates, ...) for the stand-in backend.
         """
         self.base_model = None
         self.tuned_model = None
+        self.tuned_model_name = None
+        self.cache = cache
+        self.generation_config = generation_config
+        self.single_flight = SingleFlight()
+        # Base-model variants carrying a static instruction block, by template name (enable_instruction_cache)
+        self.instruction_models = {}
+        self.instruction_texts = {}
+        self.collapsed_requests = 0
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backend = backend
+        if backend == "standin":
+            self._new_model = lambda model_name, **kwargs: StandInModel(model_name, **{**(standin_options or {}), **kwargs})
+        else:
+            self._new_model = GenerativeModel
+        self.limiters = {}
+        for name, defaults in DEFAULT_RATE_LIMITS.items():
+            limits = {**defaults, **(rate_limits or {}).get(name, {})}
+            limits['initial_concurrency'] = min(limits['initial_concurrency'], max_concurrency)
+            self.limiters[name] = EndpointLimiter(max_concurrency=max_concurrency, latency_target_s=latency_target_s,
+                                                  **limits)
         
         try:
-            vertexai.init(project=project_id, location=location)
+            if backend != "standin":
+                vertexai.init(project=project_id, location=location)
             # Load the base model by default upon initialization
-            self.base_model = GenerativeModel("gemini-2.5-flash")
-            print("✅ Gemini Client initialized successfully with base model.")
+            self.base_model = self._new_model(BASE_MODEL_NAME)
+            print(f"✅ Gemini Client initialized successfully with base model ({backend} backend).")
         except Exception as e:
             print(f"🔥 Error initializing Gemini Client: {e}")
 
@@ -36,26 +95,385 @@ class GeminiClient:
 
         try:
             # Correct Method: Load the fine-tuned model directly using GenerativeModel
-            self.tuned_model = GenerativeModel(tuned_model_name)
+            self.tuned_model = self._new_model(tuned_model_name)
+            self.tuned_model_name = tuned_model_name
             print(f"✅ Fine-tuned model loaded successfully: {tuned_model_name}")
         except Exception as e:
             print(f"🔥 Error loading fine-tuned model: {e}")
 
-    def get_llm_assessment(self, prompt: str, use_tuned_model: bool = False) -> str:
+    def enable_instruction_cache(self, templates: dict, ttl_minutes: int = 60):
         """
-        Sends a prompt to the specified Gemini model and returns the text response.
+        Moves static instruction blocks out of the per-call prompt: for each template a base-model variant
+        is created with the block as its system instruction, backed by a Vertex AI context cache, so calls
+        made with instructions=<name> only send the applicant's data block.
+
+        Vertex AI only caches content of at least MIN_CACHED_CONTENT_TOKENS (1,024 for gemini-2.5-flash). Blocks
+        estimated below that are not sent to CachedContent.create at all, and blocks whose cache cannot be
+        created still go out as a (non-cached) system instruction, so the call path is the same either way.
+
+        Args:
+            templates: {name: instruction text}, e.g. {name: instructions for name, (instructions, _) in PROMPT_TEMPLATES.items()}.
+            ttl_minutes: Lifetime of each context cache.
         """
+        for name, instructions in templates.items():
+            self.instruction_texts[name] = instructions
+            # A character-based estimate; a block just over the line that Vertex still counts as too small
+            # fails in create() and takes the fallback below
+            tokens = estimate_tokens(instructions)
+            if tokens < MIN_CACHED_CONTENT_TOKENS:
+                print(f"🚨 The '{name}' instructions (~{tokens} tokens) are below the {MIN_CACHED_CONTENT_TOKENS}-token "
+                      f"context cache minimum; sending them as a system instruction instead.")
+                self.instruction_models[name] = self._new_model(BASE_MODEL_NAME, system_instruction=instructions)
+                continue
+            try:
+                if self.backend == "standin":
+                    self.instruction_models[name] = self._new_model(BASE_MODEL_NAME, system_instruction=instructions,
+                                                                    cache_system_instruction=True)
+                else:
+                    from vertexai.preview import caching
+
+                    cached_content = caching.CachedContent.create(model_name=BASE_MODEL_NAME,
+                                                                  system_instruction=instructions,
+                                                                  ttl=datetime.timedelta(minutes=ttl_minutes))
+                    self.instruction_models[name] = GenerativeModel.from_cached_content(cached_content=cached_content)
+                print(f"✅ Context cache created for the '{name}' instructions.")
+            except Exception as e:
+                print(f"🚨 Could not create a context cache for the '{name}' instructions ({e}); "
+                      f"sending them as a system instruction instead.")
+                self.instruction_models[name] = self._new_model(BASE_MODEL_NAME, system_instruction=instructions)
+
+    def _select_model(self, use_tuned_model: bool):
+        """Returns (model, error message); the message is set when the requested model is not loaded."""
         model_to_use = self.tuned_model if use_tuned_model else self.base_model
-        
         if not model_to_use:
             error_msg = "Fine-tuned model" if use_tuned_model else "Base model"
-            return f"LLM Error: {error_msg} is not available."
-            
+            return None, f"LLM Error: {error_msg} is not available."
+        return model_to_use, None
+
+    def _request_model(self, prompt: str, use_tuned_model: bool, instructions: str = None):
+        """
+        Returns (model, full prompt, error message) for a request. The full prompt is everything the model sees,
+        instruction block included, which is what the response cache and de-duplication key on.
+        """
+        if instructions is None:
+            model_to_use, error = self._select_model(use_tuned_model)
+            return model_to_use, prompt, error
+        if use_tuned_model or instructions not in self.instruction_models:
+            return None, prompt, f"LLM Error: No instruction cache '{instructions}' for the {'tuned' if use_tuned_model else 'base'} model."
+        return self.instruction_models[instructions], f"{self.instruction_texts[instructions]}\n\n{prompt}", None
+
+    @staticmethod
+    def _build_request(prompt: str) -> list:
+        # The fine-tuned model expects a structured conversational format.
+        # It's good practice to use this for the base model as well for consistency.
+        return [Content(role="user", parts=[Part.from_text(prompt)])]
+
+    def _cache_key(self, prompt: str, use_tuned_model: bool, generation_config: dict = None) -> str:
+        model_name = self.tuned_model_name if use_tuned_model else BASE_MODEL_NAME
+        return llm_cache_key(model_name, prompt, generation_config)
+
+    def _cached_response(self, prompt: str, use_tuned_model: bool, generation_config: dict = None):
+        """Returns (cache key, cached text); both are None when caching is off."""
+        if self.cache is None:
+            return None, None
+        key = self._cache_key(prompt, use_tuned_model, generation_config)
+        return key, self.cache.get(key)
+
+    def _store_response(self, key: str, text: str, use_tuned_model: bool):
+        if key is not None:
+            self.cache.put(key, text, self.tuned_model_name if use_tuned_model else BASE_MODEL_NAME)
+
+    def get_llm_assessment(self, prompt: str, use_tuned_model: bool = False) -> str:
+        """
+        Sends a prompt to the specified Gemini model and returns the text response.
+        """
+        model_to_use, error = self._select_model(use_tuned_model)
+        if error:
+            return error
+        key, cached = self._cached_response(prompt, use_tuned_model, self.generation_config)
+        if cached is not None:
+            return cached
+
         try:
-            # The fine-tuned model expects a structured conversational format.
-            # It's good practice to use this for the base model as well for consistency.
-            request = [Content(role="user", parts=[Part.from_text(prompt)])]
-            response = model_to_use.generate_content(request)
+            response = model_to_use.generate_content(self._build_request(prompt),
+                                                     generation_config=self.generation_config)
+            self._store_response(key, response.text, use_tuned_model)
             return response.text
         except Exception as e:
             return f"An error occurred with the LLM API call: {e}"
+
+    async def get_llm_assessment_async(self, prompt: str, use_tuned_model: bool = False,
+                                       generation_config: dict = None, instructions: str = None,
+                                       accept=None) -> str:
+        """
+        Async version of get_llm_assessment. Each call takes a token from its model's rate bucket and a slot
+        under its adaptive concurrency limit. 429/503 responses are retried with jittered exponential backoff,
+        waiting at least as long as the server's Retry-After.
+
+        Identical requests (same model, canonical prompt and generation config) already in flight are not
+        sent again; the caller awaits the in-flight call's result.
+
+        Args:
+            generation_config: Overrides the client's generation_config for this call (e.g. a response schema).
+            instructions: Name of an instruction block registered with enable_instruction_cache(); prompt is then
+                          only the per-applicant data block. Base model only.
+            accept: Optional check of the response text; a response it rejects (e.g. truncated JSON) is returned
+                    but not cached, so asking again reaches the model instead of replaying the bad answer.
+        """
+        generation_config = generation_config if generation_config is not None else self.generation_config
+        model_to_use, key_prompt, error = self._request_model(prompt, use_tuned_model, instructions)
+        if error:
+            return error
+        flight_key = self._cache_key(canonical_prompt(key_prompt), use_tuned_model, generation_config)
+        return await self.single_flight.do(flight_key, lambda: self._call_model_async(
+            model_to_use, prompt, use_tuned_model, generation_config, key_prompt, accept))
+
+    async def _call_model_async(self, model_to_use, prompt: str, use_tuned_model: bool, generation_config: dict,
+                                key_prompt: str, accept=None) -> str:
+        # Cache hits cost neither quota nor a concurrency slot
+        key, cached = self._cached_response(key_prompt, use_tuned_model, generation_config)
+        if cached is not None:
+            return cached
+
+        response, error = await self._limited_call(use_tuned_model, lambda: model_to_use.generate_content_async(
+            self._build_request(prompt), generation_config=generation_config))
+        if error:
+            return error
+        self.limiters['tuned' if use_tuned_model else 'base'].record_usage(response)
+        # Only real answers are cached; errors and rejected answers are retried on the next call
+        if accept is None or accept(response.text):
+            self._store_response(key, response.text, use_tuned_model)
+        return response.text
+
+    async def _limited_call(self, use_tuned_model: bool, make_call):
+        """
+        Awaits make_call() under the model's rate and concurrency limits, retrying 429/503 responses.
+
+        Returns:
+            A tuple (result, error message); the message is set when the call failed for good.
+        """
+        limiter = self.limiters['tuned' if use_tuned_model else 'base']
+        for attempt in range(self.max_retries + 1):
+            await limiter.bucket.acquire()
+            async with limiter.concurrency:
+                limiter.requests += 1
+                start = time.monotonic()
+                try:
+                    result = await make_call()
+                    limiter.concurrency.on_success(time.monotonic() - start)
+                    return result, None
+                except Exception as e:
+                    if not is_retryable(e):
+                        return None, f"An error occurred with the LLM API call: {e}"
+                    limiter.throttled += 1
+                    limiter.concurrency.on_overload(start)
+                    if attempt == self.max_retries:
+                        return None, f"An error occurred with the LLM API call after {attempt + 1} attempts: {e}"
+                    retry_after = retry_after_seconds(e)
+                    if retry_after is not None:
+                        # The quota is shared by every caller of this model, so hold them all back
+                        limiter.bucket.pause(retry_after)
+            # Sleep outside the concurrency slot so other requests can use it meanwhile
+            limiter.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, retry_after_s=retry_after))
+
+    async def get_streamed_verdict_async(self, prompt: str, use_tuned_model: bool = False,
+                                         collect_justification: bool = False) -> dict:
+        """
+        Streams the response and returns as soon as the "Verdict: Good/Bad" line has been parsed, closing
+        the stream so the rest of the generation (the justification) is cancelled.
+
+        Args:
+            collect_justification: Read the stream to the end instead, so 'text' holds the full response.
+
+        Returns:
+            {'verdict': 'Good' | 'Bad' | 'Unknown', 'text': the text received, 'complete': whether the
+            stream was read to the end}. Only complete responses are cached. Token usage is recorded from the
+            last chunk received, whose usage_metadata holds the running totals.
+        """
+        model_to_use, error = self._select_model(use_tuned_model)
+        if error:
+            result = {'verdict': 'Unknown', 'text': error, 'complete': False}
+        else:
+            # Concurrent duplicates share one stream, as in get_llm_assessment_async
+            flight_key = ('stream', collect_justification,
+                          self._cache_key(canonical_prompt(prompt), use_tuned_model, self.generation_config))
+            result = await self.single_flight.do(flight_key, lambda: self._stream_verdict_async(
+                model_to_use, prompt, use_tuned_model, collect_justification))
+        return result
+
+    async def _stream_verdict_async(self, model_to_use, prompt: str, use_tuned_model: bool,
+                                    collect_justification: bool) -> dict:
+        key, cached = self._cached_response(prompt, use_tuned_model, self.generation_config)
+        if cached is not None:
+            return {'verdict': parse_verdict_prefix(cached) or 'Unknown', 'text': cached, 'complete': True}
+
+        async def read_stream():
+            stream = await model_to_use.generate_content_async(self._build_request(prompt),
+                                                               generation_config=self.generation_config, stream=True)
+            text, verdict, complete, last_usage = "", None, True, None
+            try:
+                async for chunk in stream:
+                    text += chunk.text
+                    if getattr(chunk, 'usage_metadata', None) is not None:
+                        last_usage = chunk
+                    verdict = verdict or parse_verdict_prefix(text)
+                    if verdict and not collect_justification:
+                        complete = False
+                        break
+            finally:
+                # Closing the stream cancels the generation server-side
+                if hasattr(stream, 'aclose'):
+                    await stream.aclose()
+            return text, verdict, complete, last_usage
+
+        result, error = await self._limited_call(use_tuned_model, read_stream)
+        if error:
+            return {'verdict': 'Unknown', 'text': error, 'complete': False}
+        text, verdict, complete, last_usage = result
+        if last_usage is not None:
+            self.limiters['tuned' if use_tuned_model else 'base'].record_usage(last_usage)
+        if complete:
+            self._store_response(key, text, use_tuned_model)
+        return {'verdict': verdict or 'Unknown', 'text': text, 'complete': complete}
+
+    def get_streamed_verdicts(self, requests: list, collect_justification: bool = False) -> list:
+        """
+        Runs many streamed assessments concurrently; duplicate requests are sent once.
+
+        Args:
+            requests: A list of (prompt, use_tuned_model) tuples.
+
+        Returns:
+            One {'verdict', 'text', 'complete'} dict per request, in order.
+        """
+        unique, representatives = self._collapse_duplicates(requests)
+
+        async def run_all():
+            return await asyncio.gather(*(self.get_streamed_verdict_async(prompt, use_tuned_model, collect_justification)
+                                          for prompt, use_tuned_model in unique))
+        results = asyncio.run(run_all())
+        return [results[position] for position in representatives]
+
+    def deduplicated_calls(self) -> int:
+        """API calls saved by collapsing identical requests, within one request list or in flight at once."""
+        return self.single_flight.shared + self.collapsed_requests
+
+    def rate_limit_stats(self) -> dict:
+        """Request, throttle and retry counts and the current concurrency limit, per model."""
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+    async def get_llm_assessments_async(self, requests: list) -> list:
+        """
+        Runs many assessments concurrently. Duplicate requests (same canonical prompt and model) are sent once.
+
+        Args:
+            requests: A list of (prompt, use_tuned_model) or (prompt, use_tuned_model, instructions) tuples.
+
+        Returns:
+            The text responses, in the same order as requests.
+        """
+        unique, representatives = self._collapse_duplicates(requests)
+        responses = await asyncio.gather(*(self.get_llm_assessment_async(request[0], request[1], None, *request[2:])
+                                           for request in unique))
+        return [responses[position] for position in representatives]
+
+    def _collapse_duplicates(self, requests: list):
+        unique, representatives = dedupe_requests(requests, key=lambda request: (canonical_prompt(request[0]), *request[1:]))
+        self.collapsed_requests += len(requests) - len(unique)
+        return unique, representatives
+
+    def get_llm_assessments(self, requests: list) -> list:
+        """Blocking wrapper around get_llm_assessments_async for scripts without an event loop."""
+        return asyncio.run(self.get_llm_assessments_async(requests))
+
+    async def get_structured_assessment_async(self, prompt: str, use_tuned_model: bool = False,
+                                              justification: bool = False, max_output_tokens: int = None) -> dict:
+        """
+        Assessment with a schema-constrained JSON verdict and a capped output length, parsed strictly.
+        Without a justification the model emits only {"verdict": ...}, a handful of output tokens.
+
+        Returns:
+            {'verdict': 'Good' | 'Bad' | 'Unknown', 'justification': str or None}.
+        """
+        config = verdict_generation_config(self.generation_config, justification, max_output_tokens)
+        # A response the strict parse rejects (e.g. truncated JSON) is not cached, so asking again reaches the model
+        response = await self.get_llm_assessment_async(
+            prompt, use_tuned_model, config, accept=lambda text: parse_structured_verdict(text)[0] != 'Unknown')
+        verdict, reason = parse_structured_verdict(response)
+        return {'verdict': verdict, 'justification': reason}
+
+    def get_structured_assessments(self, requests: list, justification: bool = False,
+                                   max_output_tokens: int = None) -> list:
+        """
+        Runs many structured assessments concurrently.
+
+        Args:
+            requests: A list of (prompt, use_tuned_model) tuples.
+
+        Returns:
+            One {'verdict', 'justification'} dict per request, in order.
+        """
+        async def run_all():
+            return await asyncio.gather(*(
+                self.get_structured_assessment_async(prompt, use_tuned_model, justification, max_output_tokens)
+                for prompt, use_tuned_model in requests))
+        return asyncio.run(run_all())
+
+    def get_packed_verdicts(self, records: list, use_tuned_model: bool = False, debiased: bool = True,
+                            pack_size: int = 10, max_rounds: int = 3, groups: list = None):
+        """
+        Assesses pack_size applicants per request with a JSON response schema; see assess_packed_async.
+        The tuned model was fine-tuned on single-applicant prompts, so packing is meant for the base model.
+
+        Returns:
+            A tuple (verdicts, stats): 'Good' / 'Bad' / 'Unknown' per record, and request/re-issue counts.
+        """
+        return asyncio.run(assess_packed_async(self, records, use_tuned_model=use_tuned_model, debiased=debiased,
+                                               pack_size=pack_size, max_rounds=max_rounds, groups=groups))
+
+    def get_llm_assessments_batch(self, requests: list, storage, submitter=None, poll_interval_s: float = 15,
+                                  max_poll_interval_s: float = 300) -> list:
+        """
+        Batch-mode version of get_llm_assessments for large evaluations: cached requests are answered
+        from the cache, and the rest go to one batch prediction job per model (base and tuned are separate
+        models, so they cannot share a job).
+
+        Args:
+            requests: A list of (prompt, use_tuned_model) or (prompt, use_tuned_model, instructions) tuples, as for
+                      get_llm_assessments. A batch job has no context cache, so an instruction block is sent
+                      in front of the data block, exactly as the full single-call prompt.
+            storage: Where the batch JSONL files live, e.g. GCSBatchStorage("gs://bucket/batch") or LocalBatchStorage.
+            submitter: Runs the jobs; defaults to VertexBatchSubmitter. For the tuned model, load_tuned_model()
+                       must have been given a name batch prediction accepts (a tuned model rather than an endpoint).
+
+        Returns:
+            The text responses, in the same order as requests.
+        """
+        submitter = submitter or VertexBatchSubmitter()
+        requests, representatives = self._collapse_duplicates(requests)
+        responses = [None] * len(requests)
+        pending = {False: [], True: []}
+        for position, (prompt, use_tuned_model, *instructions) in enumerate(requests):
+            _, prompt, error = self._request_model(prompt, use_tuned_model, *instructions)
+            if error:
+                responses[position] = error
+                continue
+            key, cached = self._cached_response(prompt, use_tuned_model, self.generation_config)
+            if cached is not None:
+                responses[position] = cached
+            else:
+                pending[use_tuned_model].append((position, prompt, key))
+
+        for use_tuned_model, items in pending.items():
+            if not items:
+                continue
+            model_name = self.tuned_model_name if use_tuned_model else BASE_MODEL_NAME
+            texts = run_batch_prediction([prompt for _, prompt, _ in items], model_name, storage, submitter,
+                                         generation_config=self.generation_config, poll_interval_s=poll_interval_s,
+                                         max_poll_interval_s=max_poll_interval_s)
+            for (position, _, key), text in zip(items, texts):
+                responses[position] = text
+                if not text.startswith("An error occurred"):
+                    self._store_response(key, text, use_tuned_model)
+        return [responses[position] for position in representatives]
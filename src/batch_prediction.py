@@ -0,0 +1,172 @@
+# src/batch_prediction.py
+"""
+Batch prediction for large LLM evaluations: the prompts are written as one JSONL file, scored by a single
+batch job and the results joined back by request id.
+
+Storage (where the JSONL files live) and submission (who runs the job) are pluggable:
+    GCSBatchStorage + VertexBatchSubmitter   -> Vertex AI batch prediction for Gemini
+    LocalBatchStorage + LocalBatchSubmitter  -> a local stand-in that answers with any callable, for tests
+"""
+import json
+import os
+import time
+import uuid
+
+def build_batch_request(request_id: str, prompt: str, generation_config: dict = None) -> dict:
+    """
+    One input line: the request in the same contents/role/parts format as the fine-tuning data
+    (data_preparation_for_finetuning.py), plus an id that batch prediction copies to the output line.
+    """
+    request = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if generation_config:
+        request["generationConfig"] = generation_config
+    return {"id": request_id, "request": request}
+
+def parse_batch_response(record: dict):
+    """Returns (request id, response text or None, error message or None) for one output line."""
+    request_id = record.get("id")
+    try:
+        parts = record["response"]["candidates"][0]["content"]["parts"]
+        return request_id, "".join(part.get("text", "") for part in parts), None
+    except (KeyError, IndexError, TypeError):
+        return request_id, None, record.get("status") or "No response in batch output"
+
+class LocalBatchStorage:
+    """Keeps batch input and output files under a local directory."""
+    def __init__(self, root: str = 'batch_prediction'):
+        self.root = root
+
+    def write_jsonl(self, name: str, records: list) -> str:
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        return path
+
+    def output_uri(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def read_jsonl(self, uri: str):
+        """Yields the records of every .jsonl file under uri."""
+        for directory, _, files in os.walk(uri):
+            for file_name in sorted(files):
+                if file_name.endswith('.jsonl'):
+                    with open(os.path.join(directory, file_name)) as f:
+                        yield from (json.loads(line) for line in f if line.strip())
+
+class GCSBatchStorage:
+    """Keeps batch input and output files under a gs://bucket/prefix URI, where Vertex AI can read them."""
+    def __init__(self, prefix_uri: str):
+        from google.cloud import storage
+
+        bucket_name, _, self.prefix = prefix_uri.removeprefix('gs://').partition('/')
+        self.bucket = storage.Client().bucket(bucket_name)
+
+    def _uri(self, path: str) -> str:
+        return f"gs://{self.bucket.name}/{path}"
+
+    def write_jsonl(self, name: str, records: list) -> str:
+        path = f"{self.prefix.rstrip('/')}/{name}".lstrip('/')
+        self.bucket.blob(path).upload_from_string("".join(json.dumps(record) + "\n" for record in records),
+                                                  content_type='application/jsonl')
+        return self._uri(path)
+
+    def output_uri(self, name: str) -> str:
+        return self._uri(f"{self.prefix.rstrip('/')}/{name}".lstrip('/'))
+
+    def read_jsonl(self, uri: str):
+        prefix = uri.removeprefix(f"gs://{self.bucket.name}/")
+        for blob in self.bucket.client.list_blobs(self.bucket, prefix=prefix):
+            if blob.name.endswith('.jsonl'):
+                for line in blob.download_as_text().splitlines():
+                    if line.strip():
+                        yield json.loads(line)
+
+class VertexBatchSubmitter:
+    """Submits Gemini batch prediction jobs on Vertex AI (vertexai.init() must have been called)."""
+    def submit(self, model_name: str, input_uri: str, output_uri: str):
+        from vertexai.batch_prediction import BatchPredictionJob
+
+        return BatchPredictionJob.submit(source_model=model_name, input_dataset=input_uri, output_uri_prefix=output_uri)
+
+class LocalBatchJob:
+    """Mimics the BatchPredictionJob polling surface: refresh(), has_ended, has_succeeded, output_location."""
+    def __init__(self, output_location: str, polls_until_done: int):
+        self.output_location = output_location
+        self._polls_left = polls_until_done
+        self.error = None
+
+    def refresh(self):
+        self._polls_left -= 1
+
+    @property
+    def has_ended(self) -> bool:
+        return self._polls_left <= 0
+
+    @property
+    def has_succeeded(self) -> bool:
+        return self.has_ended and self.error is None
+
+class LocalBatchSubmitter:
+    """
+    Runs a "batch job" locally by answering every request with respond(prompt) -> text, writing the output
+    in the Vertex batch prediction format. A request whose respond() raises is written as a failed row, with
+    the error as its status and no response. The job reports done after polls_until_done refreshes.
+    """
+    def __init__(self, respond, polls_until_done: int = 2):
+        self.respond = respond
+        self.polls_until_done = polls_until_done
+
+    def submit(self, model_name: str, input_uri: str, output_uri: str) -> LocalBatchJob:
+        os.makedirs(output_uri, exist_ok=True)
+        with open(input_uri) as source, open(os.path.join(output_uri, 'predictions.jsonl'), 'w') as sink:
+            for line in source:
+                record = json.loads(line)
+                prompt = record["request"]["contents"][0]["parts"][0]["text"]
+                try:
+                    text = self.respond(prompt)
+                except Exception as e:
+                    record["status"] = str(e)
+                else:
+                    record["response"] = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+                sink.write(json.dumps(record) + "\n")
+        return LocalBatchJob(output_uri, self.polls_until_done)
+
+def wait_for_job(job, poll_interval_s: float = 15, max_poll_interval_s: float = 300, timeout_s: float = 24 * 3600):
+    """Polls a batch job until it ends, with the interval growing 1.5x per poll up to max_poll_interval_s."""
+    deadline = time.monotonic() + timeout_s
+    interval = poll_interval_s
+    while True:
+        job.refresh()
+        if job.has_ended:
+            return job
+        if time.monotonic() + interval > deadline:
+            raise TimeoutError(f"Batch job did not finish within {timeout_s:.0f}s")
+        time.sleep(interval)
+        interval = min(max_poll_interval_s, interval * 1.5)
+
+def run_batch_prediction(prompts: list, model_name: str, storage, submitter, generation_config: dict = None,
+                         poll_interval_s: float = 15, max_poll_interval_s: float = 300) -> list:
+    """
+    Scores prompts with one batch prediction job and returns the responses in prompt order.
+
+    Requests that the job failed, or that are missing from its output, come back as error strings in the
+    same form the online client returns.
+    """
+    run_id = time.strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:8]
+    input_uri = storage.write_jsonl(f"{run_id}/input.jsonl", [build_batch_request(str(position), prompt, generation_config)
+                                                             for position, prompt in enumerate(prompts)])
+    job = submitter.submit(model_name, input_uri, storage.output_uri(f"{run_id}/output"))
+    print(f"✅ Batch job submitted for {len(prompts)} requests to {model_name}. Polling for completion...")
+    wait_for_job(job, poll_interval_s, max_poll_interval_s)
+    if not job.has_succeeded:
+        error = f"An error occurred with the LLM batch job: {getattr(job, 'error', None) or 'job failed'}"
+        return [error] * len(prompts)
+
+    responses = {}
+    for record in storage.read_jsonl(job.output_location):
+        request_id, text, error = parse_batch_response(record)
+        responses[request_id] = text if error is None else f"An error occurred with the LLM API call: {error}"
+    missing = "An error occurred with the LLM API call: missing from batch output"
+    return [responses.get(str(position), missing) for position in range(len(prompts))]
@@ -0,0 +1,79 @@
+# src/bootstrap_ensemble.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.linear_model import LogisticRegression
+
+from src.shared_arrays import share_array, attach_array, release_blocks
+
+# Worker-side views onto the shared design matrix, set once per process by _attach_shared_arrays
+_WORKER_STATE = {}
+
+def _attach_shared_arrays(specs: dict, matrix_shape: tuple, hyperparams: dict):
+    """Pool initializer: maps the shared blocks into this worker without copying them."""
+    blocks = _WORKER_STATE.setdefault('blocks', [])
+    arrays = {key: attach_array(spec, blocks) for key, spec in specs.items()}
+
+    if 'data' in arrays:
+        X = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=matrix_shape, copy=False)
+    else:
+        X = arrays['X']
+    _WORKER_STATE.update(X=X, y=arrays['y'], hyperparams=hyperparams)
+
+def _fit_replicate(seed: int) -> tuple:
+    """
+    Fits one bootstrap replicate. Resampling is expressed as multinomial sample weights rather than
+    by indexing the matrix, so the worker never materialises its own copy of the design matrix.
+    """
+    X, y = _WORKER_STATE['X'], _WORKER_STATE['y']
+    n_rows = X.shape[0]
+    rng = np.random.default_rng(seed)
+    sample_weight = np.bincount(rng.integers(0, n_rows, size=n_rows), minlength=n_rows).astype(float)
+
+    classifier = LogisticRegression(**_WORKER_STATE['hyperparams'])
+    classifier.fit(X, y, sample_weight=sample_weight)
+    return classifier.coef_[0], classifier.intercept_[0]
+
+def fit_bootstrap_ensemble(X_design, y, hyperparams: dict, n_bootstrap: int = 50, n_jobs: int = None,
+                           random_state: int = 42) -> dict:
+    """
+    Fits n_bootstrap replicates of the Logistic Regression on the already-preprocessed design matrix
+    in parallel worker processes.
+
+    The matrix (dense, or the data/indices/indptr arrays of a CSR matrix) and the target are placed in
+    shared memory once; each worker attaches to them when it starts and only the fitted coefficient
+    vectors travel back.
+
+    Returns:
+        A dict with 'coef' (n_bootstrap x n_columns) and 'intercept' (n_bootstrap,) arrays.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    blocks = []
+    try:
+        specs = {'y': share_array(np.asarray(y), blocks)}
+        if sp.issparse(X_design):
+            X_csr = sp.csr_matrix(X_design)
+            specs['data'] = share_array(X_csr.data, blocks)
+            specs['indices'] = share_array(X_csr.indices, blocks)
+            specs['indptr'] = share_array(X_csr.indptr, blocks)
+        else:
+            specs['X'] = share_array(np.ascontiguousarray(X_design), blocks)
+
+        seeds = np.random.SeedSequence(random_state).generate_state(n_bootstrap)
+        with ProcessPoolExecutor(max_workers=min(n_jobs, n_bootstrap), initializer=_attach_shared_arrays,
+                                 initargs=(specs, X_design.shape, hyperparams)) as executor:
+            replicates = list(executor.map(_fit_replicate, seeds.tolist()))
+    finally:
+        release_blocks(blocks)
+
+    return {
+        'coef': np.vstack([coef for coef, _ in replicates]),
+        'intercept': np.array([intercept for _, intercept in replicates]),
+    }
+
+def bootstrap_proba(X_design, ensemble: dict) -> np.ndarray:
+    """Scores a preprocessed batch with every replicate at once. Returns an (n_applicants x n_bootstrap) array."""
+    logits = X_design @ ensemble['coef'].T + ensemble['intercept']
+    return 1.0 / (1.0 + np.exp(-np.asarray(logits)))
@@ -0,0 +1,140 @@
+# src/compiled_scorer.py
+import math
+from bisect import bisect_right
+
+import numpy as np
+from sklearn.isotonic import IsotonicRegression
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from src.calibration import PlattCalibrator
+from src.feature_engineering import CategoricalHasher
+
+# OneHotEncoder matches a NaN category by value, but NaN never equals NaN as a dict key, so NaN is looked up
+# under this key instead. None stays its own category, as it is for OneHotEncoder.
+_NAN_CATEGORY = ('nan',)
+
+def _category_key(value):
+    return _NAN_CATEGORY if isinstance(value, float) and math.isnan(value) else value
+
+class CompiledLinearScorer:
+    """
+    A flat, pandas-free scoring plan compiled from a fitted ColumnTransformer + LogisticRegression pipeline.
+
+    Scaling is folded into the coefficients (weight = coef / scale, with the centring moved into the
+    intercept), and every one-hot column becomes an entry in a category -> coefficient dict, so scoring one
+    applicant dict is a short loop of multiply-adds and dict lookups followed by the calibrator.
+    """
+    def __init__(self, intercept: float, numeric_weights: list, category_weights: list,
+                 hashed_weights: list, calibrator=None):
+        self.intercept = intercept
+        self.numeric_weights = numeric_weights      # [(feature, weight)]
+        self.category_weights = category_weights    # [(feature, {category: weight})]
+        self.hashed_weights = hashed_weights        # [(feature, hasher, coefficient array)]
+        self._compile_calibrator(calibrator)
+
+    @classmethod
+    def from_pipeline(cls, model_pipeline, calibrator=None):
+        """
+        Compiles a fitted pipeline. Raises ValueError if it contains a step the plan cannot express,
+        in which case callers should keep using the sklearn path.
+        """
+        preprocessor = model_pipeline.named_steps['preprocessor']
+        classifier = model_pipeline.named_steps['classifier']
+        if classifier.coef_.shape[0] != 1:
+            raise ValueError("Only binary logistic models can be compiled.")
+        coef = classifier.coef_[0]
+        intercept = float(classifier.intercept_[0])
+
+        numeric_weights, category_weights, hashed_weights = [], [], []
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == 'drop':
+                continue
+            block = coef[preprocessor.output_indices_[name]]
+
+            if transformer == 'passthrough':
+                numeric_weights.extend(zip(columns, block.tolist()))
+            elif isinstance(transformer, StandardScaler):
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                weights = block / scale
+                if transformer.with_mean:
+                    intercept -= float(weights @ transformer.mean_)
+                numeric_weights.extend(zip(columns, weights.tolist()))
+            elif isinstance(transformer, OneHotEncoder):
+                if transformer.drop is not None:
+                    raise ValueError("One-hot encoders with dropped categories are not supported.")
+                offset = 0
+                for feature, categories in zip(columns, transformer.categories_):
+                    keys = [_category_key(category) for category in categories.tolist()]
+                    table = dict(zip(keys, block[offset:offset + len(categories)].tolist()))
+                    category_weights.append((feature, table))
+                    offset += len(categories)
+            elif isinstance(transformer, CategoricalHasher):
+                # The bucket weights stay a view onto the coefficient array (memory-mapped when the
+                # model was loaded with mmap_mode) rather than one Python list copy per feature
+                for feature in columns:
+                    hashed_weights.append((feature, transformer, block))
+            else:
+                raise ValueError(f"Cannot compile preprocessing step '{name}' ({type(transformer).__name__}).")
+
+        return cls(intercept, numeric_weights, category_weights, hashed_weights, calibrator)
+
+    def _compile_calibrator(self, calibrator):
+        """Reduces the calibrator to plain Python data so applying it needs no NumPy call."""
+        self._calibrator = calibrator
+        self._isotonic = None
+        self._platt = None
+        if isinstance(calibrator, IsotonicRegression):
+            self._isotonic = (calibrator.X_thresholds_.tolist(), calibrator.y_thresholds_.tolist())
+        elif isinstance(calibrator, PlattCalibrator):
+            self._platt = (float(calibrator.model.coef_[0, 0]), float(calibrator.model.intercept_[0]))
+
+    def decision_function(self, customer_data: dict) -> float:
+        """Returns the model's log-odds of delinquency for one applicant. Raises ValueError on a NaN or infinite numeric."""
+        z = self.intercept
+        for feature, weight in self.numeric_weights:
+            value = customer_data[feature]
+            # The sklearn path rejects missing numerics too; without this a NaN would score (and be cached) as 'Good'
+            if value is None or not math.isfinite(value):
+                raise ValueError(f"Input contains NaN or infinity in numeric feature '{feature}'.")
+            z += weight * value
+        for feature, table in self.category_weights:
+            # Unknown categories contribute nothing, as with handle_unknown='ignore'
+            z += table.get(_category_key(customer_data.get(feature)), 0.0)
+        for feature, hasher, weights in self.hashed_weights:
+            z += float(weights[hasher.bucket(feature, customer_data.get(feature))])
+        return z
+
+    @staticmethod
+    def _sigmoid(z: float) -> float:
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def _calibrate(self, proba: float) -> float:
+        if self._isotonic is not None:
+            xs, ys = self._isotonic
+            # Clipped linear interpolation, as IsotonicRegression(out_of_bounds='clip').predict does
+            if proba <= xs[0]:
+                return ys[0]
+            if proba >= xs[-1]:
+                return ys[-1]
+            i = bisect_right(xs, proba)
+            x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+            return y0 if x1 == x0 else y0 + (y1 - y0) * (proba - x0) / (x1 - x0)
+        if self._platt is not None:
+            a, b = self._platt
+            proba = min(max(proba, 1e-6), 1 - 1e-6)
+            return self._sigmoid(a * math.log(proba / (1 - proba)) + b)
+        if self._calibrator is not None:
+            return float(self._calibrator.predict(np.array([proba]))[0])
+        return proba
+
+    def predict_proba(self, customer_data: dict) -> float:
+        """Returns the calibrated probability of delinquency for one applicant."""
+        return self._calibrate(self._sigmoid(self.decision_function(customer_data)))
+
+    def score(self, customer_data: dict) -> tuple:
+        """Returns (log-odds, calibrated probability) for one applicant, for callers that need both."""
+        z = self.decision_function(customer_data)
+        return z, self._calibrate(self._sigmoid(z))
@@ -1,4 +1,5 @@
 # src/data_loader.py
+import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -55,6 +56,7 @@ def load_and_process_credit_data(file_path="data/Credit_bureau_submission.xlsx")
     df['delinquencyseverity'] = df['days_in_arrears'].apply(categorize_delinquency)
     df['creditutilization'] = (df['outstanding_balance'] / df['credit_limit_facility_amount_global_limit']).replace([np.inf, -np.inf], 0).fillna(0)
     df['age'] = (datetime.now() - df['date_of_birth']).dt.days // 365
+    df['isactive'] = (df['outstanding_balance'] > 0).astype(int)
     
     # 4. Clean demographic features
     demographic_cols = ['gender', 'marital_status', 'primary_state']
@@ -76,6 +78,7 @@ def load_and_process_credit_data(file_path="data/Credit_bureau_submission.xlsx")
         total_outstanding=('outstanding_balance', 'sum'),
         average_utilization=('creditutilization', 'mean'),
         max_days_in_arrears=('days_in_arrears', 'max'),
+        active_loans=('isactive', 'sum'),
         isdelinquent=('isdelinquent', 'max') 
     ).reset_index()
 
@@ -89,3 +92,78 @@ def load_and_process_credit_data(file_path="data/Credit_bureau_submission.xlsx")
 
     print(f"✅ Data processing complete. {len(customer_df)} unique customers found.")
     return customer_df
+
+# Bureau JSON-in-CSV exports (see generate_synthetic_data.py) hold one [{"source": ..., "value": ...}] list per field
+BUREAU_AMOUNT_FIELDS = {
+    'total_outstanding': 'totalOutstanding',
+    'total_borrowed': 'totalBorrowed',
+    'total_overdue': 'totalOverdue',
+    'active_loans': 'totalNoOfActiveLoans',
+}
+# Fields the mapping cannot default: gender and the state (taken from the address) feed the model directly
+BUREAU_REQUIRED_COLUMNS = ['gender', 'address']
+
+def parse_bureau_field(raw) -> list:
+    """
+    Parses one JSON-in-CSV bureau field into a list of {"source", "value"} dicts. The exports double
+    their quotes before CSV quoting, so they arrive with doubled quotes even after CSV parsing.
+    """
+    if not isinstance(raw, str) or not raw:
+        return []
+    try:
+        return json.loads(raw.replace('""', '"'))
+    except json.JSONDecodeError:
+        return []
+
+def _max_bureau_value(raw) -> float:
+    # Sources disagree; the highest reported figure is the conservative one
+    values = [entry.get('value') for entry in parse_bureau_field(raw) if isinstance(entry.get('value'), (int, float))]
+    return max(values) if values else np.nan
+
+def _bureau_days_in_arrears(overdue: float, loan_performance) -> int:
+    """
+    The exports carry no day counts, so arrears are bucketed from what they do carry: any Non-Performing
+    facility (90+ days under CBN prudential guidelines) maps to 91 days, other overdue balances to 30, none to 0.
+    """
+    for source in parse_bureau_field(loan_performance):
+        loans = source.get('value')
+        if isinstance(loans, list) and any(str(loan.get('performanceStatus', '')).lower() == 'non-performing'
+                                           for loan in loans):
+            return 91
+    return 30 if overdue and overdue > 0 else 0
+
+def map_bureau_records(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Maps bureau JSON-in-CSV records (one row per applicant) onto the customer-level features the model uses.
+
+    Returns:
+        A frame with customerid (the BVN), age, gender, primary_state, total_outstanding, average_utilization,
+        max_days_in_arrears, maxdelinquencyseverity and active_loans, aligned with df.
+
+    Raises:
+        ValueError: If df lacks a column every bureau record must carry (see BUREAU_REQUIRED_COLUMNS).
+    """
+    missing = [column for column in BUREAU_REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Bureau records are missing required column(s): {', '.join(missing)}")
+    features = pd.DataFrame(index=df.index)
+    features['customerid'] = df['bvn'] if 'bvn' in df.columns else df.index
+    for feature, field in BUREAU_AMOUNT_FIELDS.items():
+        features[feature] = df[field].map(_max_bureau_value) if field in df.columns else np.nan
+
+    date_of_birth = pd.to_datetime(df.get('dateOfBirth', df.get('date_of_birth')), format='%d/%m/%Y', errors='coerce')
+    features['age'] = ((datetime.now() - date_of_birth).dt.days // 365).astype(float)
+    features['gender'] = df['gender'].fillna('').astype(str).str.strip().str.upper().replace(
+        {'M': 'Male', 'F': 'Female', 'MALE': 'Male', 'FEMALE': 'Female'})
+    # The state is the last comma-separated part of the address
+    features['primary_state'] = (df['address'].fillna('').astype(str).str.rsplit(',', n=1).str[-1]
+                                 .str.replace(' State', '', case=False).str.strip())
+
+    features['average_utilization'] = (features['total_outstanding'] / features['total_borrowed']).replace(
+        [np.inf, -np.inf], 0).fillna(0)
+    loan_performance = df['loanPerformance'] if 'loanPerformance' in df.columns else pd.Series(None, index=df.index)
+    features['max_days_in_arrears'] = [_bureau_days_in_arrears(overdue, performance) for overdue, performance
+                                       in zip(features['total_overdue'], loan_performance)]
+    features['maxdelinquencyseverity'] = features['max_days_in_arrears'].apply(categorize_delinquency)
+    features['total_outstanding'] = features['total_outstanding'].fillna(0)
+    return features.drop(columns=['total_borrowed', 'total_overdue'])
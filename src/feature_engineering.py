@@ -1,7 +1,12 @@
 # src/feature_engineering.py
+import math
+
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.model_selection import train_test_split
+from sklearn.utils import murmurhash3_32
 
 def prepare_data_for_woe(df, target_variable):
     """Prepares the dataset for WoE calculation."""
@@ -74,3 +79,50 @@ class WoETransformer:
             woe_map = self.woe_maps[feature]
             X_transformed[feature] = X_transformed[feature].map(woe_map).fillna(0)
         return X_transformed
+
+
+# Training frames carry NaN for a missing category while JSON requests carry None (or omit the key), so both
+# encoders map every kind of missing value onto this one token
+MISSING_CATEGORY = '__missing__'
+
+def is_missing_category(value) -> bool:
+    """True for any missing-value marker a categorical column can hold: None, NaN, pd.NA or NaT."""
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and math.isnan(value))
+
+class CategoricalHasher(BaseEstimator, TransformerMixin):
+    """
+    Hashes 'feature=value' tokens for each categorical column into a fixed number of sparse columns,
+    so memory stays bounded however many LGAs, banks or loan types appear.
+    Each distinct value is hashed once per call and broadcast to its rows, which keeps transform vectorised.
+    """
+    def __init__(self, n_features=2 ** 14):
+        self.n_features = n_features
+
+    def fit(self, X, y=None):
+        self.feature_names_in_ = np.asarray(pd.DataFrame(X).columns, dtype=object)
+        return self
+
+    def bucket(self, feature, value) -> int:
+        """Returns the column index of a single 'feature=value' token; missing values share MISSING_CATEGORY."""
+        if is_missing_category(value):
+            value = MISSING_CATEGORY
+        return murmurhash3_32(f"{feature}={value}", positive=True) % self.n_features
+
+    def transform(self, X):
+        X = pd.DataFrame(X, columns=self.feature_names_in_)
+        n_rows, n_cols = X.shape
+        indices = np.empty((n_rows, n_cols), dtype=np.int32)
+        for j, feature in enumerate(self.feature_names_in_):
+            values = X[feature].astype(object)
+            codes, uniques = pd.factorize(values.where(values.notna(), MISSING_CATEGORY).astype(str))
+            buckets = np.array([self.bucket(feature, value) for value in uniques], dtype=np.int32)
+            indices[:, j] = buckets[codes]
+        indptr = np.arange(0, n_rows * n_cols + 1, n_cols)
+        X_hashed = sp.csr_matrix((np.ones(n_rows * n_cols), indices.ravel(), indptr),
+                                 shape=(n_rows, self.n_features))
+        # Two columns hashing to the same bucket add up rather than appearing twice
+        X_hashed.sum_duplicates()
+        return X_hashed
+
+    def get_feature_names_out(self, input_features=None):
+        return np.array([f"hash_{i}" for i in range(self.n_features)], dtype=object)
@@ -0,0 +1,206 @@
+# src/gemini_standin.py
+"""
+An offline stand-in for Vertex AI Gemini models, for testing and benchmarking the LLM path without
+live access. StandInModel implements the GenerativeModel surface GeminiClient uses (generate_content and
+generate_content_async, response.text and response.usage_metadata) with:
+
+    - latency: a lognormal time to first token plus a per-output-token generation time;
+    - failures: 429s (with Retry-After) and 500s at configurable rates, and 429s above a concurrency capacity;
+    - deterministic verdicts: Bad when the prompt's average utilization is above 50%, Good otherwise (so
+      counterfactuals that only change demographics get the same verdict), falling back to a prompt hash;
+    - output shaped by the request: JSON under a response schema, truncation at max_output_tokens (which
+      optional thinking tokens count against, as on Gemini 2.5, unless the request sets a thinking budget of 0);
+    - streaming (stream=True): chunks arrive at the generation rate, each with the usage so far, and closing
+      the stream stops generation;
+    - system instructions, optionally "context cached": their tokens are then reported as
+      cached_content_token_count, as Vertex AI does for requests against a CachedContent. Like
+      CachedContent.create, caching an instruction below MIN_CACHED_CONTENT_TOKENS is refused (400).
+
+Select it with GeminiClient(..., backend="standin") or LLM_BACKEND=standin for main.py.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+UTILIZATION_PATTERN = re.compile(r"Average Credit Utilization: ([\d.]+)%")
+PACKED_APPLICANT_PATTERN = re.compile(r"- id (\S+): (.*)")
+# Vertex AI refuses to create a context cache smaller than this for gemini-2.5-flash
+MIN_CACHED_CONTENT_TOKENS = 1024
+
+class StandInError(Exception):
+    """An API error with an HTTP status code and optional Retry-After header, like google.api_core's."""
+    def __init__(self, code: int, message: str, retry_after_s: float = None):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        headers = {'Retry-After': str(retry_after_s)} if retry_after_s is not None else {}
+        self.response = type('StandInHTTPResponse', (), {'headers': headers})()
+
+class StandInUsage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int, cached_content_token_count: int = 0):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.cached_content_token_count = cached_content_token_count
+
+class StandInResponse:
+    def __init__(self, text: str, usage_metadata: StandInUsage):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+def estimate_tokens(text: str) -> int:
+    """Roughly 4 characters per token, as for Gemini on English text."""
+    return max(1, len(text) // 4)
+
+def prompt_text(contents) -> str:
+    """The text of a request given as a string, Content objects or contents/role/parts dicts."""
+    if isinstance(contents, str):
+        return contents
+    texts = []
+    for content in contents:
+        parts = content.get('parts', []) if isinstance(content, dict) else content.parts
+        texts.extend(part.get('text', '') if isinstance(part, dict) else part.text for part in parts)
+    return "\n".join(texts)
+
+def standin_verdict(applicant_text: str) -> str:
+    match = UTILIZATION_PATTERN.search(applicant_text)
+    if match:
+        return 'Bad' if float(match.group(1)) > 50 else 'Good'
+    return 'Bad' if hashlib.blake2b(applicant_text.encode(), digest_size=1).digest()[0] % 2 else 'Good'
+
+class StandInModel:
+    """
+    A GenerativeModel look-alike. Latency and failure draws come from a seeded RNG, so a run is repeatable
+    for a given request order.
+
+    Args:
+        model_name: Reported in errors only.
+        ttft_ms: Median time to first token.
+        ttft_sigma: Lognormal spread of the time to first token.
+        ms_per_output_token: Generation time per output token.
+        justification_tokens: Length of the free-text justification the model "writes".
+        throttle_rate / error_rate: Probability of a 429 / 500 response.
+        retry_after_s: Retry-After sent with 429s.
+        capacity: Requests beyond this many in flight get a 429 (None = unlimited).
+        thinking_tokens: Tokens spent thinking before answering, counted against max_output_tokens, unless the
+                         request's thinking_config has thinking_budget 0.
+        system_instruction: Instruction text prepended to every request.
+        cache_system_instruction: Report the system instruction's tokens as served from a context cache. Raises a
+                                  400 StandInError when the instruction is below MIN_CACHED_CONTENT_TOKENS.
+    """
+    def __init__(self, model_name: str, ttft_ms: float = 300, ttft_sigma: float = 0.4, ms_per_output_token: float = 4,
+                 justification_tokens: int = 60, throttle_rate: float = 0.0, error_rate: float = 0.0,
+                 retry_after_s: float = None, capacity: int = None, seed: int = 0, system_instruction: str = None,
+                 cache_system_instruction: bool = False, thinking_tokens: int = 0):
+        if cache_system_instruction:
+            instruction_tokens = estimate_tokens(system_instruction or "")
+            if instruction_tokens < MIN_CACHED_CONTENT_TOKENS:
+                raise StandInError(400, f"Cached content is too small: {instruction_tokens} tokens, "
+                                        f"minimum {MIN_CACHED_CONTENT_TOKENS}.")
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.cache_system_instruction = cache_system_instruction
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.ms_per_output_token = ms_per_output_token
+        self.justification_tokens = justification_tokens
+        self.thinking_tokens = thinking_tokens
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after_s = retry_after_s
+        self.capacity = capacity
+        self.in_flight = 0
+        self.calls = 0
+        self.output_tokens_generated = 0
+        self.latencies_s = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str, generation_config: dict = None) -> str:
+        config = generation_config or {}
+        schema = config.get('response_schema')
+        if schema and schema.get('type') == 'ARRAY':
+            answer = json.dumps([{"id": applicant_id, "verdict": standin_verdict(fields)}
+                                 for applicant_id, fields in PACKED_APPLICANT_PATTERN.findall(prompt)])
+        elif schema:
+            payload = {"verdict": standin_verdict(prompt)}
+            if 'justification' in schema.get('properties', {}):
+                payload["justification"] = "Utilization drives the assessment."
+            answer = json.dumps(payload)
+        else:
+            filler = " ".join(["The applicant's utilization and credit limit support this verdict."] *
+                              max(1, self.justification_tokens // 12))
+            answer = f"Verdict: {standin_verdict(prompt)}\nJustification: {filler}"
+        max_output_tokens = config.get('max_output_tokens')
+        thinking = 0 if (config.get('thinking_config') or {}).get('thinking_budget') == 0 else self.thinking_tokens
+        if max_output_tokens is not None and thinking + estimate_tokens(answer) > max_output_tokens:
+            answer = answer[:max(0, max_output_tokens - thinking) * 4]
+        return answer
+
+    def _begin(self, prompt: str, generation_config: dict):
+        """Draws the outcome of one call: (time to first token in seconds, response) or raises the drawn error."""
+        with self._lock:
+            self.calls += 1
+            draw = self._rng.random()
+            ttft_s = self.ttft_ms / 1000 * self._rng.lognormvariate(0, self.ttft_sigma)
+            if self.capacity is not None and self.in_flight >= self.capacity:
+                raise StandInError(429, "Resource exhausted (stand-in capacity).", self.retry_after_s)
+            if draw < self.throttle_rate:
+                raise StandInError(429, "Resource exhausted.", self.retry_after_s)
+            if draw < self.throttle_rate + self.error_rate:
+                raise StandInError(500, "Internal error.")
+            self.in_flight += 1
+        text = self._answer(prompt, generation_config)
+        instruction_tokens = estimate_tokens(self.system_instruction) if self.system_instruction else 0
+        usage = StandInUsage(estimate_tokens(prompt) + instruction_tokens, estimate_tokens(text),
+                             instruction_tokens if self.cache_system_instruction else 0)
+        return ttft_s, StandInResponse(text, usage)
+
+    def _generation_s(self, text: str) -> float:
+        return estimate_tokens(text) * self.ms_per_output_token / 1000
+
+    def _end(self, latency_s: float, output_tokens: int):
+        with self._lock:
+            self.in_flight -= 1
+            self.latencies_s.append(latency_s)
+            self.output_tokens_generated += output_tokens
+
+    def generate_content(self, contents, generation_config: dict = None, **kwargs) -> StandInResponse:
+        ttft_s, response = self._begin(prompt_text(contents), generation_config)
+        latency_s = ttft_s + self._generation_s(response.text)
+        time.sleep(latency_s)
+        self._end(latency_s, response.usage_metadata.candidates_token_count)
+        return response
+
+    async def generate_content_async(self, contents, generation_config: dict = None, stream: bool = False, **kwargs):
+        ttft_s, response = self._begin(prompt_text(contents), generation_config)
+        if stream:
+            return self._stream(ttft_s, response)
+        latency_s = ttft_s + self._generation_s(response.text)
+        try:
+            await asyncio.sleep(latency_s)
+        finally:
+            self._end(latency_s, response.usage_metadata.candidates_token_count)
+        return response
+
+    async def _stream(self, ttft_s: float, response: StandInResponse, chunk_chars: int = 32):
+        """
+        Yields the response in chunks of about 8 tokens; generation stops when the consumer closes the stream.
+        Each chunk's usage_metadata holds the running totals, so the last chunk read reports what was generated.
+        """
+        start = time.monotonic()
+        tokens_sent = 0
+        try:
+            await asyncio.sleep(ttft_s)
+            text = response.text
+            for offset in range(0, len(text), chunk_chars):
+                chunk = text[offset:offset + chunk_chars]
+                await asyncio.sleep(self._generation_s(chunk))
+                tokens_sent += estimate_tokens(chunk)
+                usage = response.usage_metadata
+                yield StandInResponse(chunk, StandInUsage(usage.prompt_token_count, tokens_sent,
+                                                          usage.cached_content_token_count))
+        finally:
+            self._end(time.monotonic() - start, tokens_sent)
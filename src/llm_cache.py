@@ -0,0 +1,84 @@
+# src/llm_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+def llm_cache_key(model_name: str, prompt: str, generation_config: dict = None) -> str:
+    """
+    Stable cache key for one request: the model's resource name, the full prompt and the generation
+    parameters. Changing any of them (a new tuned endpoint, a prompt edit, a different temperature) is a miss.
+    """
+    payload = json.dumps({'model': model_name, 'prompt': prompt, 'generation_config': generation_config or {}},
+                         sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+class LLMResponseCache:
+    """
+    A persistent store of LLM responses in one SQLite file. WAL mode lets several processes (parallel
+    experiment runs, notebooks) read while one writes; each process opens its own connection.
+
+    Entries older than ttl_seconds are never returned, and every evict_every writes the store drops
+    expired entries and then the least recently used beyond max_entries.
+    """
+    def __init__(self, path: str = 'llm_cache.sqlite', max_entries: int = 200000, ttl_seconds: float = 30 * 86400,
+                 evict_every: int = 500):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+                           "created REAL, accessed REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key: str):
+        """Returns the cached response text, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ? AND created >= ?",
+                                     (key, now - self.ttl_seconds)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str, model_name: str = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                               (key, model_name, response, now, now))
+            self.writes += 1
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.evict_every:
+                self._evict(now)
+                self._writes_since_evict = 0
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        self._conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed DESC "
+                           "LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                'writes': self.writes, 'entries': entries}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        self._conn.close()
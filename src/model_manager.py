@@ -0,0 +1,158 @@
+# src/model_manager.py
+import threading
+
+import numpy as np
+
+from src.risk_scorer import MLRiskScorer
+
+class ModelManager:
+    """
+    Holds several named models (e.g. 'nigeria', 'german', per-lender variants) in one process.
+
+    Models are loaded lazily on first use. Artifacts are opened with joblib's mmap_mode, so their arrays
+    are backed by the page cache: workers forked after preload() — or separate processes loading the
+    same file — share those pages instead of each holding a private copy.
+
+    swap() builds the replacement scorer completely before publishing it with a single reference
+    assignment, so requests already holding the previous scorer finish on it and no request ever sees a
+    half-loaded model.
+    """
+    def __init__(self, mmap_mode: str = 'r'):
+        self.mmap_mode = mmap_mode
+        self._sources = {}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def register(self, name: str, model_path: str = None, registry=None, tag: str = None, version: int = None):
+        """Declares where a model comes from without loading it."""
+        with self._lock:
+            self._sources[name] = {'model_path': model_path, 'registry': registry, 'tag': tag, 'version': version}
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def _load(self, source: dict) -> MLRiskScorer:
+        if source['registry'] is not None:
+            scorer = MLRiskScorer(registry=source['registry'], tag=source['tag'], version=source['version'],
+                                  mmap_mode=self.mmap_mode)
+        else:
+            scorer = MLRiskScorer(source['model_path'], mmap_mode=self.mmap_mode)
+        if scorer.model_pipeline is None:
+            raise ValueError(f"Model could not be loaded from {source['model_path'] or source['registry'].root}.")
+        return scorer
+
+    def get(self, name: str) -> MLRiskScorer:
+        """Returns the current scorer for a model, loading it on first use."""
+        scorer = self._models.get(name)
+        if scorer is not None:
+            return scorer
+        if name not in self._sources:
+            raise KeyError(f"No model named '{name}' has been registered.")
+        # One loader per model; other models stay available while this one loads
+        with self._load_locks[name]:
+            scorer = self._models.get(name)
+            if scorer is None:
+                scorer = self._load(self._sources[name])
+                self._models[name] = scorer
+                print(f"✅ Loaded model '{name}' (version {scorer.model_version})")
+        return scorer
+
+    def preload(self, names: list = None):
+        """Loads models up front, e.g. in a parent process before forking workers."""
+        for name in names or list(self._sources):
+            self.get(name)
+
+    def swap(self, name: str, model_path: str = None, registry=None, tag: str = None, version: int = None) -> str:
+        """
+        Atomically replaces a model with a new version. If the new version fails to load, the current one
+        keeps serving and the error is raised.
+
+        Returns:
+            The model version that was replaced, or None if the model had not been loaded yet.
+        """
+        source = {'model_path': model_path, 'registry': registry, 'tag': tag, 'version': version}
+        with self._load_locks.setdefault(name, threading.Lock()):
+            scorer = self._load(source)
+            with self._lock:
+                previous = self._models.get(name)
+                self._sources[name] = source
+                self._models[name] = scorer
+        print(f"✅ Swapped model '{name}' to version {scorer.model_version}")
+        return previous.model_version if previous is not None else None
+
+    def unload(self, name: str):
+        """Drops the loaded scorer; the next get() loads it again."""
+        with self._lock:
+            self._models.pop(name, None)
+
+    def loaded(self) -> list:
+        return list(self._models)
+
+    def memory_report(self) -> dict:
+        """
+        Reports the memory of each loaded model, in kB.
+
+        mapped_rss/mapped_pss come from this process's /proc/self/smaps entries for the artifact file (matched by
+        the scorer's resolved model_path, since smaps lists absolute paths):
+        RSS counts the model's memory-mapped pages resident in this process, PSS divides each page by the
+        number of processes sharing it. heap is the size of the model's arrays that were copied onto the
+        heap rather than mapped (roughly everything when mmap_mode is None).
+        """
+        mappings = _smaps_by_path()
+        report = {}
+        for name, scorer in list(self._models.items()):
+            mapped = mappings.get(scorer.model_path, {})
+            report[name] = {
+                'model_version': scorer.model_version,
+                'mapped_rss': mapped.get('Rss', 0),
+                'mapped_pss': mapped.get('Pss', 0),
+                'heap': _heap_array_bytes(scorer) // 1024,
+            }
+        return report
+
+def _smaps_by_path() -> dict:
+    """Sums the Rss/Pss fields of /proc/self/smaps per mapped file path. Empty where /proc is unavailable."""
+    totals, current = {}, None
+    try:
+        with open('/proc/self/smaps') as f:
+            for line in f:
+                fields = line.split()
+                if not fields:
+                    continue
+                if not fields[0].endswith(':'):
+                    # Mapping header: address perms offset dev inode [path]
+                    current = totals.setdefault(fields[5], {}) if len(fields) >= 6 else None
+                elif current is not None and fields[0] in ('Rss:', 'Pss:'):
+                    key = fields[0][:-1]
+                    current[key] = current.get(key, 0) + int(fields[1])
+    except OSError:
+        pass
+    return totals
+
+def _heap_array_bytes(scorer: MLRiskScorer) -> int:
+    """Bytes held by the scorer's in-memory (non-mapped) NumPy arrays, found by walking its object graph."""
+    seen, total = set(), 0
+    stack = [scorer.model_pipeline, scorer.calibrator, scorer.bootstrap, scorer.reference_mean]
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, np.memmap):
+            continue
+        if isinstance(obj, np.ndarray):
+            base = obj
+            while isinstance(base, np.ndarray) and base.base is not None:
+                base = base.base
+            # joblib's mapped arrays are views onto an mmap object rather than np.memmap instances
+            if not isinstance(base, np.ndarray) and base is not None:
+                continue
+            total += obj.nbytes
+            if obj.dtype == object:
+                stack.extend(obj.ravel().tolist())
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif hasattr(obj, '__dict__'):
+            stack.extend(vars(obj).values())
+    return total
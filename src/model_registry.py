@@ -0,0 +1,121 @@
+# src/model_registry.py
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+from joblib import dump, load
+
+class ModelRegistry:
+    """
+    A content-addressed store for trained model artifacts.
+
+    Each artifact lives under a key derived from the training data, the feature configuration and the
+    hyperparameters, so a training run with identical inputs can reuse the stored model instead of retraining.
+    Artifacts are also numbered with an increasing version and can carry human-readable tags (e.g. 'latest').
+    """
+    INDEX_FILE = 'index.json'
+    ARTIFACT_FILE = 'model.joblib'
+
+    def __init__(self, root: str = 'model_registry'):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame, feature_config: dict, hyperparams: dict) -> str:
+        """
+        Returns a stable key for a training run.
+
+        Args:
+            df: The training frame, restricted to the columns the model uses.
+            feature_config: Feature lists and any other preprocessing settings.
+            hyperparams: Classifier and calibration settings.
+        """
+        digest = hashlib.sha256()
+        # Row values (in order, since the train/test split depends on it), then the column layout
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        digest.update(json.dumps([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+        digest.update(json.dumps(feature_config, sort_keys=True, default=str).encode())
+        digest.update(json.dumps(hyperparams, sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:16]
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, self.INDEX_FILE)
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self._index_path()):
+            return {'models': {}, 'tags': {}}
+        with open(self._index_path()) as f:
+            return json.load(f)
+
+    def _write_index(self, index: dict):
+        # Write to a temporary file and rename it so readers never see a half-written index
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self._index_path())
+
+    def artifact_path(self, key: str) -> str:
+        return os.path.join(self.root, key, self.ARTIFACT_FILE)
+
+    def contains(self, key: str) -> bool:
+        return key in self._read_index()['models'] and os.path.exists(self.artifact_path(key))
+
+    def register(self, key: str, artifact, tags: list = None, metadata: dict = None) -> str:
+        """Stores an artifact under its key, assigns it the next version number and applies any tags."""
+        index = self._read_index()
+        os.makedirs(os.path.join(self.root, key), exist_ok=True)
+        dump(artifact, self.artifact_path(key))
+
+        if key not in index['models']:
+            versions = [entry['version'] for entry in index['models'].values()]
+            index['models'][key] = {
+                'version': max(versions, default=0) + 1,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'metadata': metadata or {},
+            }
+        for tag in tags or []:
+            index['tags'][tag] = key
+        self._write_index(index)
+        return self.artifact_path(key)
+
+    def tag(self, key: str, tag: str):
+        """Points a tag (e.g. 'production') at an existing model."""
+        index = self._read_index()
+        if key not in index['models']:
+            raise KeyError(f"Model '{key}' is not in the registry.")
+        index['tags'][tag] = key
+        self._write_index(index)
+
+    def resolve(self, tag: str = None, version: int = None) -> str:
+        """
+        Returns the key of a registered model, looked up by version number or by tag ('latest' by default).
+        """
+        index = self._read_index()
+        if version is not None:
+            for key, entry in index['models'].items():
+                if entry['version'] == int(version):
+                    return key
+            raise KeyError(f"No model with version {version} in the registry.")
+        tag = tag or 'latest'
+        if tag in index['tags']:
+            return index['tags'][tag]
+        if tag in index['models']:
+            return tag
+        raise KeyError(f"No model tagged '{tag}' in the registry.")
+
+    def load(self, key: str):
+        return load(self.artifact_path(key))
+
+    def list_models(self) -> pd.DataFrame:
+        """Returns one row per registered model with its version, creation time and tags."""
+        index = self._read_index()
+        tags_by_key = {}
+        for tag, key in index['tags'].items():
+            tags_by_key.setdefault(key, []).append(tag)
+        rows = [{'key': key, 'version': entry['version'], 'created_at': entry['created_at'],
+                 'tags': ', '.join(sorted(tags_by_key.get(key, [])))}
+                for key, entry in index['models'].items()]
+        return pd.DataFrame(rows, columns=['key', 'version', 'created_at', 'tags']).sort_values('version')
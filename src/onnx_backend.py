@@ -0,0 +1,89 @@
+# src/onnx_backend.py
+"""
+Optional ONNX export of the fitted preprocessing + Logistic Regression pipeline, and an onnxruntime
+runner that scores DataFrames with it. Needs `pip install skl2onnx onnxruntime`; without them the
+rest of the package works as before and these functions report what is missing.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+def _input_columns(pipeline) -> list:
+    preprocessor = pipeline.named_steps['preprocessor']
+    if hasattr(preprocessor, 'feature_names_in_'):
+        return list(preprocessor.feature_names_in_)
+    return [column for _, _, columns in preprocessor.transformers_ if not isinstance(columns, str) for column in columns]
+
+def _numeric_columns(pipeline) -> set:
+    """Columns fed to numeric steps (scalers / passthrough); everything else is categorical text."""
+    preprocessor = pipeline.named_steps['preprocessor']
+    numeric = set()
+    for _, transformer, columns in preprocessor.transformers_:
+        if transformer == 'passthrough' or hasattr(transformer, 'mean_') or hasattr(transformer, 'scale_'):
+            numeric.update(columns)
+    return numeric
+
+def export_pipeline_to_onnx(pipeline, path: str = None) -> bytes:
+    """
+    Converts a fitted pipeline to an ONNX model with one input per feature column (double for numerics,
+    string for categoricals) and a plain probabilities output.
+
+    Args:
+        pipeline: The fitted sklearn pipeline.
+        path: Optional file to also write the model to.
+
+    Returns:
+        The serialised ONNX model. Raises ImportError without skl2onnx, and ValueError for pipelines with
+        steps skl2onnx cannot convert (e.g. CategoricalHasher).
+    """
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import DoubleTensorType, StringTensorType
+    except ImportError as e:
+        raise ImportError("ONNX export needs skl2onnx: pip install skl2onnx") from e
+
+    numeric = _numeric_columns(pipeline)
+    initial_types = [(column, DoubleTensorType([None, 1]) if column in numeric else StringTensorType([None, 1]))
+                     for column in _input_columns(pipeline)]
+    classifier = pipeline.named_steps['classifier']
+    try:
+        onnx_model = convert_sklearn(pipeline, initial_types=initial_types,
+                                     options={id(classifier): {'zipmap': False}})
+    except RuntimeError as e:
+        # skl2onnx reports unknown estimators as RuntimeError ("Unable to find a shape calculator ...")
+        raise ValueError(f"Pipeline cannot be exported to ONNX: {e}") from e
+
+    serialised = onnx_model.SerializeToString()
+    if path is not None:
+        with open(path, 'wb') as f:
+            f.write(serialised)
+    return serialised
+
+class OnnxPipelineRunner:
+    """Scores DataFrames with an exported pipeline through onnxruntime instead of sklearn."""
+    def __init__(self, onnx_model: bytes):
+        if onnxruntime is None:
+            raise ImportError("The ONNX backend needs onnxruntime: pip install onnxruntime")
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(onnx_model, options, providers=['CPUExecutionProvider'])
+        self.inputs = [(node.name, node.type == 'tensor(string)') for node in self.session.get_inputs()]
+        self.output_name = next(node.name for node in self.session.get_outputs() if node.name == 'probabilities')
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """Returns the (uncalibrated) probability of delinquency for every row, like pipeline.predict_proba()[:, 1]."""
+        feeds = {}
+        for name, is_string in self.inputs:
+            values = df[name].to_numpy()
+            if is_string:
+                # onnxruntime takes object arrays of str; only non-object columns need converting
+                if values.dtype != object:
+                    values = values.astype(str).astype(object)
+                feeds[name] = values.reshape(-1, 1)
+            else:
+                feeds[name] = values.astype(np.float64).reshape(-1, 1)
+        return self.session.run([self.output_name], feeds)[0][:, 1]
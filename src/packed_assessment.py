@@ -0,0 +1,122 @@
+# src/packed_assessment.py
+"""
+Packed assessments: N applicants per LLM request, answered as a JSON array of {id, verdict} objects
+constrained by a response schema. Applicants whose verdict is missing or malformed are re-issued in
+new packs, so one bad item never costs the whole pack. Applicants the prompt would show identically are
+assessed once, and packs never mix groups (e.g. an original profile and its counterfactuals).
+"""
+import asyncio
+import json
+
+from src.prompts import create_packed_llm_prompt, packed_applicant_fields
+from src.request_dedup import dedupe_requests
+from src.verdict_schema import VERDICTS
+
+PACKED_VERDICT_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "STRING"},
+            "verdict": {"type": "STRING", "enum": list(VERDICTS)},
+        },
+        "required": ["id", "verdict"],
+    },
+}
+
+def packed_generation_config(generation_config: dict = None) -> dict:
+    """The client's generation config plus JSON output constrained to PACKED_VERDICT_SCHEMA."""
+    return {**(generation_config or {}), "response_mime_type": "application/json",
+            "response_schema": PACKED_VERDICT_SCHEMA}
+
+def parse_packed_verdicts(response_text: str, expected_ids: list) -> dict:
+    """
+    Validates and unpacks a packed response.
+
+    Returns:
+        {id: 'Good' | 'Bad'} for the expected ids that got exactly one valid verdict. Unknown ids, invalid
+        verdicts and ids answered twice with different verdicts are dropped, so the caller re-issues them.
+    """
+    try:
+        items = json.loads(response_text)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    expected = set(expected_ids)
+    verdicts, conflicting = {}, set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        applicant_id = str(item.get("id", "")).strip()
+        verdict = str(item.get("verdict", "")).strip().capitalize()
+        if applicant_id not in expected or verdict not in VERDICTS:
+            continue
+        if verdicts.get(applicant_id, verdict) != verdict:
+            conflicting.add(applicant_id)
+        verdicts[applicant_id] = verdict
+    for applicant_id in conflicting:
+        del verdicts[applicant_id]
+    return verdicts
+
+def _accepts_pack(pack_length: int):
+    expected_ids = [str(slot + 1) for slot in range(pack_length)]
+    return lambda response_text: len(parse_packed_verdicts(response_text, expected_ids)) == pack_length
+
+async def assess_packed_async(client, records: list, use_tuned_model: bool = False, debiased: bool = True,
+                              pack_size: int = 10, max_rounds: int = 3, groups: list = None):
+    """
+    Assesses records pack_size at a time; applicants left without a valid verdict are repacked and
+    re-issued for up to max_rounds rounds.
+
+    Args:
+        client: A GeminiClient.
+        records: Applicant dicts.
+        groups: Optional group label per record. A pack only ever holds applicants of one group, so rows that
+                must be judged independently (an original and its counterfactuals) never sit side by side.
+
+    Returns:
+        A tuple (verdicts, stats): 'Good' / 'Bad' / 'Unknown' per record in order, and a dict with the
+        number of requests sent, duplicate rows collapsed and applicants re-issued.
+    """
+    groups = groups if groups is not None else [None] * len(records)
+    # Rows the prompt shows identically (e.g. counterfactuals under the debiased prompt) are assessed once, in the
+    # group they are first seen in
+    unique, representatives = dedupe_requests(list(range(len(records))),
+                                              key=lambda position: packed_applicant_fields(records[position], debiased))
+    unique_verdicts = ['Unknown'] * len(unique)
+    pending = list(range(len(unique)))
+    generation_config = packed_generation_config(client.generation_config)
+    stats = {'applicants': len(records), 'duplicates': len(records) - len(unique), 'requests': 0, 'reissued': 0,
+             'pack_size': pack_size}
+
+    for round_number in range(max_rounds):
+        if not pending:
+            break
+        if round_number:
+            stats['reissued'] += len(pending)
+        by_group = {}
+        for item in pending:
+            by_group.setdefault(groups[unique[item]], []).append(item)
+        packs = [items[start:start + pack_size] for items in by_group.values() for start in range(0, len(items), pack_size)]
+        # Ids are positions within the pack: short, and unique even when counterfactuals share a customer id
+        prompts = [create_packed_llm_prompt([(str(slot + 1), records[unique[item]]) for slot, item in enumerate(pack)],
+                                            debiased=debiased) for pack in packs]
+        # Only fully parsed packs are cached, so a re-issued pack reaches the model instead of the bad cached answer
+        responses = await asyncio.gather(*(client.get_llm_assessment_async(
+            prompt, use_tuned_model, generation_config, accept=_accepts_pack(len(pack)))
+            for prompt, pack in zip(prompts, packs)))
+        stats['requests'] += len(packs)
+
+        pending = []
+        for pack, response in zip(packs, responses):
+            parsed = parse_packed_verdicts(response, [str(slot + 1) for slot in range(len(pack))])
+            for slot, item in enumerate(pack):
+                verdict = parsed.get(str(slot + 1))
+                if verdict is None:
+                    pending.append(item)
+                else:
+                    unique_verdicts[item] = verdict
+    stats['unresolved'] = len(pending)
+    return [unique_verdicts[item] for item in representatives], stats
@@ -1,43 +1,102 @@
 # src/prompts.py
+import textwrap
+
+# The static instruction block of each single-applicant template. Sent as a system instruction (context cached
+# once it reaches the cache's minimum size) it is kept apart from the per-applicant data; see
+# GeminiClient.enable_instruction_cache().
+BASELINE_TASK = "Analyze the following credit applicant's profile to assess the risk of delinquency (late payment)."
+BASELINE_INSTRUCTIONS = f"""{BASELINE_TASK}
+Your response must follow this exact format:
+Verdict: [Good or Bad]
+Justification: [Your brief reasoning here, considering all provided data]"""
+
+DEBIASED_TASK = """As an expert financial risk analyst, provide an unbiased assessment of delinquency risk (Good or Bad).
+Your decision must be based ONLY on the applicant's financial data. Do not consider Age, Gender, or State."""
+DEBIASED_INSTRUCTIONS = f"""{DEBIASED_TASK}
+Your response must follow this exact format:
+Verdict: [Good or Bad]
+Justification: [Your brief reasoning based only on financial data]"""
+
+def _applicant_fields(customer_data: dict, debiased: bool) -> list:
+    # The "Label: value" fields every template shows for one applicant; demographics only without debiasing
+    fields = [] if debiased else [
+        f"Age: {customer_data.get('age', 'N/A')}",
+        f"Gender: {customer_data.get('gender', 'N/A')}",
+        f"State of Residence: {customer_data.get('primary_state', 'N/A')}",
+    ]
+    return fields + [
+        f"Credit Limit (NGN): {customer_data.get('credit_limit_facility_amount_global_limit', 0):,.2f}",
+        f"Average Credit Utilization: {customer_data.get('average_utilization', 0):.2%}",
+    ]
+
+def _profile_block(heading: str, fields: list) -> str:
+    return f"{heading}:\n" + "\n".join(f"- {field}" for field in fields)
+
+def create_baseline_llm_data(customer_data: dict) -> str:
+    """The per-applicant part of the baseline prompt: financial and demographic data."""
+    return _profile_block("Applicant Profile", _applicant_fields(customer_data, debiased=False)) + "\n\nResponse:"
+
+def create_debiased_llm_data(customer_data: dict) -> str:
+    """The per-applicant part of the debiased prompt: financial data only."""
+    return _profile_block("Financial Data", _applicant_fields(customer_data, debiased=True)) + "\n\nResponse:"
+
+def _compose_prompt(instructions: str, data: str) -> str:
+    # The layout the fine-tuning data was generated with: indented lines between blank first and last lines
+    return "\n" + textwrap.indent(f"{instructions}\n\n{data}", "    ") + "\n    "
 
 def create_baseline_llm_prompt(customer_data: dict) -> str:
     """
     Creates a baseline prompt that asks the LLM to assess delinquency risk,
     including both financial and demographic (potentially biasing) information.
     """
-    prompt = f"""
-    Analyze the following credit applicant's profile to assess the risk of delinquency (late payment).
-    Your response must follow this exact format:
-    Verdict: [Good or Bad]
-    Justification: [Your brief reasoning here, considering all provided data]
-
-    Applicant Profile:
-    - Age: {customer_data.get('age', 'N/A')}
-    - Gender: {customer_data.get('gender', 'N/A')}
-    - State of Residence: {customer_data.get('primary_state', 'N/A')}
-    - Credit Limit (NGN): {customer_data.get('credit_limit_facility_amount_global_limit', 0):,.2f}
-    - Average Credit Utilization: {customer_data.get('average_utilization', 0):.2%}
-
-    Response:
-    """
-    return prompt
+    return _compose_prompt(BASELINE_INSTRUCTIONS, create_baseline_llm_data(customer_data))
 
 def create_debiased_llm_prompt(customer_data: dict) -> str:
     """
     Creates an advanced prompt engineered to mitigate bias by instructing the LLM
     to focus only on financial data for its delinquency risk assessment.
     """
-    prompt = f"""
-    As an expert financial risk analyst, provide an unbiased assessment of delinquency risk (Good or Bad).
-    Your decision must be based ONLY on the applicant's financial data. Do not consider Age, Gender, or State.
-    Your response must follow this exact format:
-    Verdict: [Good or Bad]
-    Justification: [Your brief reasoning based only on financial data]
+    return _compose_prompt(DEBIASED_INSTRUCTIONS, create_debiased_llm_data(customer_data))
+
+def create_structured_llm_prompt(customer_data: dict, debiased: bool = True, justification: bool = False) -> str:
+    """
+    The single-applicant prompt for schema-constrained verdicts (verdict_schema): the same task and data as
+    create_debiased_llm_prompt / create_baseline_llm_prompt, but asking for the schema's JSON fields instead of
+    the free-text "Verdict:/Justification:" layout, which the response schema would contradict.
+
+    Args:
+        debiased: Show only financial data; otherwise also age, gender and state.
+        justification: The schema has a justification field (verdict_schema(justification=True)).
+    """
+    output_format = 'Respond with a JSON object whose "verdict" is "Good" or "Bad"'
+    output_format += ' and whose "justification" is one short sentence.' if justification else '.'
+    task, create_data = (DEBIASED_TASK, create_debiased_llm_data) if debiased else (BASELINE_TASK, create_baseline_llm_data)
+    return _compose_prompt(f"{task}\n{output_format}", create_data(customer_data))
+
+# Instruction block and data builder of each single-applicant template
+PROMPT_TEMPLATES = {
+    'baseline': (BASELINE_INSTRUCTIONS, create_baseline_llm_data),
+    'debiased': (DEBIASED_INSTRUCTIONS, create_debiased_llm_data),
+}
 
-    Financial Data:
-    - Credit Limit (NGN): {customer_data.get('credit_limit_facility_amount_global_limit', 0):,.2f}
-    - Average Credit Utilization: {customer_data.get('average_utilization', 0):.2%}
+def packed_applicant_fields(customer_data: dict, debiased: bool = True) -> str:
+    """The fields a packed prompt shows for one applicant; applicants with the same fields get the same verdict."""
+    return "; ".join(_applicant_fields(customer_data, debiased))
+
+def create_packed_llm_prompt(applicants: list, debiased: bool = True) -> str:
+    """
+    Creates one prompt that assesses several applicants at once, for use with PACKED_VERDICT_SCHEMA.
+    The instructions are sent once per request instead of once per applicant, and state the same task as
+    the single-applicant templates.
 
-    Response:
+    Args:
+        applicants: A list of (applicant_id, customer_data) tuples.
+        debiased: Show only financial data, as create_debiased_llm_prompt does; otherwise also
+                  age, gender and state, as create_baseline_llm_prompt does.
     """
-    return prompt
+    task = DEBIASED_TASK if debiased else BASELINE_TASK
+    output_format = ("Assess each applicant below on their own. Respond with a JSON array holding exactly one "
+                     '{"id", "verdict"} object per applicant, using the ids given.')
+    profiles = _profile_block("Applicants", [f"id {applicant_id}: {packed_applicant_fields(customer_data, debiased)}"
+                                             for applicant_id, customer_data in applicants])
+    return _compose_prompt(f"{task}\n{output_format}", profiles)
@@ -0,0 +1,163 @@
+# src/rate_limiter.py
+import asyncio
+import random
+import time
+
+# HTTP statuses that mean "slow down and try again" rather than a bad request
+RETRYABLE_STATUS_CODES = {429, 503}
+
+class TokenBucket:
+    """
+    Request-rate limiter: holds up to `burst` tokens, refilled at `rate` per second; each request takes one.
+    pause() drains the bucket so every caller waits, which is how a server's Retry-After is honoured.
+    """
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # No await between the check and the decrement, so this is atomic within the event loop
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Makes the next request wait at least `seconds`."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+class AIMDConcurrencyLimiter:
+    """
+    Caps in-flight requests with a limit that adapts like TCP congestion control: while the limit is in use,
+    every success adds increase / limit (about +increase per round trip), and an overload signal (429/503,
+    or latency above latency_target_s) multiplies it by decrease_factor. Only requests sent after the last
+    decrease can trigger another, so one burst of errors counts as one congestion event.
+    """
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 32, increase: float = 1.0,
+                 decrease_factor: float = 0.5, latency_target_s: float = None):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_target_s = latency_target_s
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = float('-inf')
+        self._condition = None
+        self._condition_loop = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    async def __aenter__(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def on_success(self, latency_s: float):
+        if self.latency_target_s is not None and latency_s > self.latency_target_s:
+            self.on_overload(time.monotonic() - latency_s)
+        elif self.in_flight >= int(self.limit):
+            # Only grow a limit that is actually the bottleneck
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+
+    def on_overload(self, sent_at: float):
+        """Signals congestion seen by a request sent at sent_at (time.monotonic())."""
+        if sent_at < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        self.decreases += 1
+
+def backoff_delay(attempt: int, base_s: float = 1.0, cap_s: float = 60.0, retry_after_s: float = None) -> float:
+    """
+    Exponential backoff with full jitter: uniform in [0, min(cap, base * 2^attempt)], so retrying clients
+    spread out instead of returning in lockstep. A server-supplied Retry-After is a floor.
+    """
+    delay = random.uniform(0, min(cap_s, base_s * 2 ** attempt))
+    return max(delay, retry_after_s) if retry_after_s is not None else delay
+
+def status_code(error: Exception):
+    """The HTTP status of a google.api_core / gRPC error, or None."""
+    code = getattr(error, 'code', None)
+    if callable(code):
+        # gRPC errors expose code() -> StatusCode; map the two overload codes to their HTTP equivalents
+        name = getattr(code(), 'name', '')
+        return {'RESOURCE_EXHAUSTED': 429, 'UNAVAILABLE': 503}.get(name)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(error: Exception) -> bool:
+    return status_code(error) in RETRYABLE_STATUS_CODES
+
+def retry_after_seconds(error: Exception):
+    """
+    The delay the server asked for, from a Retry-After header (REST transport) or a RetryInfo detail
+    (gRPC transport), or None.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    for detail in getattr(error, 'details', None) or []:
+        retry_delay = getattr(detail, 'retry_delay', None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+    return None
+
+class EndpointLimiter:
+    """The token bucket and AIMD concurrency limit for one model endpoint, plus request and token counters."""
+    def __init__(self, requests_per_minute: float = 60, burst: float = None, initial_concurrency: int = 4,
+                 max_concurrency: int = 32, latency_target_s: float = None):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.concurrency = AIMDConcurrencyLimiter(initial_limit=initial_concurrency, max_limit=max_concurrency,
+                                                  latency_target_s=latency_target_s)
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self.output_tokens = 0
+
+    def record_usage(self, response):
+        """Adds a response's token counts (usage_metadata), when the SDK reports them."""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            self.input_tokens += getattr(usage, 'prompt_token_count', 0) or 0
+            self.cached_input_tokens += getattr(usage, 'cached_content_token_count', 0) or 0
+            self.output_tokens += getattr(usage, 'candidates_token_count', 0) or 0
+
+    def stats(self) -> dict:
+        return {'requests': self.requests, 'throttled': self.throttled, 'retries': self.retries,
+                'input_tokens': self.input_tokens, 'cached_input_tokens': self.cached_input_tokens,
+                'output_tokens': self.output_tokens,
+                'concurrency_limit': round(self.concurrency.limit, 2), 'limit_decreases': self.concurrency.decreases}
@@ -0,0 +1,112 @@
+# src/reason_codes.py
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import OneHotEncoder
+
+from src.feature_engineering import CategoricalHasher
+
+# Protected characteristics may inform the score but must never be given as an adverse-action reason
+PROTECTED_FEATURES = frozenset({'age', 'gender', 'primary_state'})
+
+# Adverse-action reason code for each reportable model feature. Features not listed fall back to their column name.
+# R01 (age), R05 (gender) and R06 (state) are retired: see PROTECTED_FEATURES.
+REASON_CODES = {
+    'total_outstanding': 'R02: Total outstanding balance too high',
+    'average_utilization': 'R03: Average credit utilisation too high',
+    'max_days_in_arrears': 'R04: Days in arrears on existing facilities',
+    'maxdelinquencyseverity': 'R07: Severity of past delinquency',
+    'lga': 'R08: Local government area',
+    'creditor_bank': 'R09: Existing creditor bank',
+    'loan_type': 'R10: Type of existing facilities',
+}
+
+def build_feature_groups(preprocessor):
+    """
+    Maps every column of the design matrix back to the input feature it came from.
+
+    Returns:
+        A tuple (feature_names, groups) where groups is a sparse (n_columns x n_features) indicator matrix.
+        Hashed columns cannot be split by feature, so each hashing step forms a single group.
+    """
+    feature_names, rows, cols = [], [], []
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop':
+            continue
+        block = preprocessor.output_indices_[name]
+        if isinstance(transformer, OneHotEncoder):
+            offset = block.start
+            for feature, categories in zip(columns, transformer.categories_):
+                rows.extend(range(offset, offset + len(categories)))
+                cols.extend([len(feature_names)] * len(categories))
+                feature_names.append(feature)
+                offset += len(categories)
+        elif isinstance(transformer, CategoricalHasher):
+            rows.extend(range(block.start, block.stop))
+            cols.extend([len(feature_names)] * (block.stop - block.start))
+            feature_names.append('/'.join(columns))
+        else:
+            # One design column per input column (scaled or passthrough numerics)
+            for offset, feature in enumerate(columns):
+                rows.append(block.start + offset)
+                cols.append(len(feature_names))
+                feature_names.append(feature)
+
+    n_columns = sum(s.stop - s.start for s in preprocessor.output_indices_.values())
+    groups = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_columns, len(feature_names)))
+    return feature_names, groups
+
+def reference_mean(X_design) -> np.ndarray:
+    """The mean design-matrix row of a reference population, the baseline contributions are measured from."""
+    return np.asarray(X_design.mean(axis=0)).ravel()
+
+def feature_contributions(X_design, coef: np.ndarray, ref_mean: np.ndarray, groups) -> np.ndarray:
+    """
+    Returns each input feature's contribution to every applicant's log-odds relative to the reference
+    population: sum over the feature's columns of coef * (x - reference mean), as an (n_applicants x n_features) array.
+
+    The weighted group matrix is folded once, so the whole batch costs one (sparse) matrix product.
+    """
+    weighted_groups = groups.multiply(coef.reshape(-1, 1)).tocsr()
+    baseline = weighted_groups.T @ ref_mean
+    contributions = X_design @ weighted_groups
+    if sp.issparse(contributions):
+        contributions = contributions.toarray()
+    return np.asarray(contributions) - baseline
+
+def reportable_features(feature_names: list) -> np.ndarray:
+    """
+    Flags the features that may be reported as reasons. A hashed group is withheld when any of its columns
+    is protected, since its contribution cannot be separated from theirs.
+    """
+    return np.array([not PROTECTED_FEATURES.intersection(feature.split('/')) for feature in feature_names], dtype=bool)
+
+def top_reasons(contributions: np.ndarray, top_k: int = 3, reportable: np.ndarray = None) -> np.ndarray:
+    """
+    Picks the top_k features pushing each applicant towards 'Bad'.
+
+    Args:
+        contributions: (n_applicants x n_features) log-odds contributions from feature_contributions().
+        top_k: Number of reasons per applicant.
+        reportable: Optional boolean mask over features; features outside it are never picked.
+
+    Returns:
+        An (n_applicants x top_k) integer array of feature positions, ordered by contribution, with -1 in
+        slots that have no positive contribution. Integer positions let callers build categorical columns
+        without materialising millions of Python strings.
+    """
+    top_k = min(top_k, contributions.shape[1])
+    remaining = contributions.copy()
+    if reportable is not None:
+        remaining[:, ~reportable] = -np.inf
+    rows = np.arange(len(remaining))
+    top = np.empty((len(remaining), top_k), dtype=np.intp)
+    # k passes of a row-wise argmax beat a full row sort for the handful of reasons we report
+    for k in range(top_k):
+        best = remaining.argmax(axis=1)
+        top[:, k] = np.where(remaining[rows, best] > 0, best, -1)
+        remaining[rows, best] = -np.inf
+    return top
+
+def reason_code_labels(feature_names: list) -> list:
+    """The reason code for each feature, in feature order."""
+    return [REASON_CODES.get(feature, feature) for feature in feature_names]
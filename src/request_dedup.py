@@ -0,0 +1,50 @@
+# src/request_dedup.py
+"""
+Collapsing identical LLM requests. Prompts are compared in canonical form (whitespace-insensitive), so
+requests that differ only in indentation or line breaks share one call; concurrent duplicates share one
+in-flight call through SingleFlight.
+"""
+import asyncio
+
+def canonical_prompt(prompt: str) -> str:
+    """The prompt with each line's whitespace collapsed and blank lines dropped, for identity checks only."""
+    lines = (" ".join(line.split()) for line in prompt.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def dedupe_requests(requests: list, key=lambda request: request):
+    """
+    Collapses duplicate requests.
+
+    Returns:
+        A tuple (unique, positions): the distinct requests in first-seen order, and for every input request
+        the position of its representative in unique.
+    """
+    first_seen, unique, positions = {}, [], []
+    for request in requests:
+        request_key = key(request)
+        if request_key not in first_seen:
+            first_seen[request_key] = len(unique)
+            unique.append(request)
+        positions.append(first_seen[request_key])
+    return unique, positions
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time: callers arriving while a call for their key is in flight
+    await its result instead of starting another. The key is forgotten once the call completes, so later
+    callers go to the cache or make a fresh call.
+    """
+    def __init__(self):
+        self._calls = {}
+        self.shared = 0
+
+    async def do(self, key, make_call):
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(make_call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key) if self._calls.get(key) is done else None)
+        # Shielded so one cancelled caller does not cancel the call for everyone else waiting on it
+        return await asyncio.shield(task)
@@ -1,30 +1,349 @@
 # src/risk_scorer.py
 import pandas as pd
+import numpy as np
 from joblib import load
 import os
+import hashlib
+
+from src.model_registry import ModelRegistry
+from src.bootstrap_ensemble import bootstrap_proba
+from src.compiled_scorer import CompiledLinearScorer
+from src.onnx_backend import OnnxPipelineRunner, export_pipeline_to_onnx
+from src.score_cache import ScoreCache, score_key, frame_score_keys
+from src.reason_codes import (build_feature_groups, reference_mean, feature_contributions, top_reasons,
+                              reason_code_labels, reportable_features)
+
+def _file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file read in chunks, so versioning a large artifact does not hold a second copy of it in memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
 
 class MLRiskScorer:
     """
     Loads the pre-trained ML model to predict delinquency risk for new applicants.
     """
-    def __init__(self, model_path='credit_model.joblib'):
+    def __init__(self, model_path='credit_model.joblib', registry: ModelRegistry = None, tag: str = None, version: int = None,
+                 mmap_mode: str = None, cache: ScoreCache = None, backend: str = 'sklearn'):
+        """
+        Loads the model from model_path or, when a registry is given, the registered model
+        with the requested version or tag ('latest' by default).
+
+        With mmap_mode='r' the artifact's NumPy arrays are memory-mapped from the file instead of
+        copied onto the heap, so processes loading the same artifact share those pages.
+
+        An optional ScoreCache lets score_batch(), predict_proba() and predict_risk() skip applicants already
+        scored by this model version.
+
+        backend='onnx' runs batch scoring through onnxruntime on the artifact's embedded ONNX export
+        (converting the pipeline on load if there is none); 'sklearn' uses the pipeline itself.
+        """
         self.model_pipeline = None
+        self.calibrator = None
+        self.cutoff = None
+        self.bootstrap = None
+        self.compiled = None
+        self.reference_mean = None
+        self.feature_groups = None
+        self.model_version = None
+        self.model_path = None
+        self.feature_columns = None
+        self.cache = cache
+        self.backend = backend
+        self.onnx_runner = None
+        if registry is not None:
+            try:
+                model_key = registry.resolve(tag=tag, version=version)
+            except KeyError as e:
+                print(f"🔥 Warning: {e.args[0]} Please run the training process first.")
+                return
+            model_path = registry.artifact_path(model_key)
+            self.model_version = model_key
         if os.path.exists(model_path):
-            self.model_pipeline = load(model_path)
+            # Resolved once at load, so it names the file the same way /proc/self/smaps does whatever the cwd later is
+            self.model_path = os.path.realpath(model_path)
+            self._load_artifact(load(model_path, mmap_mode=mmap_mode))
+            if self.model_version is None:
+                # Unregistered artifacts without a stored version are versioned by their content
+                self.model_version = _file_digest(model_path)
         else:
             print(f"🔥 Warning: Benchmark model not found at {model_path}. Please run the training process first.")
 
+    def _load_artifact(self, artifact):
+        """Accepts both the calibrated artifact dict and a bare pipeline saved by older versions."""
+        if isinstance(artifact, dict):
+            self.model_pipeline = artifact['pipeline']
+            self.calibrator = artifact.get('calibrator')
+            self.cutoff = artifact.get('cutoff')
+            self.bootstrap = artifact.get('bootstrap')
+            self.reference_mean = artifact.get('reference_mean')
+            self.model_version = artifact.get('model_version') or self.model_version
+        else:
+            self.model_pipeline = artifact
+
+        # Maps design-matrix columns back to input features for reason codes
+        preprocessor = self.model_pipeline.named_steps['preprocessor']
+        self.feature_groups = build_feature_groups(preprocessor)
+        # The inputs the model reads, which are all that identify an applicant for caching
+        if hasattr(preprocessor, 'feature_names_in_'):
+            self.feature_columns = list(preprocessor.feature_names_in_)
+        else:
+            self.feature_columns = [column for _, _, columns in preprocessor.transformers_ if not isinstance(columns, str)
+                                    for column in columns]
+
+        if self.backend == 'onnx':
+            self._load_onnx_runner(artifact.get('onnx_model') if isinstance(artifact, dict) else None)
+
+        # Single-applicant requests go through a flat plan compiled from the fitted pipeline
+        try:
+            self.compiled = CompiledLinearScorer.from_pipeline(self.model_pipeline, self.calibrator)
+        except (ValueError, AttributeError, KeyError) as e:
+            print(f"🚨 Fast scoring path unavailable, using the sklearn pipeline: {e}")
+
+    def _load_onnx_runner(self, onnx_model: bytes = None):
+        try:
+            if onnx_model is None:
+                onnx_model = export_pipeline_to_onnx(self.model_pipeline)
+            self.onnx_runner = OnnxPipelineRunner(onnx_model)
+        except (ImportError, ValueError) as e:
+            print(f"🚨 ONNX backend unavailable, using the sklearn pipeline: {e}")
+            self.backend = 'sklearn'
+
+    def _raw_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """The classifier's uncalibrated probability of delinquency, from the selected backend."""
+        if self.onnx_runner is not None:
+            return self.onnx_runner.predict_proba(df)
+        return self.model_pipeline.predict_proba(df)[:, 1]
+
+    def validate_onnx(self, df: pd.DataFrame) -> float:
+        """
+        Scores every row of df through both the ONNX backend and the sklearn pipeline and returns the
+        largest absolute difference in raw probability.
+        """
+        if self.onnx_runner is None:
+            print("🔥 Error: No ONNX backend to validate.")
+            return float('nan')
+        reference = self.model_pipeline.predict_proba(df)[:, 1]
+        return float(np.max(np.abs(self.onnx_runner.predict_proba(df) - reference)))
+
+    def set_reference_population(self, df: pd.DataFrame):
+        """Sets the population reason codes are measured against (models saved before reason codes had none)."""
+        self.reference_mean = reference_mean(self.model_pipeline.named_steps['preprocessor'].transform(df))
+
+    def validate_compiled(self, df: pd.DataFrame) -> float:
+        """
+        Scores every row of df through both the compiled plan and the sklearn pipeline and
+        returns the largest absolute PD difference.
+        """
+        if self.compiled is None:
+            print("🔥 Error: No compiled scoring plan to validate.")
+            return float('nan')
+        reference = self.predict_proba_batch(df)
+        compiled = np.array([self.compiled.predict_proba(record) for record in df.to_dict('records')])
+        return float(np.max(np.abs(compiled - reference)))
+
+    @staticmethod
+    def _as_frame(data) -> pd.DataFrame:
+        """Accepts a DataFrame, a single applicant dict, a list of dicts or a NumPy record array."""
+        if isinstance(data, pd.DataFrame):
+            return data
+        if isinstance(data, dict):
+            return pd.DataFrame([data])
+        return pd.DataFrame(data)
+
+    def predict_proba_batch(self, data) -> np.ndarray:
+        """
+        Returns the (calibrated, when a calibrator is available) probability of delinquency for every
+        applicant in a DataFrame or record array, in one vectorized call.
+        """
+        if self.model_pipeline is None:
+            print("🔥 Error: Model not loaded")
+            return None
+
+        proba = self._raw_proba(self._as_frame(data))
+        if self.calibrator is not None:
+            proba = self.calibrator.predict(proba)
+        return proba
+
+    def predict_risk_batch(self, data) -> np.ndarray:
+        """
+        Predicts the risk ('Good' or 'Bad') for every applicant in a DataFrame or record array in one vectorized call.
+        """
+        if self.model_pipeline is None:
+            print("🔥 Error: Model not loaded")
+            return None
+
+        return self._score_frame(self._as_frame(data))['risk'].to_numpy()
+
+    def _is_bad(self, proba, raw_proba):
+        """
+        The decision rule every batch path applies. Models trained with a cost-optimal cutoff decline applicants
+        whose PD reaches it (PD >= cutoff, as optimise_cutoff chose it); without a cutoff, 'Bad' is the
+        classifier's own rule, raw probability strictly above 0.5 (positive log-odds).
+        """
+        if self.cutoff is not None:
+            return proba >= self.cutoff
+        return raw_proba > 0.5
+
+    def score_batch(self, data) -> pd.DataFrame:
+        """
+        Returns both the PD and the 'Good'/'Bad' decision for every applicant from a single pipeline call,
+        as a DataFrame with 'pd' and 'risk' columns. With a cache, only applicants not already cached are scored.
+        """
+        if self.model_pipeline is None:
+            print("🔥 Error: Model not loaded")
+            return None
+
+        df = self._as_frame(data)
+        if self.cache is None:
+            return self._score_frame(df)
+
+        keys = frame_score_keys(df, self.feature_columns, self.model_version)
+        cached = self.cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            scored = self._score_frame(df.iloc[missing])
+            new_scores = {keys[i]: (pd_value, risk) for i, pd_value, risk in zip(missing, scored['pd'], scored['risk'])}
+            self.cache.put_many(new_scores)
+            cached.update(new_scores)
+        results = [cached[key] for key in keys]
+        return pd.DataFrame({'pd': [pd_value for pd_value, _ in results],
+                             'risk': [risk for _, risk in results]}, index=df.index)
+
+    def _score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        raw_proba = self._raw_proba(df)
+        proba = self.calibrator.predict(raw_proba) if self.calibrator is not None else raw_proba
+        return pd.DataFrame({'pd': proba, 'risk': np.where(self._is_bad(proba, raw_proba), 'Bad', 'Good').astype(object)},
+                            index=df.index)
+
+    def iter_predict_batches(self, chunks, chunk_size: int = 10000):
+        """
+        Scores a chunked iterable lazily, yielding one DataFrame with 'pd' and 'risk' columns per chunk.
+
+        Args:
+            chunks: An iterable of DataFrames (e.g. pd.read_csv(..., chunksize=...)) or of single applicant
+                    dicts, which are grouped into chunks of chunk_size.
+            chunk_size: Number of dict records scored per call.
+        """
+        records = []
+        for item in chunks:
+            if isinstance(item, dict):
+                records.append(item)
+                if len(records) == chunk_size:
+                    yield self.score_batch(records)
+                    records = []
+            else:
+                yield self.score_batch(item)
+        if records:
+            yield self.score_batch(records)
+
+    def predict_proba(self, customer_data: dict) -> float:
+        """
+        Returns the (calibrated, when a calibrator is available) probability of delinquency for an applicant.
+        """
+        if self.model_pipeline is None:
+            return float('nan')
+        if self.cache is not None:
+            return self._cached_score(customer_data)[0]
+        if self.compiled is not None:
+            return self.compiled.predict_proba(customer_data)
+        return float(self.predict_proba_batch(customer_data)[0])
+
     def predict_risk(self, customer_data: dict) -> str:
         """
         Predicts the risk ('Good' or 'Bad') for an applicant using the trained ML model.
         """
         if self.model_pipeline is None:
             return "Error: Model not loaded"
+        if self.cache is not None:
+            return self._cached_score(customer_data)[1]
+        if self.compiled is not None:
+            if self.cutoff is not None:
+                return 'Bad' if self.compiled.predict_proba(customer_data) >= self.cutoff else 'Good'
+            # Without a cutoff the classifier predicts 'Bad' when the log-odds are positive (raw PD above 0.5, as _is_bad)
+            return 'Bad' if self.compiled.decision_function(customer_data) > 0 else 'Good'
+        return self.predict_risk_batch(customer_data)[0]
+
+    def _cached_score(self, customer_data: dict) -> tuple:
+        """Returns (pd, risk) for one applicant from the cache, scoring and caching it on a miss."""
+        key = score_key(self.model_version, self.feature_columns, customer_data)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        if self.compiled is not None:
+            z, pd_value = self.compiled.score(customer_data)
+            bad = pd_value >= self.cutoff if self.cutoff is not None else z > 0
+            result = (pd_value, 'Bad' if bad else 'Good')
+        else:
+            scored = self._score_frame(self._as_frame(customer_data))
+            result = (float(scored['pd'].iloc[0]), scored['risk'].iloc[0])
+        self.cache.put(key, result)
+        return result
+
+    def predict_proba_interval(self, customer_data, level: float = 0.90) -> pd.DataFrame:
+        """
+        Returns the mean PD across the bootstrap replicates and a percentile interval for each applicant.
+
+        Args:
+            customer_data: A single applicant dict or a DataFrame of applicants.
+            level: Coverage of the interval, e.g. 0.90 for the 5th-95th percentiles.
+
+        Returns:
+            A DataFrame with 'pd_mean', 'pd_lower' and 'pd_upper' columns, one row per applicant.
+        """
+        if self.model_pipeline is None or self.bootstrap is None:
+            print("🔥 Warning: This model has no bootstrap replicates. Retrain it with n_bootstrap > 0.")
+            return None
+
+        df = self._as_frame(customer_data)
+        X_design = self.model_pipeline.named_steps['preprocessor'].transform(df)
+
+        # All applicants x all replicates in one matrix product
+        proba = bootstrap_proba(X_design, self.bootstrap)
+        if self.calibrator is not None:
+            proba = self.calibrator.predict(proba.ravel()).reshape(proba.shape)
+
+        tail = (1 - level) / 2 * 100
+        lower, upper = np.percentile(proba, [tail, 100 - tail], axis=1)
+        return pd.DataFrame({'pd_mean': proba.mean(axis=1), 'pd_lower': lower, 'pd_upper': upper},
+                            index=df.index)
+
+    def predict_with_reasons(self, data, top_k: int = 3) -> pd.DataFrame:
+        """
+        Scores a batch and returns the top_k adverse-action reason codes for each applicant.
+
+        Each feature's contribution is its coefficient times the applicant's transformed value relative to
+        the reference population, computed for the whole batch as one matrix product on the same design
+        matrix used for the PD, so explaining adds little to the cost of scoring.
+        Protected characteristics (reason_codes.PROTECTED_FEATURES) still count towards the PD but are never
+        given as reasons.
+
+        Returns:
+            A DataFrame with 'pd', 'risk' and 'reason_1' ... 'reason_k' columns, one row per applicant.
+        """
+        if self.model_pipeline is None:
+            print("🔥 Error: Model not loaded")
+            return None
+        if self.reference_mean is None:
+            print("🔥 Error: No reference population for reason codes. Call set_reference_population() first.")
+            return None
+
+        df = self._as_frame(data)
+        feature_names, groups = self.feature_groups
+
+        X_design = self.model_pipeline.named_steps['preprocessor'].transform(df)
+        classifier = self.model_pipeline.named_steps['classifier']
+        raw_proba = classifier.predict_proba(X_design)[:, 1]
+        proba = self.calibrator.predict(raw_proba) if self.calibrator is not None else raw_proba
+
+        contributions = feature_contributions(X_design, classifier.coef_[0], self.reference_mean, groups)
+        reasons = top_reasons(contributions, top_k, reportable_features(feature_names))
 
-        # Prepare the input data in a DataFrame, ensuring the order of columns matches training
-        df = pd.DataFrame([customer_data])
-        
-        # Predict the class (0 for Good/Not Delinquent, 1 for Bad/Delinquent)
-        prediction = self.model_pipeline.predict(df)[0]
-        
-        return 'Bad' if prediction == 1 else 'Good'
+        # Categorical columns share one copy of each code string across the batch (-1 becomes missing)
+        labels = reason_code_labels(feature_names)
+        result = pd.DataFrame({'pd': proba, 'risk': np.where(self._is_bad(proba, raw_proba), 'Bad', 'Good')}, index=df.index)
+        for k in range(reasons.shape[1]):
+            result[f'reason_{k + 1}'] = pd.Categorical.from_codes(reasons[:, k], categories=labels)
+        return result
@@ -0,0 +1,187 @@
+# src/rules_engine.py
+import operator
+
+import numpy as np
+import pandas as pd
+
+# The defaults of the lender parameters collected in app.py
+DEFAULT_LENDER_PARAMETERS = {
+    "max_outstanding": 5000000,
+    "total_active_loans": 5,
+    "min_income": 150000,
+    "credit_sources": ['CRC', 'First Central'],
+}
+
+# Customer-frame column each lender parameter is checked against
+LENDER_PARAMETER_COLUMNS = {
+    "max_outstanding": 'total_outstanding',
+    "total_active_loans": 'active_loans',
+    "min_income": 'monthly_income',
+    "credit_sources": 'credit_source',
+}
+
+_COMPARISONS = {
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+    '==': operator.eq, '!=': operator.ne,
+}
+
+# Up to this many knockout rules are tracked as bits of one uint16 per applicant
+_MAX_BITFIELD_RULES = 16
+
+def _lowest_bit_table() -> np.ndarray:
+    """Maps every 16-bit value to the position of its lowest set bit (-1 for zero)."""
+    values = np.arange(1 << _MAX_BITFIELD_RULES)
+    table = np.full(len(values), -1, dtype=np.int8)
+    table[1:] = np.log2(values[1:] & -values[1:]).astype(np.int8)
+    return table
+
+_LOWEST_BIT = _lowest_bit_table()
+
+class Rule:
+    """
+    One policy rule. The rule *hits* an applicant when `column <op> value` holds, e.g.
+    Rule('max_outstanding', 'total_outstanding', '>', 5e6) hits everyone owing more than 5m.
+
+    Args:
+        name: Name reported in hit counts and knockout reasons.
+        column: Customer-frame column the rule reads.
+        op: One of >, >=, <, <=, ==, != or 'in' / 'not in' (value is then a collection of categories).
+        value: Threshold or categories.
+        knockout: Whether a hit declines the applicant before any model is run.
+    """
+    def __init__(self, name: str, column: str, op: str, value, knockout: bool = True):
+        if op not in _COMPARISONS and op not in ('in', 'not in'):
+            raise ValueError(f"Unsupported rule operator '{op}'.")
+        self.name = name
+        self.column = column
+        self.op = op
+        self.value = value
+        self.knockout = knockout
+
+    def __repr__(self):
+        return f"Rule({self.name!r}: {self.column} {self.op} {self.value!r}{', knockout' if self.knockout else ''})"
+
+class RulesEngine:
+    """
+    Evaluates a list of rules over a whole customer frame with vectorized boolean masks.
+
+    Threshold rules are one NumPy comparison over the column. Category rules ('in' / 'not in') work on
+    the column's integer codes: each column is factorized once per evaluation (free for categorical
+    dtypes), the allowed categories become a small boolean lookup table over the uniques, and the mask
+    is that table indexed by the codes, so no per-row string comparison happens.
+    """
+    def __init__(self, rules: list = None):
+        self.rules = list(rules or [])
+
+    def add_rule(self, name: str, column: str, op: str, value, knockout: bool = True):
+        self.rules.append(Rule(name, column, op, value, knockout=knockout))
+        return self
+
+    @classmethod
+    def from_lender_parameters(cls, lender_parameters: dict, extra_rules: list = None, column_map: dict = None):
+        """
+        Compiles the lender parameters collected in app.py into knockout rules.
+
+        Args:
+            lender_parameters: Dict with any of max_outstanding, total_active_loans, min_income and credit_sources.
+            extra_rules: Additional Rule objects, evaluated after the lender parameters.
+            column_map: Overrides for LENDER_PARAMETER_COLUMNS.
+        """
+        columns = {**LENDER_PARAMETER_COLUMNS, **(column_map or {})}
+        rules = []
+        if lender_parameters.get('max_outstanding') is not None:
+            rules.append(Rule('max_outstanding', columns['max_outstanding'], '>', lender_parameters['max_outstanding']))
+        if lender_parameters.get('total_active_loans') is not None:
+            rules.append(Rule('total_active_loans', columns['total_active_loans'], '>', lender_parameters['total_active_loans']))
+        if lender_parameters.get('min_income') is not None:
+            rules.append(Rule('min_income', columns['min_income'], '<', lender_parameters['min_income']))
+        if lender_parameters.get('credit_sources'):
+            rules.append(Rule('credit_sources', columns['credit_sources'], 'not in', list(lender_parameters['credit_sources'])))
+        return cls(rules + list(extra_rules or []))
+
+    def prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns df with the columns of category rules converted to categorical dtype. Factorizing a million
+        strings costs ~100 ms, so frames evaluated more than once should be prepared once up front.
+        """
+        columns = {rule.column for rule in self.rules if rule.op in ('in', 'not in') and rule.column in df.columns
+                   and not isinstance(df[rule.column].dtype, pd.CategoricalDtype)}
+        return df.astype({column: 'category' for column in columns}) if columns else df
+
+    @staticmethod
+    def _codes(column: pd.Series) -> tuple:
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return column.cat.codes.to_numpy(), column.cat.categories
+        return pd.factorize(column)
+
+    def _mask(self, rule: Rule, df: pd.DataFrame, factorized: dict) -> np.ndarray:
+        if rule.op in _COMPARISONS:
+            return _COMPARISONS[rule.op](df[rule.column].to_numpy(), rule.value)
+
+        if rule.column not in factorized:
+            factorized[rule.column] = self._codes(df[rule.column])
+        codes, uniques = factorized[rule.column]
+        allowed = np.asarray(uniques.isin(list(rule.value)) if isinstance(uniques, pd.Index)
+                             else pd.Index(uniques).isin(list(rule.value)))
+        # One extra slot at the end for missing values (code -1), which are never 'in' the set
+        lookup = np.append(allowed, False)
+        if rule.op == 'not in':
+            lookup = ~lookup
+        return lookup[codes]
+
+    def missing_columns(self, columns) -> dict:
+        """{rule name: column} for the rules whose column is not in columns."""
+        return {rule.name: rule.column for rule in self.rules if rule.column not in columns}
+
+    def evaluate(self, df: pd.DataFrame, on_missing: str = 'warn') -> dict:
+        """
+        Evaluates every rule over df.
+
+        Args:
+            on_missing: What to do with rules whose column is not in df: 'warn' skips them with a warning,
+                        'raise' raises a ValueError.
+
+        Returns:
+            A dict with:
+                'hits': a boolean DataFrame with one column per evaluated rule, aligned with df.
+                'hit_counts': a Series with the number of applicants each rule hits.
+                'knocked_out': a boolean array, True where any knockout rule hits.
+                'knockout_reason': a Categorical naming the first knockout rule each applicant hits (NaN if none).
+                'skipped': names of rules whose column is not in df.
+        """
+        missing = self.missing_columns(df.columns)
+        if missing:
+            described = ', '.join(f"{name} (column '{column}')" for name, column in missing.items())
+            if on_missing == 'raise':
+                raise ValueError(f"Rules with no matching column in the data: {described}")
+            print(f"🔥 Warning: Skipped rules with no matching column in the data: {described}")
+        skipped = list(missing)
+        factorized, masks = {}, {}
+        for rule in self.rules:
+            if rule.name not in missing:
+                masks[rule.name] = self._mask(rule, df, factorized)
+
+        knockout_names = [rule.name for rule in self.rules if rule.knockout and rule.name in masks]
+        if len(knockout_names) <= _MAX_BITFIELD_RULES:
+            # Pack the knockout masks into one bitfield per applicant; the first rule hit is its lowest set bit.
+            # Shifts and ORs stream through memory, unlike masked assignments with scattered branches.
+            bits = np.zeros(len(df), dtype=np.uint16)
+            for code, name in enumerate(knockout_names):
+                bits |= masks[name].astype(np.uint16) << code
+            knocked_out = bits != 0
+            reason_codes = _LOWEST_BIT[bits]
+        else:
+            knocked_out = np.zeros(len(df), dtype=bool)
+            reason_codes = np.full(len(df), -1, dtype=np.int16)
+            # Filled in reverse rule order so earlier rules overwrite later ones
+            for code in range(len(knockout_names) - 1, -1, -1):
+                np.copyto(reason_codes, code, where=masks[knockout_names[code]])
+                knocked_out |= masks[knockout_names[code]]
+
+        return {
+            'hits': pd.DataFrame(masks, index=df.index),
+            'hit_counts': pd.Series({name: int(np.count_nonzero(mask)) for name, mask in masks.items()}, dtype=int),
+            'knocked_out': knocked_out,
+            'knockout_reason': pd.Categorical.from_codes(reason_codes, categories=knockout_names),
+            'skipped': skipped,
+        }
@@ -0,0 +1,192 @@
+# src/score_cache.py
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+def _canonical_value(value):
+    """Numbers (including bools and NumPy scalars) as floats, so 30 and 30.0 match; missing as None; the rest as str."""
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, (bool, int, float, np.bool_, np.number)):
+        value = float(value)
+        return None if math.isnan(value) else value
+    return str(value)
+
+def canonical_features(record, columns: list) -> str:
+    """Serialises an applicant's model inputs, in model column order, so that equal inputs always give the same string."""
+    return repr(tuple(_canonical_value(record.get(column)) for column in columns))
+
+def _key_prefix(model_version: str, columns: list) -> str:
+    return f"{model_version}|{','.join(columns)}|"
+
+def score_key(model_version: str, columns: list, record) -> str:
+    """Stable cache key for one applicant under one model version."""
+    payload = _key_prefix(model_version, columns) + canonical_features(record, columns)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def frame_score_keys(df: pd.DataFrame, columns: list, model_version: str) -> list:
+    """
+    score_key() for every row of a frame. Columns are canonicalised whole (numeric dtypes in one cast)
+    instead of going through per-row dicts, which cost more than the hashing itself.
+    """
+    canonical = []
+    for column in columns:
+        values = df[column]
+        if values.dtype.kind in 'biuf':
+            floats = values.to_numpy(dtype=float)
+            as_list = floats.tolist()
+            if np.isnan(floats).any():
+                as_list = [None if math.isnan(value) else value for value in as_list]
+            canonical.append(as_list)
+        else:
+            # Canonicalise each distinct value once; rows then just pick theirs up by code
+            codes, uniques = pd.factorize(values)
+            lookup = np.array([_canonical_value(value) for value in uniques] + [None], dtype=object)
+            canonical.append(lookup[codes].tolist())
+
+    prefix = _key_prefix(model_version, columns)
+    return [hashlib.blake2b((prefix + repr(row)).encode(), digest_size=16).hexdigest() for row in zip(*canonical)]
+
+class SQLiteScoreBackend:
+    """
+    A score store in one SQLite file that every worker process on the host opens, so a score computed
+    by one worker is a hit for all of them. WAL mode lets readers proceed while another process writes.
+    """
+    def __init__(self, path: str = 'score_cache.sqlite', max_entries: int = 1000000, ttl_seconds: float = 86400,
+                 evict_every: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, pd REAL, risk TEXT, "
+                           "created REAL, accessed REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_accessed ON scores (accessed)")
+
+    def get_many(self, keys: list) -> dict:
+        """Returns {key: (pd, risk)} for the keys present and not expired."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, pd, risk FROM scores WHERE key IN ({placeholders}) AND created >= ?",
+                    (*chunk, now - self.ttl_seconds)).fetchall()
+                found.update((key, (pd_value, risk)) for key, pd_value, risk in rows)
+            if found:
+                self._conn.executemany("UPDATE scores SET accessed = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+        return found
+
+    def put_many(self, items: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                                   [(key, pd_value, risk, now, now) for key, (pd_value, risk) in items.items()])
+            self._writes_since_evict += len(items)
+            if self._writes_since_evict >= self.evict_every:
+                self._evict(now)
+                self._writes_since_evict = 0
+
+    def _evict(self, now: float):
+        """Drops expired entries, then the least recently used beyond max_entries."""
+        self._conn.execute("DELETE FROM scores WHERE created < ?", (now - self.ttl_seconds,))
+        self._conn.execute("DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY accessed DESC "
+                           "LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM scores")
+
+    def close(self):
+        self._conn.close()
+
+class ScoreCache:
+    """
+    A bounded LRU cache of (pd, risk) results with a time-to-live, optionally backed by a shared store.
+
+    Lookups try the in-process LRU first and then the shared backend; shared hits are copied into the
+    local LRU. Keys come from score_key(), so a new model version never sees the previous version's scores.
+    """
+    def __init__(self, max_entries: int = 100000, ttl_seconds: float = 3600, backend: SQLiteScoreBackend = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, keys: list) -> dict:
+        found = {}
+        expired_before = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] < expired_before:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+            self.hits += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.backend is not None:
+            shared = self.backend.get_many(missing)
+            if shared:
+                self._store(shared)
+                found.update(shared)
+            self.shared_hits += len(shared)
+            self.hits += len(shared)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: dict):
+        self._store(items)
+        if self.backend is not None:
+            self.backend.put_many(items)
+
+    def put(self, key: str, value: tuple):
+        self.put_many({key: value})
+
+    def _store(self, items: dict):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'shared_hits': self.shared_hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0, 'evictions': self.evictions,
+                'entries': len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
@@ -0,0 +1,211 @@
+# src/scoring_service.py
+"""
+An asyncio HTTP scoring service around MLRiskScorer.
+
+The model is loaded once per process. Concurrent single-applicant requests are collected into
+micro-batches (bounded by size and by a few milliseconds of delay) and scored with one vectorized call.
+
+Endpoints:
+    POST /score   body: one applicant as JSON  ->  {"risk": "Good"|"Bad", "pd": float, "model_version": str}
+    GET  /health  ->  {"status": "ok", "model_version": str, "batches": int, "requests": int[, "cache": {...}]}
+
+Usage: python -m src.scoring_service --model credit_model.joblib --port 8080
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from src.risk_scorer import MLRiskScorer
+from src.model_registry import ModelRegistry
+from src.score_cache import ScoreCache, SQLiteScoreBackend
+
+class MicroBatcher:
+    """
+    Queues single-applicant requests and scores them in batches.
+
+    A batch is dispatched as soon as it holds max_batch_size requests, or max_delay_ms after its first
+    request arrived, whichever comes first. Scoring runs on a worker thread so the event loop keeps
+    accepting requests for the next batch meanwhile.
+    """
+    def __init__(self, scorer: MLRiskScorer, max_batch_size: int = 256, max_delay_ms: float = 2.0):
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches_scored = 0
+        self.requests_scored = 0
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def score(self, customer_data: dict) -> dict:
+        """Queues one applicant and waits for its result from the next batch."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((customer_data, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Drain anything else already waiting without extending the delay
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            records = [record for record, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self._score_records, records)
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.batches_scored += 1
+            self.requests_scored += len(batch)
+
+    def _score_records(self, records: list) -> list:
+        """Scores a batch in one call; if it fails, scores the records one by one to isolate the bad ones."""
+        try:
+            scores = self.scorer.score_batch(records)
+            return [{'risk': risk, 'pd': float(pd_value), 'model_version': self.scorer.model_version}
+                    for pd_value, risk in zip(scores['pd'], scores['risk'])]
+        except Exception as e:
+            if len(records) == 1:
+                return [ValueError(f"Could not score applicant: {e}")]
+        return [result for record in records for result in self._score_records([record])]
+
+class ScoringServer:
+    """A minimal HTTP/1.1 server (keep-alive, JSON bodies) in front of a MicroBatcher."""
+    def __init__(self, scorer: MLRiskScorer, host: str = '127.0.0.1', port: int = 8080,
+                 max_batch_size: int = 256, max_delay_ms: float = 2.0):
+        self.scorer = scorer
+        self.host = host
+        self.port = port
+        self.batcher = MicroBatcher(scorer, max_batch_size=max_batch_size, max_delay_ms=max_delay_ms)
+        self.server = None
+
+    async def start(self):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"✅ Scoring service listening on http://{self.host}:{self.port} (model {self.scorer.model_version})")
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes):
+        if method == 'GET' and path == '/health':
+            health = {'status': 'ok', 'model_version': self.scorer.model_version,
+                      'batches': self.batcher.batches_scored, 'requests': self.batcher.requests_scored}
+            if self.scorer.cache is not None:
+                health['cache'] = self.scorer.cache.stats()
+            return '200 OK', health
+        if method == 'POST' and path == '/score':
+            try:
+                customer_data = json.loads(body)
+            except json.JSONDecodeError as e:
+                return '400 Bad Request', {'error': f"Invalid JSON: {e}"}
+            if not isinstance(customer_data, dict):
+                return '400 Bad Request', {'error': "Expected one applicant as a JSON object."}
+            try:
+                return '200 OK', await self.batcher.score(customer_data)
+            except ValueError as e:
+                return '422 Unprocessable Entity', {'error': str(e)}
+            except Exception as e:
+                return '500 Internal Server Error', {'error': str(e)}
+        return '404 Not Found', {'error': f"No route for {method} {path}"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the benchmark credit model over HTTP with micro-batching.")
+    parser.add_argument('--model', default='credit_model.joblib', help="Path to the model artifact.")
+    parser.add_argument('--registry', help="Load from this model registry directory instead of --model.")
+    parser.add_argument('--tag', default='latest', help="Registry tag to serve.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    parser.add_argument('--cache-size', type=int, default=0, help="Cache up to this many scores per process (0 disables).")
+    parser.add_argument('--cache-db', help="SQLite file shared by all service processes on the host as a second cache level.")
+    parser.add_argument('--cache-ttl', type=float, default=3600, help="Seconds a cached score stays valid.")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache_size or args.cache_db:
+        backend = SQLiteScoreBackend(args.cache_db, ttl_seconds=args.cache_ttl) if args.cache_db else None
+        cache = ScoreCache(max_entries=args.cache_size or 100000, ttl_seconds=args.cache_ttl, backend=backend)
+
+    if args.registry:
+        scorer = MLRiskScorer(registry=ModelRegistry(args.registry), tag=args.tag, cache=cache)
+    else:
+        scorer = MLRiskScorer(args.model, cache=cache)
+    if scorer.model_pipeline is None:
+        return
+
+    server = ScoringServer(scorer, host=args.host, port=args.port,
+                           max_batch_size=args.max_batch_size, max_delay_ms=args.max_delay_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nScoring service stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# src/shared_arrays.py
+from multiprocessing import shared_memory
+
+import numpy as np
+
+def share_array(array: np.ndarray, blocks: list) -> tuple:
+    """
+    Copies an array into a new shared memory block and returns the (name, shape, dtype) spec workers
+    need to attach to it. The block is appended to blocks; the caller closes and unlinks them when done.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    blocks.append(block)
+    return block.name, array.shape, array.dtype.str
+
+def attach_array(spec: tuple, blocks: list) -> np.ndarray:
+    """Maps a shared block described by share_array()'s spec into this process without copying it."""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    # Keep a reference: the array is only valid while the block object is alive
+    blocks.append(block)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+def release_blocks(blocks: list):
+    """Closes and unlinks blocks created with share_array()."""
+    for block in blocks:
+        block.close()
+        block.unlink()
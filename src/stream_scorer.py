@@ -0,0 +1,134 @@
+# src/stream_scorer.py
+"""
+Streams applicants from a file or stdin through MLRiskScorer in fixed-size chunks and writes each chunk's
+decisions as soon as it is scored, so memory stays flat however large the input is.
+
+Input formats: csv (customer-level columns), jsonl (one applicant object per line) and bureau (the
+JSON-in-CSV bureau export, mapped onto model features with map_bureau_records). Decisions go to stdout
+or --output as CSV or JSONL; the throughput summary goes to stderr.
+
+Usage:
+    python -m src.stream_scorer customers.csv --output scored.csv
+    zcat export.csv.gz | python -m src.stream_scorer - --format bureau --output-format jsonl > scored.jsonl
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import pandas as pd
+
+from src.data_loader import map_bureau_records
+from src.model_registry import ModelRegistry
+from src.risk_scorer import MLRiskScorer
+
+ID_COLUMNS = ['customerid', 'bvn']
+
+def _log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+def _detect_format(path: str) -> str:
+    if path.endswith(('.jsonl', '.ndjson', '.jsonl.gz')):
+        return 'jsonl'
+    return 'csv'
+
+def read_chunks(source, input_format: str, chunk_size: int):
+    """Yields raw DataFrames of at most chunk_size input rows; bureau rows are mapped later, per chunk."""
+    if input_format == 'jsonl':
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        # Bureau exports keep BVNs as text so leading zeros survive
+        reader = pd.read_csv(source, chunksize=chunk_size, dtype={'bvn': str} if input_format == 'bureau' else None)
+    yield from reader
+
+def stream_score(scorer: MLRiskScorer, source, sink, input_format: str = 'csv', output_format: str = 'csv',
+                 chunk_size: int = 10000) -> dict:
+    """
+    Scores every applicant from source and writes id, pd and risk rows to sink chunk by chunk.
+    Chunks that fail to score are reported and skipped rather than aborting the run.
+
+    Returns:
+        A summary dict with rows scored, rows failed, seconds, rows per second and peak RSS in MB.
+    """
+    start = time.perf_counter()
+    rows_scored = rows_failed = 0
+    first_row = 0
+    header_written = False
+    for chunk in read_chunks(source, input_format, chunk_size):
+        try:
+            # Mapping inside the try means a malformed bureau chunk is skipped like any other bad chunk
+            if input_format == 'bureau':
+                chunk = map_bureau_records(chunk)
+            scores = scorer.score_batch(chunk)
+        except Exception as e:
+            _log(f"🔥 Warning: Could not score rows {first_row}-{first_row + len(chunk) - 1}: {e}")
+            rows_failed += len(chunk)
+            first_row += len(chunk)
+            continue
+
+        id_column = next((column for column in ID_COLUMNS if column in chunk.columns), None)
+        if id_column is not None:
+            scores.insert(0, id_column, chunk[id_column].to_numpy())
+        if output_format == 'jsonl':
+            # lines=True output already ends every record, including the last, with a newline
+            sink.write(scores.to_json(orient='records', lines=True, double_precision=15))
+        else:
+            scores.to_csv(sink, header=not header_written, index=False)
+            header_written = True
+        sink.flush()
+        rows_scored += len(chunk)
+        first_row += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    summary = {'rows': rows_scored, 'failed_rows': rows_failed, 'seconds': elapsed,
+               'rows_per_s': rows_scored / elapsed if elapsed else 0.0, 'peak_rss_mb': peak_rss_mb}
+    _log(f"✅ Scored {rows_scored:,} applicants in {elapsed:.1f}s ({summary['rows_per_s']:,.0f} rows/s), "
+         f"{rows_failed:,} failed, peak RSS {peak_rss_mb:,.0f} MB")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream applicants through the benchmark credit model.")
+    parser.add_argument('input', help="Input file, or '-' for stdin.")
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'bureau'], help="Input format (default: from the file extension).")
+    parser.add_argument('--output', default='-', help="Output file, or '-' for stdout.")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--model', default='credit_model.joblib', help="Path to the model artifact.")
+    parser.add_argument('--registry', help="Score with a model from this registry directory instead of --model.")
+    parser.add_argument('--tag', default='latest', help="Registry tag to score with.")
+    args = parser.parse_args()
+
+    if args.input != '-' and not os.path.exists(args.input):
+        _log(f"🔥 Error: The file at {args.input} was not found.")
+        return
+    # MLRiskScorer reports loading problems on stdout, which may be the data stream
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        if args.registry:
+            scorer = MLRiskScorer(registry=ModelRegistry(args.registry), tag=args.tag)
+        else:
+            scorer = MLRiskScorer(args.model)
+    finally:
+        sys.stdout = stdout
+    if scorer.model_pipeline is None:
+        return
+
+    input_format = args.format or ('csv' if args.input == '-' else _detect_format(args.input))
+    source = sys.stdin if args.input == '-' else args.input
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        stream_score(scorer, source, sink, input_format=input_format, output_format=args.output_format,
+                     chunk_size=args.chunk_size)
+    except BrokenPipeError:
+        # The downstream reader (e.g. head) closed the pipe; nothing left to write to
+        pass
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+if __name__ == "__main__":
+    main()
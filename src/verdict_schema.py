@@ -0,0 +1,75 @@
+# src/verdict_schema.py
+"""
+Schema-constrained verdicts: the model answers {"verdict": "Good"|"Bad"[, "justification": "..."]} as JSON,
+so the verdict is read by a strict parse instead of searching the text for 'good' or 'bad'.
+"""
+import json
+import re
+
+VERDICTS = ('Good', 'Bad')
+
+# The free-text prompts ask for "Verdict: [Good or Bad]" on the first line
+VERDICT_LINE_PATTERN = re.compile(r"verdict\W*(good|bad)\b", re.IGNORECASE)
+
+def verdict_schema(justification: bool = False) -> dict:
+    properties = {"verdict": {"type": "STRING", "enum": list(VERDICTS)}}
+    if justification:
+        properties["justification"] = {"type": "STRING", "description": "One short sentence."}
+    return {"type": "OBJECT", "properties": properties, "required": ["verdict"]}
+
+def verdict_generation_config(generation_config: dict = None, justification: bool = False,
+                              max_output_tokens: int = None) -> dict:
+    """
+    The client's generation config plus JSON output constrained to verdict_schema() and an output cap.
+
+    The schema already ends generation once the JSON object closes; the cap bounds the worst case. On
+    Gemini 2.5 models thinking tokens count against the cap, so thinking is switched off (a thinking budget
+    of 0) unless generation_config sets its own thinking_config; with thinking on, raise max_output_tokens
+    or the JSON comes back truncated (Unknown).
+    """
+    if max_output_tokens is None:
+        max_output_tokens = 256 if justification else 64
+    return {"thinking_config": {"thinking_budget": 0}, **(generation_config or {}),
+            "response_mime_type": "application/json", "response_schema": verdict_schema(justification),
+            "max_output_tokens": max_output_tokens}
+
+def parse_structured_verdict(response_text: str):
+    """
+    Strictly parses a schema-constrained response.
+
+    Returns:
+        A tuple (verdict, justification): verdict is 'Good', 'Bad', or 'Unknown' when the response is not
+        a JSON object with a valid verdict (e.g. an API error, or output truncated by max_output_tokens).
+    """
+    try:
+        payload = json.loads(response_text)
+    except (json.JSONDecodeError, TypeError):
+        return 'Unknown', None
+    if not isinstance(payload, dict) or payload.get("verdict") not in VERDICTS:
+        return 'Unknown', None
+    return payload["verdict"], payload.get("justification")
+
+def parse_verdict_prefix(text: str):
+    """
+    The verdict from the "Verdict: Good/Bad" line of a (possibly partial) free-text response, or None if it
+    has not fully arrived yet. Requires a word boundary, so a chunk ending in "Verdict: Go" is not misread.
+    """
+    match = VERDICT_LINE_PATTERN.search(text)
+    return match.group(1).capitalize() if match else None
+
+class VerdictStats:
+    """Counts verdicts per setup so the Unknown (unparseable) rate can be tracked."""
+    def __init__(self):
+        self.counts = {}
+
+    def record(self, verdict: str, setup: str = 'all'):
+        setup_counts = self.counts.setdefault(setup, {'Good': 0, 'Bad': 0, 'Unknown': 0})
+        setup_counts[verdict if verdict in setup_counts else 'Unknown'] += 1
+
+    def unknown_rate(self, setup: str = None) -> float:
+        counts = [self.counts[setup]] if setup else list(self.counts.values())
+        total = sum(sum(c.values()) for c in counts)
+        return sum(c['Unknown'] for c in counts) / total if total else 0.0
+
+    def summary(self) -> dict:
+        return {setup: {**counts, 'unknown_rate': self.unknown_rate(setup)} for setup, counts in self.counts.items()}
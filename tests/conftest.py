@@ -0,0 +1,11 @@
+# tests/conftest.py
+import pytest
+from sklearn.model_selection import train_test_split
+
+from benchmarks.synthetic import make_customer_frame
+
+@pytest.fixture(scope='session')
+def customer_split():
+    """A stratified train/held-out split of synthetic customers, shared by the scoring tests."""
+    df = make_customer_frame(4000)
+    return train_test_split(df, test_size=0.3, random_state=42, stratify=df['isdelinquent'])
@@ -0,0 +1,167 @@
+# tests/test_api_client.py
+import asyncio
+
+import pytest
+
+pytest.importorskip('vertexai')
+
+from benchmarks.bench_llm_path import TimedClient
+from src.api_client import GeminiClient
+from src.batch_prediction import LocalBatchStorage, LocalBatchSubmitter
+from src.gemini_standin import MIN_CACHED_CONTENT_TOKENS
+from src.llm_cache import LLMResponseCache
+from src.prompts import PROMPT_TEMPLATES, create_debiased_llm_prompt, create_structured_llm_prompt
+
+FAST_STANDIN = {'ttft_ms': 1, 'ms_per_output_token': 0}
+
+APPLICANT = {'age': 34.0, 'gender': 'Female', 'primary_state': 'Lagos', 'credit_limit_facility_amount_global_limit': 2.0e6,
+             'total_outstanding': 1.6e6, 'average_utilization': 0.8, 'max_days_in_arrears': 0,
+             'maxdelinquencyseverity': 'Current'}
+
+@pytest.fixture
+def standin_client():
+    return GeminiClient(project_id=None, backend='standin', standin_options=FAST_STANDIN)
+
+def test_standin_single_batch_and_structured_calls(standin_client):
+    prompt = create_debiased_llm_prompt(APPLICANT)
+
+    assert standin_client.get_llm_assessment(prompt).startswith("Verdict: Bad")
+    assert asyncio.run(standin_client.get_llm_assessment_async(prompt)).startswith("Verdict: Bad")
+
+    low_applicant = {**APPLICANT, 'average_utilization': 0.2}
+    low_utilization = create_debiased_llm_prompt(low_applicant)
+    responses = standin_client.get_llm_assessments([(prompt, False), (low_utilization, False), (prompt, False)])
+    assert [response.split("\n")[0] for response in responses] == ["Verdict: Bad", "Verdict: Good", "Verdict: Bad"]
+    assert standin_client.deduplicated_calls() >= 1
+
+    verdicts = standin_client.get_structured_assessments([(create_structured_llm_prompt(APPLICANT), False),
+                                                          (create_structured_llm_prompt(low_applicant), False)])
+    assert [verdict['verdict'] for verdict in verdicts] == ['Bad', 'Good']
+
+def test_timed_client_passes_instructions_through():
+    client = TimedClient(project_id=None, backend='standin', standin_options=FAST_STANDIN)
+    client.enable_instruction_cache({name: instructions for name, (instructions, _) in PROMPT_TEMPLATES.items()})
+    _, create_data = PROMPT_TEMPLATES['debiased']
+
+    response = asyncio.run(client.get_llm_assessment_async(create_data(APPLICANT), instructions='debiased'))
+    assert response.startswith("Verdict: Bad")
+    assert len(client.latencies_s) == 1
+
+def test_short_instructions_fall_back_to_an_uncached_system_instruction(standin_client):
+    long_instructions = "Assess the applicant's delinquency risk. " * (MIN_CACHED_CONTENT_TOKENS // 8)
+    standin_client.enable_instruction_cache({'short': "Answer with Verdict: Good or Bad.", 'long': long_instructions})
+
+    assert not standin_client.instruction_models['short'].cache_system_instruction
+    assert standin_client.instruction_models['long'].cache_system_instruction
+
+    response = asyncio.run(standin_client.get_llm_assessment_async("Average Credit Utilization: 80.0%",
+                                                                   instructions='short'))
+    assert response.startswith("Verdict: Bad")
+    stats = standin_client.rate_limit_stats()['base']
+    assert stats['input_tokens'] > 0 and stats['cached_input_tokens'] == 0
+
+    asyncio.run(standin_client.get_llm_assessment_async("Average Credit Utilization: 20.0%", instructions='long'))
+    assert standin_client.rate_limit_stats()['base']['cached_input_tokens'] >= MIN_CACHED_CONTENT_TOKENS
+
+def test_batch_accepts_instruction_requests(standin_client, tmp_path):
+    standin_client.enable_instruction_cache({name: instructions for name, (instructions, _) in PROMPT_TEMPLATES.items()})
+    instructions, create_data = PROMPT_TEMPLATES['debiased']
+    data = create_data(APPLICANT)
+    full_prompt = create_debiased_llm_prompt(APPLICANT)
+    sent = []
+
+    def respond(prompt):
+        sent.append(prompt)
+        return "Verdict: Bad"
+
+    responses = standin_client.get_llm_assessments_batch(
+        [(data, False, 'debiased'), (full_prompt, False), (data, True, 'debiased')], LocalBatchStorage(str(tmp_path)),
+        LocalBatchSubmitter(respond, polls_until_done=1), poll_interval_s=0)
+
+    assert responses[:2] == ["Verdict: Bad", "Verdict: Bad"]
+    assert responses[2].startswith("LLM Error: No instruction cache 'debiased' for the tuned model")
+    assert sent[0] == f"{instructions}\n\n{data}"
+
+def test_packed_reissue_recovers_from_a_malformed_response_with_the_cache_on(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'llm_cache.sqlite'))
+    client = GeminiClient(project_id=None, backend='standin', standin_options=FAST_STANDIN, cache=cache)
+    model = client.base_model
+    answer = model._answer
+    # The first pack comes back truncated mid-JSON; later calls answer normally
+    model._answer = lambda prompt, config=None: ('[{"id": "1", "verdict": "Go' if model.calls == 1
+                                                 else answer(prompt, config))
+    records = [{**APPLICANT, 'average_utilization': utilization} for utilization in (0.8, 0.2, 0.9, 0.1)]
+
+    verdicts, stats = client.get_packed_verdicts(records, pack_size=4)
+    assert verdicts == ['Bad', 'Good', 'Bad', 'Good']
+    assert model.calls == 2 and stats['reissued'] == 4 and stats['unresolved'] == 0
+
+    # Only the parsed answer was cached: a rerun is served from it without calling the model
+    assert client.get_packed_verdicts(records, pack_size=4)[0] == verdicts
+    assert model.calls == 2
+    cache.close()
+
+def test_rejected_structured_verdicts_are_not_cached(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'llm_cache.sqlite'))
+    # Thinking left on eats the output cap, so the JSON verdict comes back truncated
+    client = GeminiClient(project_id=None, backend='standin', cache=cache,
+                          standin_options={**FAST_STANDIN, 'thinking_tokens': 200},
+                          generation_config={'thinking_config': {'thinking_budget': 1024}})
+    prompt = create_structured_llm_prompt(APPLICANT)
+
+    assert client.get_structured_assessments([(prompt, False)])[0]['verdict'] == 'Unknown'
+    assert cache.stats()['entries'] == 0
+    client.get_structured_assessments([(prompt, False)])
+    assert client.base_model.calls == 2
+    cache.close()
+
+def test_streamed_verdicts_record_token_usage(standin_client):
+    prompt = create_debiased_llm_prompt(APPLICANT)
+
+    early = asyncio.run(standin_client.get_streamed_verdict_async(prompt))
+    assert early['verdict'] == 'Bad' and not early['complete']
+    stats = standin_client.rate_limit_stats()['base']
+    # Closed after the verdict line: the prompt is counted in full, only part of the 60-token justification
+    assert stats['input_tokens'] > 0 and 0 < stats['output_tokens'] < 60
+
+    full = asyncio.run(standin_client.get_streamed_verdict_async(prompt, collect_justification=True))
+    assert full['complete']
+    assert standin_client.rate_limit_stats()['base']['output_tokens'] - stats['output_tokens'] >= 60
+
+def test_concurrent_identical_prompts_share_one_call(standin_client):
+    prompt = create_debiased_llm_prompt(APPLICANT)
+    reindented = "\n".join(line.strip() for line in prompt.splitlines())
+
+    async def run_all():
+        return await asyncio.gather(*(standin_client.get_llm_assessment_async(p) for p in [prompt, reindented] * 3))
+    responses = asyncio.run(run_all())
+    assert len(set(responses)) == 1 and responses[0].startswith("Verdict: Bad")
+    assert standin_client.base_model.calls == 1
+
+def test_cached_responses_are_served_to_a_new_client(tmp_path):
+    path = str(tmp_path / 'llm_cache.sqlite')
+    prompt = create_debiased_llm_prompt(APPLICANT)
+    first = GeminiClient(project_id=None, backend='standin', cache=LLMResponseCache(path), standin_options=FAST_STANDIN)
+    answer = first.get_llm_assessment(prompt)
+
+    second = GeminiClient(project_id=None, backend='standin', cache=LLMResponseCache(path), standin_options=FAST_STANDIN)
+    assert second.get_llm_assessments([(prompt, False)]) == [answer]
+    assert second.base_model.calls == 0 and second.cache.stats()['hits'] == 1
+    # A different generation config is a different request
+    second.generation_config = {'temperature': 0.5}
+    second.get_llm_assessment(prompt)
+    assert second.base_model.calls == 1
+
+def test_concurrent_assessments_stay_within_max_concurrency():
+    # The stand-in throttles any request beyond 3 in flight, so a client that overshoots would see 429s
+    client = GeminiClient(project_id=None, backend='standin', max_concurrency=3,
+                          rate_limits={'base': {'requests_per_minute': 60000, 'burst': 100, 'initial_concurrency': 8}},
+                          standin_options={'ttft_ms': 5, 'ms_per_output_token': 0, 'capacity': 3})
+    applicants = [{**APPLICANT, 'average_utilization': utilization} for utilization in [0.1, 0.9] * 10]
+    for i, applicant in enumerate(applicants):
+        applicant['credit_limit_facility_amount_global_limit'] += i
+    responses = client.get_llm_assessments([(create_debiased_llm_prompt(applicant), False) for applicant in applicants])
+
+    assert [response.split("\n")[0] for response in responses] == ["Verdict: Good", "Verdict: Bad"] * 10
+    stats = client.rate_limit_stats()['base']
+    assert stats['requests'] == 20 and stats['throttled'] == 0
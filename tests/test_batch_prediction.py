@@ -0,0 +1,29 @@
+# tests/test_batch_prediction.py
+import os
+
+from src.batch_prediction import LocalBatchStorage, LocalBatchSubmitter, run_batch_prediction
+
+class ReversedOutputSubmitter(LocalBatchSubmitter):
+    """Writes the output lines in reverse, since batch prediction does not keep input order."""
+    def submit(self, model_name, input_uri, output_uri):
+        job = super().submit(model_name, input_uri, output_uri)
+        path = os.path.join(output_uri, 'predictions.jsonl')
+        with open(path) as f:
+            lines = f.readlines()
+        with open(path, 'w') as f:
+            f.writelines(reversed(lines))
+        return job
+
+def _respond(prompt: str) -> str:
+    if prompt == "fail":
+        raise RuntimeError("400 Request contains an invalid argument.")
+    return prompt.upper()
+
+def test_local_batch_joins_by_id_and_reports_failed_rows(tmp_path):
+    storage = LocalBatchStorage(str(tmp_path))
+    texts = run_batch_prediction(["first", "fail", "third"], 'gemini-2.5-flash', storage,
+                                 ReversedOutputSubmitter(_respond, polls_until_done=1), poll_interval_s=0)
+
+    assert texts[0] == "FIRST"
+    assert texts[1] == "An error occurred with the LLM API call: 400 Request contains an invalid argument."
+    assert texts[2] == "THIRD"
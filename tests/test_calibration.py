@@ -0,0 +1,41 @@
+# tests/test_calibration.py
+import numpy as np
+import pytest
+
+from src.calibration import DEFAULT_COST_MATRIX, fit_calibrator, optimise_cutoff
+
+def _cost(scores, y, cutoff, costs=DEFAULT_COST_MATRIX):
+    declined = scores >= cutoff
+    return costs['loss_given_default'] * np.sum(y[~declined]) + costs['lost_margin'] * np.sum(1 - y[declined])
+
+def test_cutoff_matches_brute_force_and_never_splits_ties():
+    rng = np.random.default_rng(7)
+    # Rounded scores so many applicants share a PD
+    scores = np.round(rng.uniform(size=400), 2)
+    y = (rng.uniform(size=400) < scores).astype(float)
+
+    cutoff, summary = optimise_cutoff(scores, y)
+    candidates = np.concatenate((np.unique(scores), [np.nextafter(scores.max(), np.inf)]))
+    assert summary['expected_cost'] == pytest.approx(min(_cost(scores, y, c) for c in candidates))
+    assert summary['expected_cost'] == pytest.approx(_cost(scores, y, cutoff))
+    assert summary['approval_rate'] == pytest.approx(np.mean(scores < cutoff))
+    assert not np.any(scores == cutoff) or cutoff == scores.min()
+
+def test_cutoff_declines_everyone_or_no_one_when_costs_say_so():
+    scores, y = np.array([0.2, 0.4, 0.6]), np.array([0.0, 1.0, 1.0])
+    assert optimise_cutoff(scores, y, {'loss_given_default': 0.0})[1]['approval_rate'] == 1.0
+    assert optimise_cutoff(scores, np.ones(3), {'lost_margin': 0.0})[1]['approval_rate'] == 0.0
+    with pytest.raises(ValueError):
+        optimise_cutoff([], [])
+
+@pytest.mark.parametrize('method', ['isotonic', 'platt'])
+def test_calibrators_are_monotone_probabilities(method):
+    rng = np.random.default_rng(3)
+    raw = rng.uniform(size=2000)
+    y = (rng.uniform(size=2000) < raw ** 2).astype(int)
+    calibrated = fit_calibrator(raw, y, method=method).predict(np.linspace(0, 1, 101))
+    assert np.all((calibrated >= 0) & (calibrated <= 1)) and np.all(np.diff(calibrated) >= -1e-12)
+
+def test_unknown_calibration_method_is_rejected():
+    with pytest.raises(ValueError):
+        fit_calibrator([0.1, 0.9], [0, 1], method='beta')
@@ -0,0 +1,56 @@
+# tests/test_compiled_scorer.py
+import numpy as np
+import pytest
+
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+
+PD_TOLERANCE = 1e-9
+
+def _with_missing_categories(df, seed: int):
+    """Blanks some categories as NaN and others as None, the two ways a missing category reaches the scorer."""
+    df = df.copy()
+    rng = np.random.default_rng(seed)
+    for column in ['gender', 'primary_state']:
+        df[column] = df[column].astype(object)
+        df.loc[rng.random(len(df)) < 0.1, column] = np.nan
+        df.loc[rng.random(len(df)) < 0.1, column] = None
+    return df
+
+@pytest.mark.parametrize('calibration', ['isotonic', 'platt'])
+def test_compiled_matches_pipeline_on_the_test_set(customer_split, tmp_path, calibration):
+    train_df, test_df = customer_split
+    model_path = str(tmp_path / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path, calibration=calibration)
+
+    scorer = MLRiskScorer(model_path)
+    assert scorer.compiled is not None
+    assert scorer.validate_compiled(test_df) < PD_TOLERANCE
+
+@pytest.mark.parametrize('encoding', [{}, {'n_hash_features': 256}], ids=['one_hot', 'hashed'])
+def test_compiled_matches_pipeline_with_missing_categories(customer_split, tmp_path, encoding):
+    train_df, test_df = customer_split
+    model_path = str(tmp_path / 'credit_model.joblib')
+    train_and_save_model(_with_missing_categories(train_df, seed=0), model_path=model_path, **encoding)
+
+    scorer = MLRiskScorer(model_path)
+    assert scorer.compiled is not None
+    held_out = _with_missing_categories(test_df, seed=1)
+    assert scorer.validate_compiled(held_out) < PD_TOLERANCE
+
+@pytest.mark.parametrize('bad_value', [np.nan, None, np.inf], ids=['nan', 'none', 'inf'])
+@pytest.mark.parametrize('calibration', ['isotonic', 'platt'])
+def test_missing_numeric_raises_on_both_paths(customer_split, tmp_path, calibration, bad_value):
+    train_df, test_df = customer_split
+    model_path = str(tmp_path / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path, calibration=calibration)
+    scorer = MLRiskScorer(model_path)
+    record = {**test_df.iloc[0].to_dict(), 'average_utilization': bad_value}
+
+    with pytest.raises(ValueError):
+        scorer.compiled.predict_proba(record)
+    with pytest.raises(ValueError):
+        scorer.predict_proba_batch(record)
+    scorer.cutoff = None
+    with pytest.raises(ValueError):
+        scorer.predict_risk(record)
@@ -0,0 +1,21 @@
+# tests/test_gemini_standin.py
+import pytest
+
+from src.gemini_standin import MIN_CACHED_CONTENT_TOKENS, StandInError, StandInModel
+
+LONG_INSTRUCTIONS = "Assess the applicant's delinquency risk. " * (MIN_CACHED_CONTENT_TOKENS // 8)
+
+def test_caching_an_instruction_below_the_minimum_is_refused():
+    with pytest.raises(StandInError) as excinfo:
+        StandInModel('gemini-2.5-flash', system_instruction="Verdict: Good or Bad.", cache_system_instruction=True)
+    assert excinfo.value.code == 400
+
+def test_cached_instruction_tokens_are_reported_only_when_cached():
+    cached = StandInModel('gemini-2.5-flash', ttft_ms=0, ms_per_output_token=0, system_instruction=LONG_INSTRUCTIONS,
+                          cache_system_instruction=True)
+    uncached = StandInModel('gemini-2.5-flash', ttft_ms=0, ms_per_output_token=0, system_instruction=LONG_INSTRUCTIONS)
+
+    usage = cached.generate_content("Average Credit Utilization: 80.0%").usage_metadata
+    assert usage.cached_content_token_count >= MIN_CACHED_CONTENT_TOKENS
+    assert usage.prompt_token_count > usage.cached_content_token_count
+    assert uncached.generate_content("Average Credit Utilization: 80.0%").usage_metadata.cached_content_token_count == 0
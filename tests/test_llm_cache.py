@@ -0,0 +1,34 @@
+# tests/test_llm_cache.py
+from src.llm_cache import LLMResponseCache, llm_cache_key
+
+def test_key_covers_model_prompt_and_generation_config():
+    key = llm_cache_key('gemini-2.5-flash', 'prompt', {'temperature': 0, 'max_output_tokens': 64})
+    assert key == llm_cache_key('gemini-2.5-flash', 'prompt', {'max_output_tokens': 64, 'temperature': 0})
+    assert llm_cache_key('gemini-2.5-flash', 'prompt') == llm_cache_key('gemini-2.5-flash', 'prompt', {})
+    for other in [llm_cache_key('projects/p/models/tuned', 'prompt', {'temperature': 0, 'max_output_tokens': 64}),
+                  llm_cache_key('gemini-2.5-flash', 'prompt ', {'temperature': 0, 'max_output_tokens': 64}),
+                  llm_cache_key('gemini-2.5-flash', 'prompt', {'temperature': 1, 'max_output_tokens': 64})]:
+        assert other != key
+
+def test_responses_persist_across_connections(tmp_path):
+    path = str(tmp_path / 'llm_cache.sqlite')
+    writer = LLMResponseCache(path)
+    writer.put('k1', 'Verdict: Good', model_name='gemini-2.5-flash')
+    reader = LLMResponseCache(path)
+    assert reader.get('k1') == 'Verdict: Good' and reader.get('k2') is None
+    assert reader.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'writes': 0, 'entries': 1}
+    writer.close()
+    reader.close()
+
+def test_expired_and_least_recently_used_entries_are_dropped(tmp_path):
+    expired = LLMResponseCache(str(tmp_path / 'expired.sqlite'), ttl_seconds=0)
+    expired.put('k1', 'Verdict: Good')
+    assert expired.get('k1') is None
+
+    bounded = LLMResponseCache(str(tmp_path / 'bounded.sqlite'), max_entries=2, evict_every=3)
+    bounded.put('k1', 'a')
+    bounded.put('k2', 'b')
+    bounded.get('k1')
+    # The third write triggers eviction of the least recently used entry, k2
+    bounded.put('k3', 'c')
+    assert bounded.get('k1') == 'a' and bounded.get('k2') is None and bounded.stats()['entries'] == 2
@@ -0,0 +1,26 @@
+# tests/test_model_manager.py
+import os
+import sys
+
+import pytest
+
+from src.model_manager import ModelManager
+from src.model_trainer import train_and_save_model
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="memory_report reads /proc/self/smaps")
+def test_memory_report_finds_a_model_registered_by_relative_path(customer_split, tmp_path, monkeypatch):
+    train_df, test_df = customer_split
+    train_and_save_model(train_df.copy(), model_path=str(tmp_path / 'credit_model.joblib'))
+    monkeypatch.chdir(tmp_path)
+
+    manager = ModelManager(mmap_mode='r')
+    manager.register('nigeria', model_path='credit_model.joblib')
+    scorer = manager.get('nigeria')
+    scorer.predict_proba_batch(test_df.head(100))
+    assert scorer.model_path == os.path.realpath(tmp_path / 'credit_model.joblib')
+
+    # The report must not depend on the working directory at report time
+    monkeypatch.chdir(os.path.dirname(tmp_path))
+    report = manager.memory_report()['nigeria']
+    assert report['mapped_rss'] > 0
+    assert report['mapped_pss'] > 0
@@ -0,0 +1,47 @@
+# tests/test_model_registry.py
+import pandas as pd
+import pytest
+
+from src.model_registry import ModelRegistry
+
+FEATURE_CONFIG = {'numeric_features': ['age'], 'categorical_features': ['gender'], 'target': 'isdelinquent'}
+HYPERPARAMS = {'C': 1.0}
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'age': [30.0, 41.0, 25.0], 'gender': ['F', 'M', 'F'], 'isdelinquent': [0, 1, 0]})
+
+def test_fingerprint_follows_data_config_and_row_order(frame):
+    key = ModelRegistry.fingerprint(frame, FEATURE_CONFIG, HYPERPARAMS)
+    assert key == ModelRegistry.fingerprint(frame.copy(), dict(reversed(FEATURE_CONFIG.items())), HYPERPARAMS)
+
+    changed_value = frame.assign(age=[30.0, 41.0, 26.0])
+    changed_dtype = frame.assign(age=frame['age'].astype('float32'))
+    for other in [ModelRegistry.fingerprint(changed_value, FEATURE_CONFIG, HYPERPARAMS),
+                  ModelRegistry.fingerprint(changed_dtype, FEATURE_CONFIG, HYPERPARAMS),
+                  ModelRegistry.fingerprint(frame.iloc[::-1], FEATURE_CONFIG, HYPERPARAMS),
+                  ModelRegistry.fingerprint(frame, {**FEATURE_CONFIG, 'sparse': True}, HYPERPARAMS),
+                  ModelRegistry.fingerprint(frame, FEATURE_CONFIG, {'C': 0.5})]:
+        assert other != key
+
+def test_register_tag_and_resolve(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    registry.register('aaaa', {'n': 1}, tags=['latest'])
+    registry.register('bbbb', {'n': 2}, tags=['latest'])
+    # Re-registering a key keeps its version
+    registry.register('aaaa', {'n': 1})
+
+    assert registry.resolve() == 'bbbb'
+    assert registry.resolve(version=1) == 'aaaa' and registry.resolve(version='2') == 'bbbb'
+    assert registry.resolve(tag='aaaa') == 'aaaa'
+    registry.tag('aaaa', 'production')
+    assert registry.load(registry.resolve(tag='production')) == {'n': 1}
+    assert list(registry.list_models()['tags']) == ['production', 'latest']
+    assert registry.contains('aaaa') and not registry.contains('cccc')
+
+    with pytest.raises(KeyError):
+        registry.tag('cccc', 'production')
+    with pytest.raises(KeyError):
+        registry.resolve(tag='staging')
+    with pytest.raises(KeyError):
+        registry.resolve(version=3)
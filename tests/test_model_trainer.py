@@ -0,0 +1,41 @@
+# tests/test_model_trainer.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model_registry import ModelRegistry
+from src.model_trainer import retrain_model, train_and_save_model
+
+NEW_STATE = 'Atlantis'
+
+@pytest.fixture(scope='module')
+def registry(customer_split, tmp_path_factory):
+    train_df, _ = customer_split
+    registry = ModelRegistry(str(tmp_path_factory.mktemp('registry')))
+    train_and_save_model(train_df.copy(), registry=registry)
+    return registry
+
+def test_retrain_warm_starts_and_reports_new_categories(registry, customer_split):
+    train_df, test_df = customer_split
+    base_key = registry.resolve(tag='latest')
+    base_pipeline = registry.load(base_key)['pipeline']
+    base_coef = dict(zip(base_pipeline.named_steps['preprocessor'].get_feature_names_out(),
+                         base_pipeline.named_steps['classifier'].coef_[0]))
+
+    # Next month's extract: the same applicants plus new ones from a state the model has never seen
+    new_rows = test_df.copy()
+    new_rows['primary_state'] = NEW_STATE
+    appended = pd.concat([train_df, new_rows], ignore_index=True)
+    artifact = retrain_model(appended, registry)
+
+    assert artifact['training_config']['warm_start_from'] == base_key
+    assert registry.resolve(tag='latest') == artifact['model_version'] != base_key
+    drift = artifact['coefficient_drift'].set_index('feature')
+    new_column = f'cat__primary_state_{NEW_STATE}'
+    assert new_column in drift.index and new_column not in base_coef
+    # The new level starts at zero; every one-hot column the old model had starts at its old coefficient
+    assert drift.loc[new_column, 'previous_coef'] == 0
+    old_categorical = [feature for feature in base_coef if feature.startswith('cat__')]
+    assert old_categorical
+    np.testing.assert_array_equal(drift.loc[old_categorical, 'previous_coef'],
+                                  [base_coef[feature] for feature in old_categorical])
@@ -0,0 +1,26 @@
+# tests/test_onnx_backend.py
+import numpy as np
+import pytest
+
+pytest.importorskip('skl2onnx')
+pytest.importorskip('onnxruntime')
+
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+
+# float64 end to end, so the backends should agree far below any decision-relevant difference
+PD_TOLERANCE = 1e-6
+
+def test_onnx_matches_sklearn_on_held_out_rows(customer_split, tmp_path):
+    train_df, test_df = customer_split
+    model_path = str(tmp_path / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path, export_onnx=True)
+
+    sklearn_scorer = MLRiskScorer(model_path, backend='sklearn')
+    onnx_scorer = MLRiskScorer(model_path, backend='onnx')
+    assert onnx_scorer.onnx_runner is not None
+
+    expected = sklearn_scorer.model_pipeline.predict_proba(test_df)[:, 1]
+    actual = onnx_scorer.onnx_runner.predict_proba(test_df)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=PD_TOLERANCE)
+    np.testing.assert_array_equal(onnx_scorer.predict_risk_batch(test_df), sklearn_scorer.predict_risk_batch(test_df))
@@ -0,0 +1,82 @@
+# tests/test_packed_assessment.py
+import asyncio
+import json
+
+from src.packed_assessment import assess_packed_async, parse_packed_verdicts
+from src.prompts import (BASELINE_TASK, DEBIASED_TASK, create_baseline_llm_data, create_debiased_llm_data,
+                         create_packed_llm_prompt)
+
+class ScriptedClient:
+    """Answers packed prompts from a list of canned responses and caches what accept() lets through."""
+    generation_config = None
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.cache = {}
+        self.calls = 0
+
+    async def get_llm_assessment_async(self, prompt, use_tuned_model=False, generation_config=None, accept=None):
+        if prompt in self.cache:
+            return self.cache[prompt]
+        self.calls += 1
+        text = self.responses.pop(0)
+        if accept is None or accept(text):
+            self.cache[prompt] = text
+        return text
+
+def test_parse_drops_unknown_invalid_and_conflicting_ids():
+    response = json.dumps([{"id": "1", "verdict": "bad"}, {"id": "2", "verdict": "Maybe"}, {"id": "9", "verdict": "Good"},
+                           {"id": "3", "verdict": "Good"}, {"id": "3", "verdict": "Bad"}])
+    assert parse_packed_verdicts(response, ["1", "2", "3"]) == {"1": "Bad"}
+    assert parse_packed_verdicts('[{"id": "1", "verdict": "Go', ["1"]) == {}
+
+def test_malformed_pack_is_not_cached_and_the_reissue_recovers():
+    good = json.dumps([{"id": "1", "verdict": "Bad"}, {"id": "2", "verdict": "Good"}])
+    client = ScriptedClient(['[{"id": "1", "verdict": "Go', good])
+    records = [{'average_utilization': 0.8}, {'average_utilization': 0.2}]
+
+    verdicts, stats = asyncio.run(assess_packed_async(client, records, pack_size=2))
+    assert verdicts == ['Bad', 'Good']
+    assert client.calls == 2 and stats['reissued'] == 2 and stats['unresolved'] == 0
+    assert list(client.cache.values()) == [good]
+
+class RecordingClient(ScriptedClient):
+    """Answers every pack correctly from its prompt and keeps the prompts it was sent."""
+    def __init__(self):
+        super().__init__([])
+        self.prompts = []
+
+    async def get_llm_assessment_async(self, prompt, use_tuned_model=False, generation_config=None, accept=None):
+        self.prompts.append(prompt)
+        ids = [line.split(":")[0].split()[-1] for line in prompt.splitlines() if line.strip().startswith("- id ")]
+        return json.dumps([{"id": applicant_id, "verdict": "Good"} for applicant_id in ids])
+
+def test_groups_never_share_a_pack_and_identical_rows_are_sent_once():
+    originals = [{'age': 30 + i, 'gender': 'Male', 'primary_state': 'Lagos', 'average_utilization': i / 10}
+                 for i in range(3)]
+    counterfactuals = [{**record, 'gender': 'Female'} for record in originals]
+    records = originals + counterfactuals
+    groups = ['orig'] * 3 + ['gender'] * 3
+
+    client = RecordingClient()
+    verdicts, stats = asyncio.run(assess_packed_async(client, records, debiased=False, pack_size=10, groups=groups))
+    assert verdicts == ['Good'] * 6 and stats['duplicates'] == 0
+    # One pack per group: no counterfactual sits next to its original
+    assert len(client.prompts) == 2
+    assert all(("Male" in prompt) != ("Female" in prompt) for prompt in client.prompts)
+
+    # The debiased prompt cannot see gender, so each counterfactual is the same row as its original
+    client = RecordingClient()
+    verdicts, stats = asyncio.run(assess_packed_async(client, records, debiased=True, pack_size=10, groups=groups))
+    assert verdicts == ['Good'] * 6 and stats['duplicates'] == 3
+    assert len(client.prompts) == 1 and client.prompts[0].count("- id ") == 3
+
+def test_packed_prompt_states_the_single_applicant_task_and_fields():
+    record = {'age': 41, 'gender': 'F', 'primary_state': 'Kano',
+              'credit_limit_facility_amount_global_limit': 250000.0, 'average_utilization': 0.42}
+    for debiased, task, create_data in [(True, DEBIASED_TASK, create_debiased_llm_data),
+                                        (False, BASELINE_TASK, create_baseline_llm_data)]:
+        prompt = create_packed_llm_prompt([("1", record)], debiased)
+        assert all(line.strip() in prompt for line in task.splitlines())
+        fields = [line[2:] for line in create_data(record).splitlines() if line.startswith("- ")]
+        assert "- id 1: " + "; ".join(fields) in prompt
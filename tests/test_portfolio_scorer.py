@@ -0,0 +1,25 @@
+# tests/test_portfolio_scorer.py
+import pandas as pd
+import pytest
+
+from src.model_trainer import train_and_save_model
+from src.portfolio_scorer import score_portfolio
+from src.risk_scorer import MLRiskScorer
+
+def test_worker_partitions_match_in_process_scoring(customer_split, tmp_path):
+    train_df, test_df = customer_split
+    model_path = str(tmp_path / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path)
+    expected = MLRiskScorer(model_path).score_batch(test_df)
+
+    output_dir = tmp_path / 'scored'
+    output_dir.mkdir()
+    (output_dir / 'part-099.csv').write_text("stale partition from an earlier run\n")
+    summary = score_portfolio(test_df, model_path=model_path, output_dir=str(output_dir), n_workers=2, chunk_size=150)
+
+    assert summary['rows'] == len(test_df) and 1 <= len(summary['files']) <= 2
+    scored = pd.concat([pd.read_csv(path) for path in summary['files']]).set_index('customerid')
+    scored = scored.loc[test_df['customerid']]
+    assert len(scored) == len(test_df)
+    assert list(scored['risk']) == list(expected['risk'])
+    assert scored['pd'].to_numpy() == pytest.approx(expected['pd'].to_numpy())
@@ -0,0 +1,75 @@
+# tests/test_rate_limiter.py
+import asyncio
+import time
+
+from src.gemini_standin import StandInError
+from src.rate_limiter import (AIMDConcurrencyLimiter, TokenBucket, backoff_delay, is_retryable,
+                              retry_after_seconds)
+
+def _elapsed(coroutine_factory) -> float:
+    start = time.monotonic()
+    asyncio.run(coroutine_factory())
+    return time.monotonic() - start
+
+def test_token_bucket_allows_a_burst_then_the_refill_rate():
+    bucket = TokenBucket(rate=20, burst=3)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+    assert _elapsed(lambda: take(3)) < 0.05
+    # Drained: three more need three refills at 50 ms each
+    assert _elapsed(lambda: take(3)) >= 0.14
+
+def test_token_bucket_pause_holds_back_the_next_request():
+    bucket = TokenBucket(rate=1000, burst=10)
+    bucket.pause(0.05)
+    assert _elapsed(bucket.acquire) >= 0.045
+
+def test_aimd_halves_once_per_congestion_event_and_grows_only_when_saturated():
+    limiter = AIMDConcurrencyLimiter(initial_limit=4, min_limit=1)
+    sent_at = time.monotonic()
+    limiter.on_overload(sent_at)
+    # Another error from a request sent before the decrease is part of the same event
+    limiter.on_overload(sent_at)
+    assert limiter.limit == 2 and limiter.decreases == 1
+
+    limiter.on_success(0.01)
+    assert limiter.limit == 2
+    limiter.in_flight = 2
+    limiter.on_success(0.01)
+    assert limiter.limit == 2.5
+
+    for _ in range(5):
+        limiter.on_overload(time.monotonic())
+    assert limiter.limit == 1
+
+def test_aimd_treats_slow_responses_as_overload():
+    limiter = AIMDConcurrencyLimiter(initial_limit=8, latency_target_s=0.5)
+    limiter.on_success(1.0)
+    assert limiter.limit == 4
+
+def test_aimd_caps_requests_in_flight():
+    limiter = AIMDConcurrencyLimiter(initial_limit=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.005)
+
+    async def run_all():
+        await asyncio.gather(*(request() for _ in range(10)))
+    asyncio.run(run_all())
+    assert peak == 2 and limiter.in_flight == 0
+
+def test_backoff_honours_retry_after_and_cap():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base_s=1.0, cap_s=8.0) <= 8.0
+    assert backoff_delay(0, base_s=0.1, retry_after_s=3.0) == 3.0
+
+    throttled = StandInError(429, "Resource exhausted", retry_after_s=2.5)
+    assert is_retryable(throttled) and retry_after_seconds(throttled) == 2.5
+    assert is_retryable(StandInError(503, "Unavailable")) and not is_retryable(StandInError(400, "Bad request"))
+    assert retry_after_seconds(StandInError(503, "Unavailable")) is None
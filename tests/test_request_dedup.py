@@ -0,0 +1,47 @@
+# tests/test_request_dedup.py
+import asyncio
+
+from src.request_dedup import SingleFlight, canonical_prompt, dedupe_requests
+
+def test_canonical_prompt_ignores_indentation_and_blank_lines():
+    assert canonical_prompt("\n    Verdict:  Good\n\n    Response:\n    ") == "Verdict: Good\nResponse:"
+    assert canonical_prompt("Utilization: 80%") != canonical_prompt("Utilization: 8 0%")
+
+def test_dedupe_requests_maps_every_request_to_its_representative():
+    unique, positions = dedupe_requests(["a ", "b", "a", "c", "b"], key=str.strip)
+    assert unique == ["a ", "b", "c"] and positions == [0, 1, 0, 2, 1]
+
+def test_single_flight_collapses_concurrent_identical_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def call(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"answer {key}"
+
+    async def run_all():
+        concurrent = await asyncio.gather(*(flight.do(key, lambda key=key: call(key)) for key in "aaab"))
+        # Completed keys are forgotten: a later identical call runs again
+        later = await flight.do("a", lambda: call("a"))
+        return concurrent, later
+
+    concurrent, later = asyncio.run(run_all())
+    assert concurrent == ["answer a", "answer a", "answer a", "answer b"] and later == "answer a"
+    assert calls == ["a", "b", "a"] and flight.shared == 2
+
+def test_single_flight_survives_a_cancelled_waiter():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def run_all():
+        first = asyncio.ensure_future(flight.do("a", call))
+        second = asyncio.ensure_future(flight.do("a", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run_all()) == "answer"
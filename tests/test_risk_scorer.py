@@ -0,0 +1,51 @@
+# tests/test_risk_scorer.py
+import pytest
+
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+
+@pytest.fixture(scope='module')
+def scorer(customer_split, tmp_path_factory):
+    train_df, _ = customer_split
+    model_path = str(tmp_path_factory.mktemp('model') / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path)
+    return MLRiskScorer(model_path)
+
+def _decisions(scorer, df):
+    """The 'Good'/'Bad' decisions of every scoring path, batch and single-applicant."""
+    scorer.set_reference_population(df)
+    return {
+        'predict_risk_batch': list(scorer.predict_risk_batch(df)),
+        'score_batch': list(scorer.score_batch(df)['risk']),
+        'predict_with_reasons': list(scorer.predict_with_reasons(df)['risk']),
+        'predict_risk': [scorer.predict_risk(record) for record in df.to_dict('records')],
+    }
+
+@pytest.mark.parametrize('use_cutoff', [True, False], ids=['cutoff', 'no_cutoff'])
+def test_every_path_applies_the_same_decision_rule(scorer, customer_split, use_cutoff):
+    _, test_df = customer_split
+    df = test_df.head(300)
+    cutoff = scorer.cutoff
+    try:
+        scorer.cutoff = cutoff if use_cutoff else None
+        decisions = _decisions(scorer, df)
+    finally:
+        scorer.cutoff = cutoff
+
+    expected = decisions.pop('predict_risk_batch')
+    for path, risks in decisions.items():
+        assert risks == expected, path
+    assert set(expected) == {'Good', 'Bad'}
+
+def test_protected_features_are_never_given_as_reasons(scorer, customer_split):
+    _, test_df = customer_split
+    scorer.set_reference_population(test_df)
+    reasons = scorer.predict_with_reasons(test_df, top_k=5)
+    given = set()
+    for column in [c for c in reasons.columns if c.startswith('reason_')]:
+        given.update(reasons[column].dropna().astype(str))
+
+    assert given
+    for label in given:
+        assert not label.startswith(('R01', 'R05', 'R06')), label
+        assert not {'age', 'gender', 'primary_state'}.intersection(label.split('/')), label
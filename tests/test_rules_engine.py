@@ -0,0 +1,48 @@
+# tests/test_rules_engine.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.rules_engine import Rule, RulesEngine
+
+@pytest.fixture
+def applicants():
+    return pd.DataFrame({
+        'total_outstanding': [6e6, 1e6, 7e6, 2e6, 1e6],
+        'active_loans': [1, 8, 9, 2, 1],
+        'monthly_income': [2e5, 2e5, 1e5, 1e5, 3e5],
+        'credit_source': ['CRC', 'CRC', 'XDS', None, 'First Central'],
+    })
+
+def test_first_knockout_rule_in_order_is_the_reason(applicants):
+    engine = RulesEngine.from_lender_parameters(
+        {'max_outstanding': 5e6, 'total_active_loans': 5, 'min_income': 1.5e5, 'credit_sources': ['CRC', 'First Central']},
+        extra_rules=[Rule('watchlist', 'total_outstanding', '>', 0, knockout=False)])
+    result = engine.evaluate(applicants)
+
+    assert list(result['knockout_reason'].astype(object)) == ['max_outstanding', 'total_active_loans',
+                                                              'max_outstanding', 'min_income', np.nan]
+    assert list(result['knocked_out']) == [True, True, True, True, False]
+    # A missing credit source is never in the allowed set; non-knockout rules count hits but decline no one
+    assert list(result['hits']['credit_sources']) == [False, False, True, True, False]
+    assert result['hit_counts'].to_dict() == {'max_outstanding': 2, 'total_active_loans': 2, 'min_income': 2,
+                                              'credit_sources': 2, 'watchlist': 5}
+    assert 'watchlist' not in result['knockout_reason'].categories
+
+def test_bitfield_and_wide_rule_sets_pick_the_same_reason(applicants):
+    # 17 knockout rules overflow the 16-bit field and take the masked-assignment path
+    thresholds = np.linspace(0, 8e6, 17)[::-1]
+    wide = RulesEngine([Rule(f'outstanding_over_{i}', 'total_outstanding', '>', t) for i, t in enumerate(thresholds)])
+    narrow = RulesEngine(wide.rules[1:])
+    wide_reason = wide.evaluate(applicants)['knockout_reason'].astype(object)
+    narrow_reason = narrow.evaluate(applicants)['knockout_reason'].astype(object)
+    # The first rule (over 8m) hits no one, so both sets agree
+    assert list(wide_reason) == list(narrow_reason)
+    first_hit = [next(rule.name for rule in wide.rules if value > rule.value) for value in applicants['total_outstanding']]
+    assert list(wide_reason) == first_hit
+
+def test_rules_on_missing_columns_warn_or_raise(applicants):
+    engine = RulesEngine().add_rule('max_outstanding', 'total_outstanding', '>', 5e6).add_rule('bvn', 'bvn_status', '==', 'flagged')
+    assert engine.evaluate(applicants)['skipped'] == ['bvn']
+    with pytest.raises(ValueError):
+        engine.evaluate(applicants, on_missing='raise')
@@ -0,0 +1,56 @@
+# tests/test_score_cache.py
+import pandas as pd
+import pytest
+
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+from src.score_cache import ScoreCache, SQLiteScoreBackend, frame_score_keys, score_key
+
+COLUMNS = ['age', 'gender']
+
+@pytest.fixture(scope='module')
+def model_path(customer_split, tmp_path_factory):
+    train_df, _ = customer_split
+    model_path = str(tmp_path_factory.mktemp('model') / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path)
+    return model_path
+
+def test_keys_match_across_record_and_frame_paths():
+    df = pd.DataFrame({'age': [30, None], 'gender': ['F', 'M']})
+    keys = frame_score_keys(df, COLUMNS, 'v1')
+    assert keys == [score_key('v1', COLUMNS, {'age': 30.0, 'gender': 'F'}),
+                    score_key('v1', COLUMNS, {'age': float('nan'), 'gender': 'M'})]
+    assert score_key('v2', COLUMNS, {'age': 30, 'gender': 'F'}) != keys[0]
+
+def test_lru_hit_miss_and_eviction():
+    cache = ScoreCache(max_entries=2)
+    cache.put_many({'a': (0.1, 'Good'), 'b': (0.9, 'Bad')})
+    assert cache.get('a') == (0.1, 'Good')
+    # 'b' is now least recently used and makes way for 'c'
+    cache.put('c', (0.2, 'Good'))
+    assert cache.get_many(['a', 'b', 'c']) == {'a': (0.1, 'Good'), 'c': (0.2, 'Good')}
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (3, 1, 1, 2)
+
+def test_expired_entries_miss():
+    cache = ScoreCache(ttl_seconds=0)
+    cache.put('a', (0.1, 'Good'))
+    assert cache.get('a') is None and cache.stats()['entries'] == 0
+
+def test_workers_share_scores_through_one_sqlite_file(model_path, customer_split, tmp_path):
+    _, test_df = customer_split
+    df = test_df.head(200)
+    path = str(tmp_path / 'score_cache.sqlite')
+    first = MLRiskScorer(model_path, cache=ScoreCache(backend=SQLiteScoreBackend(path)))
+    second = MLRiskScorer(model_path, cache=ScoreCache(backend=SQLiteScoreBackend(path)))
+
+    expected = first.score_batch(df)
+    n_unique = len(set(frame_score_keys(df, first.feature_columns, first.model_version)))
+    assert first.cache.stats()['misses'] == len(df) and first.cache.stats()['entries'] == n_unique
+
+    # The second worker's in-process cache is empty: every score comes from the shared file
+    pd.testing.assert_frame_equal(second.score_batch(df), expected)
+    stats = second.cache.stats()
+    assert stats['misses'] == 0 and stats['shared_hits'] == len(df)
+    assert second.predict_risk(df.iloc[0].to_dict()) == expected['risk'].iloc[0]
+    assert second.cache.stats()['shared_hits'] == len(df)
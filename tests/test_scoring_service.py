@@ -0,0 +1,52 @@
+# tests/test_scoring_service.py
+import asyncio
+import json
+
+import pytest
+
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+from src.scoring_service import ScoringServer
+
+@pytest.fixture(scope='module')
+def scorer(customer_split, tmp_path_factory):
+    train_df, _ = customer_split
+    model_path = str(tmp_path_factory.mktemp('model') / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path)
+    return MLRiskScorer(model_path)
+
+async def _request(port: int, method: str, path: str, payload=None, body: bytes = None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = body if body is not None else (json.dumps(payload).encode() if payload is not None else b'')
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(data)
+
+def test_concurrent_requests_are_micro_batched(scorer, customer_split):
+    _, test_df = customer_split
+    records = json.loads(test_df.head(40).to_json(orient='records'))
+    expected = scorer.score_batch(records)
+
+    async def run():
+        server = ScoringServer(scorer, port=0, max_batch_size=16, max_delay_ms=20)
+        await server.start()
+        try:
+            responses = await asyncio.gather(*(_request(server.port, 'POST', '/score', record) for record in records))
+            health = await _request(server.port, 'GET', '/health')
+            missing = await _request(server.port, 'GET', '/metrics')
+            invalid = await _request(server.port, 'POST', '/score', body=b'{not json')
+            unscorable = await _request(server.port, 'POST', '/score', {**records[0], 'age': 'forty'})
+        finally:
+            await server.stop()
+        return responses, health, missing, invalid, unscorable
+
+    responses, health, missing, invalid, unscorable = asyncio.run(run())
+    assert all(status == 200 for status, _ in responses)
+    assert [body['risk'] for _, body in responses] == list(expected['risk'])
+    assert [body['pd'] for _, body in responses] == pytest.approx(list(expected['pd']))
+    status, body = health
+    assert status == 200 and body['requests'] == len(records) and body['batches'] < len(records)
+    assert missing[0] == 404 and invalid[0] == 400 and unscorable[0] == 422
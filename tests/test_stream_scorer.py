@@ -0,0 +1,55 @@
+# tests/test_stream_scorer.py
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from src.model_trainer import train_and_save_model
+from src.risk_scorer import MLRiskScorer
+from src.stream_scorer import stream_score
+
+@pytest.fixture(scope='module')
+def scorer(customer_split, tmp_path_factory):
+    train_df, _ = customer_split
+    model_path = str(tmp_path_factory.mktemp('model') / 'credit_model.joblib')
+    train_and_save_model(train_df.copy(), model_path=model_path)
+    return MLRiskScorer(model_path)
+
+@pytest.fixture
+def applicants(customer_split):
+    _, test_df = customer_split
+    return test_df.head(250).reset_index(drop=True)
+
+def test_csv_and_jsonl_streams_match_batch_scoring(scorer, applicants):
+    expected = scorer.score_batch(applicants)
+
+    csv_sink = io.StringIO()
+    summary = stream_score(scorer, io.StringIO(applicants.to_csv(index=False)), csv_sink, chunk_size=100)
+    assert summary['rows'] == len(applicants) and summary['failed_rows'] == 0
+    scored = pd.read_csv(io.StringIO(csv_sink.getvalue()))
+    assert list(scored['customerid']) == list(applicants['customerid'])
+    assert list(scored['risk']) == list(expected['risk'])
+
+    jsonl_sink = io.StringIO()
+    stream_score(scorer, io.StringIO(applicants.to_json(orient='records', lines=True)), jsonl_sink,
+                 input_format='jsonl', output_format='jsonl', chunk_size=100)
+    lines = jsonl_sink.getvalue().split('\n')
+    # One record per line across chunk boundaries, with no blank lines in between
+    assert lines[-1] == '' and all(lines[:-1]) and len(lines) - 1 == len(applicants)
+    assert [json.loads(line)['pd'] for line in lines[:-1]] == pytest.approx(list(expected['pd']))
+
+def test_a_chunk_that_fails_to_score_is_skipped(scorer, applicants):
+    broken = applicants.astype({'age': object})
+    broken.loc[120, 'age'] = 'forty'
+    sink = io.StringIO()
+    summary = stream_score(scorer, io.StringIO(broken.to_csv(index=False)), sink, chunk_size=100)
+
+    assert summary['rows'] == 150 and summary['failed_rows'] == 100
+    scored = pd.read_csv(io.StringIO(sink.getvalue()))
+    assert list(scored['customerid']) == list(applicants['customerid'].drop(range(100, 200)))
+
+def test_bureau_chunks_missing_required_columns_are_skipped(scorer):
+    bureau = pd.DataFrame({'bvn': ['0123', '0456'], 'gender': ['M', 'F']})
+    summary = stream_score(scorer, io.StringIO(bureau.to_csv(index=False)), io.StringIO(), input_format='bureau')
+    assert summary['rows'] == 0 and summary['failed_rows'] == 2
@@ -0,0 +1,19 @@
+# tests/test_verdict_schema.py
+from src.gemini_standin import StandInModel
+from src.verdict_schema import parse_structured_verdict, verdict_generation_config
+
+def test_default_structured_config_turns_thinking_off_within_the_cap():
+    config = verdict_generation_config({'temperature': 0})
+    assert config['thinking_config'] == {'thinking_budget': 0}
+    assert config['max_output_tokens'] == 64 and config['temperature'] == 0
+    # A caller's own thinking_config wins
+    assert verdict_generation_config({'thinking_config': {'thinking_budget': 128}})['thinking_config'] == {'thinking_budget': 128}
+
+def test_thinking_tokens_no_longer_truncate_the_default_verdict():
+    model = StandInModel('gemini-2.5-flash', ttft_ms=0, ms_per_output_token=0, thinking_tokens=200)
+    prompt = "Average Credit Utilization: 80.0%"
+
+    answered = model.generate_content(prompt, generation_config=verdict_generation_config()).text
+    assert parse_structured_verdict(answered) == ('Bad', None)
+    thinking_on = verdict_generation_config({'thinking_config': {'thinking_budget': 1024}})
+    assert parse_structured_verdict(model.generate_content(prompt, generation_config=thinking_on).text)[0] == 'Unknown'